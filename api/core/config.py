@@ -1,22 +1,91 @@
-import os
+from functools import lru_cache
+from typing import Tuple
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    # Values are resolved once by pydantic-settings from the environment / .env file
+    # (env var names are the upper-cased field names, e.g. SUPABASE_URL).
+
+    # Enables debug-only endpoints (e.g. /auth/debug/decode-token); keep off in production
+    debug: bool = False
+
     # Supabase Configuration
-    supabase_url: str = os.getenv("SUPABASE_URL", "")
-    supabase_anon_key: str = os.getenv("SUPABASE_ANON_KEY", "")
-    supabase_service_role_key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    supabase_url: str = ""
+    supabase_anon_key: str = ""
+    supabase_service_role_key: str = ""
 
     # JWT Configuration
-    jwt_secret: str = os.getenv("JWT_SECRET", "secret-key")
+    jwt_secret: str = "secret-key"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # Verified Supabase JWT cache (seconds; 0 disables caching)
+    jwt_cache_ttl: int = 300
+    jwt_cache_maxsize: int = 10000
+    # How long (seconds) fetched JWKS signing keys are reused before refetching
+    jwks_cache_lifespan: int = 3600
+
+    # Bias detection model
+    bias_quantize_int8: bool = True
+    # Load the classifier during app startup instead of on the first request
+    bias_eager_load: bool = False
+    # Upper bound on concurrent Mistral requests when generating debias suggestions
+    debias_max_concurrency: int = 8
+
+    # Semantic cache for law-explanation responses (cosine similarity of query embeddings),
+    # scoped per user (and per conversation history on /chat). Off by default: at this
+    # threshold short questions with different meanings can still match each other
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.97
+    semantic_cache_ttl: int = 3600
+    semantic_cache_maxsize: int = 1024
+
+    # Save chat turns through the append_chat_pair RPC (ownership check + both inserts in
+    # one call); requires database/migrations/002_append_chat_pair.sql
+    chat_append_rpc: bool = False
+
+    # Positive conversation-ownership checks are reused for this long (seconds; 0 disables).
+    # The cache is per process: a delete only evicts it on the worker that served it, so
+    # other workers may treat a deleted conversation as owned for up to this long
+    conversation_owner_cache_ttl: int = 30
+    conversation_owner_cache_maxsize: int = 10000
+
+    # HITL review sessions (Redis-backed when REDIS_URL is set, in-memory otherwise)
+    redis_url: str = ""
+    hitl_session_ttl: int = 3600
+    # Supabase Storage bucket for uploaded review PDFs (empty keeps them on disk / in Redis)
+    hitl_pdf_bucket: str = ""
+
+    # Results of /process-pdf and /process-pdf-to-bias reused for identical uploads
+    # (keyed by user, SHA-256 of the file and processing options; seconds, 0 disables)
+    pdf_result_cache_ttl: int = 24 * 3600
+    pdf_result_cache_maxsize: int = 256
+
+    # Requests declaring a larger Content-Length (e.g. PDF uploads) are rejected with 413
+    max_upload_bytes: int = 50 * 1024 * 1024
+
+    # Worker threads for blocking calls (RAG/LLM, Supabase, PDF work) offloaded from the event loop
+    thread_pool_size: int = 100
+
+    # Shared httpx connection pool for Supabase (PostgREST + Auth) calls
+    supabase_max_connections: int = 200
+    supabase_max_keepalive_connections: int = 100
+    supabase_timeout: float = 120.0
+
+    # Root log level for API loggers
+    log_level: str = "INFO"
+
     # CORS
-    cors_origins: list = ["*"]
+    cors_origins: Tuple[str, ...] = ("*",)
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings instance (usable as a FastAPI dependency)."""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,17 +1,46 @@
-from typing import Dict
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from api.core.security import verify_supabase_token, extract_user_from_token
+import asyncio
+from typing import TYPE_CHECKING, Dict, Optional
+from fastapi import Depends, Header, HTTPException, Request, status
+from api.core.security import (
+    get_cached_token_payload,
+    verify_supabase_token,
+    extract_user_from_token,
+)
 
+if TYPE_CHECKING:
+    from module_a.interface import LawExplanationAPI
+    from module_c.interface import LetterGenerationAPI
+    from utility.pdf_processor import PDFProcessor
+    from utility.hitl_session_manager import HITLSessionManager
 
-security = HTTPBearer()
+
+_BEARER_PREFIX = "bearer "
+_ADMIN_ROLES = frozenset({"admin", "superadmin"})
+
+
+def _bearer_token(authorization: Optional[str]) -> str:
+    """Extract the token from an ``Authorization: Bearer <token>`` header."""
+    token = ""
+    if authorization and authorization[:7].lower() == _BEARER_PREFIX:
+        token = authorization[7:].strip()
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    authorization: Optional[str] = Header(None),
 ) -> Dict:
     """
     Dependency to get the current authenticated user from Supabase JWT token.
+
+    Already-verified tokens are served from the in-process cache; only a cache
+    miss (signature check, possible JWKS fetch) is offloaded to a worker thread
+    so it never blocks the event loop.
     
     Raises:
         HTTPException: If token is invalid or missing
@@ -19,8 +48,10 @@ async def get_current_user(
     Returns:
         User dictionary with id, email, role, etc.
     """
-    token = credentials.credentials
-    payload = verify_supabase_token(token)
+    token = _bearer_token(authorization)
+    payload = get_cached_token_payload(token)
+    if payload is None:
+        payload = await asyncio.to_thread(verify_supabase_token, token)
     user = extract_user_from_token(payload)
     return user
 
@@ -35,9 +66,32 @@ async def get_current_admin(user: Dict = Depends(get_current_user)) -> Dict:
     Returns:
         User dictionary
     """
-    if user.get("role") not in ["admin", "superadmin"]:
+    if user.get("role") not in _ADMIN_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can access this resource",
         )
     return user
+
+
+# Heavy services are created once in the app lifespan (see api.main) and shared via app.state.
+# These are async so FastAPI resolves them inline instead of in the threadpool.
+
+async def get_law_api(request: Request) -> "LawExplanationAPI":
+    """Dependency returning the shared LawExplanationAPI."""
+    return request.app.state.law_api
+
+
+async def get_letter_api(request: Request) -> "LetterGenerationAPI":
+    """Dependency returning the shared LetterGenerationAPI."""
+    return request.app.state.letter_api
+
+
+async def get_pdf_processor(request: Request) -> "PDFProcessor":
+    """Dependency returning the shared PDFProcessor."""
+    return request.app.state.pdf_processor
+
+
+async def get_session_manager(request: Request) -> "HITLSessionManager":
+    """Dependency returning the worker's HITL review-session manager."""
+    return request.app.state.session_manager
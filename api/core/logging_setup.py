@@ -0,0 +1,51 @@
+"""
+Logging setup for the API
+Routes records through a queue so request handlers never block on handler I/O
+"""
+
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: str = "INFO") -> QueueListener:
+    """
+    Attach a QueueHandler to the root logger and start a listener thread
+    that writes the queued records to stdout.
+
+    Args:
+        level: Root log level name
+
+    Returns:
+        The running QueueListener (call stop_logging() on shutdown to flush it)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
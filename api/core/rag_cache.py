@@ -0,0 +1,83 @@
+"""
+Semantic cache for law-explanation RAG responses.
+
+Entries are keyed by the normalized query embedding; a lookup returns the
+response of the most similar cached query when cosine similarity reaches the
+threshold. An optional context key (e.g. a hash of the conversation history)
+must also match exactly, so context-dependent answers are never reused for a
+different conversation.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from api.core.ttl_cache import TTLCache
+
+
+class SemanticCache:
+    """Thread-safe in-process LRU cache with TTL and cosine-similarity lookup."""
+
+    def __init__(self, threshold: float = 0.97, maxsize: int = 1024, ttl: float = 3600):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            maxsize: Maximum number of entries (least recently used evicted first)
+            ttl: Entry lifetime in seconds
+        """
+        self.threshold = threshold
+        # entry id -> (normalized embedding, context key, response); expiry and LRU eviction
+        # are handled by the TTLCache
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Stacked embeddings of the live entries, rebuilt lazily after inserts; rows whose
+        # entry has since expired or been evicted are skipped on lookup
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _stacked(self) -> Optional[np.ndarray]:
+        if self._matrix is None:
+            live = self._entries.items()
+            if not live:
+                return None
+            self._matrix_ids = [entry_id for entry_id, _ in live]
+            self._matrix = np.stack([entry[0] for _, entry in live])
+        return self._matrix
+
+    def get(self, embedding: np.ndarray, context_key: str = "") -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for the closest matching query, if any."""
+        query = self._normalize(embedding)
+        with self._lock:
+            matrix = self._stacked()
+            if matrix is None:
+                return None
+            similarities = matrix @ query
+            for idx in np.argsort(similarities)[::-1]:
+                if similarities[idx] < self.threshold:
+                    break
+                entry = self._entries.get(self._matrix_ids[idx])
+                if entry is None or entry[1] != context_key:
+                    continue
+                return dict(entry[2])
+        return None
+
+    def put(self, embedding: np.ndarray, response: Dict[str, Any], context_key: str = "") -> None:
+        """Store a response; the least recently used overflow is dropped."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._entries.set(self._next_id, (vector, context_key, dict(response)))
+            self._next_id += 1
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
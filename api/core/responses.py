@@ -0,0 +1,28 @@
+from typing import Any, Dict, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from api.core.config import settings
+
+
+def model_response(model: Type[BaseModel], result: Dict[str, Any]) -> ORJSONResponse:
+    """
+    Serialize a module result dict in the shape of ``model`` without a second validation pass.
+
+    Routes using this declare ``response_model=None`` (documenting ``model`` through
+    ``responses=``), so FastAPI skips its own validate-then-serialize step. Only the
+    model's fields are emitted, with defaults filled in, exactly as response_model would.
+    Results missing a required field, and every result when DEBUG is on, still go
+    through ``model.model_validate`` so malformed output fails as it did before.
+    """
+    if settings.debug:
+        model.model_validate(result)
+
+    content = {}
+    for name, field in model.model_fields.items():
+        if name in result:
+            content[name] = result[name]
+        elif field.is_required():
+            model.model_validate(result)
+        else:
+            content[name] = field.get_default(call_default_factory=True)
+    return ORJSONResponse(content)
@@ -1,10 +1,28 @@
 import os
 import json
-from typing import Dict, Optional
+import time
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
-from jwt import PyJWKClient, decode, InvalidTokenError, get_unverified_header
+from jwt import PyJWKClient, PyJWKClientError, decode, get_unverified_header, InvalidTokenError, InvalidSignatureError
 from fastapi import HTTPException, status
 from api.core.config import settings
+from api.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on signing keys kept per JWKS (rotation rarely leaves more than a couple live)
+MAX_CACHED_SIGNING_KEYS = 16
+
+# Minimum seconds between forced JWKS refetches triggered by signature failures, so a
+# stream of forged tokens with a known `kid` cannot turn into a stream of JWKS requests
+JWKS_REFRESH_MIN_INTERVAL = 60.0
+
+# Shared read-only fallback for missing nested claims
+_EMPTY_CLAIMS: Dict = {}
 
 
 class SupabaseJWT:
@@ -17,24 +35,114 @@ class SupabaseJWT:
         self.supabase_url = supabase_url.rstrip('/')
         self.jwks_url = f"{self.supabase_url}/auth/v1/.well-known/jwks.json"
         self._jwk_client: Optional[PyJWKClient] = None
-        print(f"[DEBUG] Initialized SupabaseJWT with URL: {self.supabase_url}")
-        print(f"[DEBUG] JWKS URL: {self.jwks_url}")
+        # Verified payloads keyed by a digest of the raw token: digest -> (payload, exp claim)
+        self._token_cache = TTLCache(maxsize=settings.jwt_cache_maxsize, ttl=settings.jwt_cache_ttl)
+        # Materialized signing keys keyed by JWKS `kid`
+        self._key_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._key_cache_lock = threading.Lock()
+        self._last_jwks_refresh = float("-inf")
+        logger.debug("Initialized SupabaseJWT with URL: %s", self.supabase_url)
+        logger.debug("JWKS URL: %s", self.jwks_url)
 
     @property
     def jwk_client(self) -> PyJWKClient:
         """Lazily initialize and cache the JWK client."""
         if self._jwk_client is None:
             try:
-                self._jwk_client = PyJWKClient(self.jwks_url)
-                print("[DEBUG] PyJWKClient initialized successfully")
+                self._jwk_client = PyJWKClient(
+                    self.jwks_url,
+                    cache_keys=True,
+                    max_cached_keys=MAX_CACHED_SIGNING_KEYS,
+                    lifespan=settings.jwks_cache_lifespan,
+                )
+                logger.debug("PyJWKClient initialized successfully")
             except Exception as e:
-                print(f"[ERROR] Failed to initialize PyJWKClient: {e}")
+                logger.error("Failed to initialize PyJWKClient: %s", e)
                 raise
         return self._jwk_client
 
+    def warm_up(self) -> None:
+        """Fetch the JWKS once so the first authenticated request skips the network round-trip."""
+        try:
+            keys = self.jwk_client.get_signing_keys()
+            for signing_key in keys:
+                if signing_key.key_id:
+                    self._store_signing_key(signing_key.key_id, signing_key.key)
+            logger.info("Pre-fetched %d JWKS signing key(s)", len(keys))
+        except Exception as e:
+            logger.warning("Could not pre-fetch JWKS signing keys: %s", e)
+
+    def _store_signing_key(self, kid: str, key: Any) -> None:
+        with self._key_cache_lock:
+            self._key_cache[kid] = key
+            while len(self._key_cache) > MAX_CACHED_SIGNING_KEYS:
+                self._key_cache.popitem(last=False)
+
+    def _get_signing_key(self, kid: Optional[str], refresh: bool = False) -> Any:
+        """Return the signing key for `kid`, hitting the JWK client only on a cache miss."""
+        if not refresh and kid:
+            key = self._key_cache.get(kid)
+            if key is not None:
+                return key
+
+        if refresh:
+            # Bypass PyJWKClient's own caches and refetch the JWKS
+            signing_key = PyJWKClient.match_kid(self.jwk_client.get_signing_keys(refresh=True), kid)
+            if signing_key is None:
+                raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        else:
+            signing_key = self.jwk_client.get_signing_key(kid)
+
+        key = signing_key.key
+        if kid:
+            self._store_signing_key(kid, key)
+        return key
+
+    def _claim_jwks_refresh(self) -> bool:
+        """Return True if a forced JWKS refetch is allowed now (at most one per JWKS_REFRESH_MIN_INTERVAL)."""
+        now = time.monotonic()
+        with self._key_cache_lock:
+            if now - self._last_jwks_refresh < JWKS_REFRESH_MIN_INTERVAL:
+                return False
+            self._last_jwks_refresh = now
+            return True
+
+    def _invalidate_signing_key(self, kid: Optional[str]) -> None:
+        if kid:
+            with self._key_cache_lock:
+                self._key_cache.pop(kid, None)
+
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        """Digest used as cache key so raw tokens are not retained in memory."""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get_cached_payload(self, token: str) -> Optional[Dict]:
+        """Return a previously verified payload if neither the cache entry nor the token has expired."""
+        key = self._token_key(token)
+        entry = self._token_cache.get(key)
+        if entry is None:
+            return None
+        payload, exp = entry
+        if exp is not None and exp <= time.time():
+            self._token_cache.pop(key)
+            return None
+        return payload
+
+    def _cache_payload(self, token: str, payload: Dict) -> None:
+        """Store a verified payload; lookups never return it past the token's own `exp` claim."""
+        exp = payload.get("exp")
+        exp = float(exp) if isinstance(exp, (int, float)) else None
+        if exp is not None and exp <= time.time():
+            return
+        self._token_cache.set(self._token_key(token), (payload, exp))
+
     def verify_token(self, token: str) -> Dict:
         """
         Verify a Supabase JWT token and return the payload.
+
+        Verified payloads are cached by token until the earlier of their
+        `exp` claim and `settings.jwt_cache_ttl`; invalid tokens are never cached.
         
         Args:
             token: JWT token string
@@ -45,36 +153,42 @@ class SupabaseJWT:
         Raises:
             HTTPException: If token is invalid or expired
         """
+        cached = self.get_cached_payload(token)
+        if cached is not None:
+            return cached
+
         try:
-            # First, decode without verification to see the header and payload
-            unverified_header = get_unverified_header(token)
-            print(f"[DEBUG] Token algorithm: {unverified_header.get('alg')}")
-            print(f"[DEBUG] Token kid: {unverified_header.get('kid')}")
-            
-            # Get signing key from JWKS
+            # Get signing key from JWKS (cached by kid)
             try:
-                signing_key = self.jwk_client.get_signing_key_from_jwt(token)
-                print(f"[DEBUG] Successfully retrieved signing key")
+                kid = get_unverified_header(token).get("kid")
+                signing_key = self._get_signing_key(kid)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Successfully retrieved signing key")
             except Exception as e:
-                print(f"[ERROR] Failed to get signing key: {e}")
+                logger.error("Failed to get signing key: %s", e)
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail=f"Could not retrieve signing key: {str(e)}",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             
-            # Decode and verify the token
-            payload = decode(
-                token,
-                signing_key.key,
-                algorithms=["RS256", "HS256", "ES256"],  # Support RS256, HS256, and ES256
-                options={"verify_aud": False},
-            )
-            print("[DEBUG] Token verified successfully")
+            # Decode and verify the token; required claims are checked on the verified payload
+            try:
+                payload = self._decode(token, signing_key)
+            except InvalidSignatureError:
+                # The kid may have been rotated to a new key; refetch and retry, but only
+                # if no other refetch happened recently, otherwise the token is just invalid
+                if not self._claim_jwks_refresh():
+                    raise
+                self._invalidate_signing_key(kid)
+                payload = self._decode(token, self._get_signing_key(kid, refresh=True))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Token verified successfully for sub: %s", payload.get("sub"))
+            self._cache_payload(token, payload)
             return payload
             
         except InvalidTokenError as e:
-            print(f"[ERROR] Invalid token: {e}")
+            logger.warning("Invalid token: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid authentication credentials: {str(e)}",
@@ -83,13 +197,22 @@ class SupabaseJWT:
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[ERROR] Token verification failed: {e}")
+            logger.error("Token verification failed: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+    @staticmethod
+    def _decode(token: str, key: Any) -> Dict:
+        return decode(
+            token,
+            key,
+            algorithms=["RS256", "HS256", "ES256"],  # Support RS256, HS256, and ES256
+            options={"verify_aud": False, "require": ["exp", "sub"]},
+        )
+
     def extract_user(self, payload: Dict) -> Dict:
         """
         Extract user information from token payload.
@@ -100,10 +223,13 @@ class SupabaseJWT:
         Returns:
             User object with id, email, role
         """
+        role = payload.get("role")
+        if not role:
+            role = (payload.get("app_metadata") or _EMPTY_CLAIMS).get("role", "user")
         return {
             "id": payload.get("sub"),
             "email": payload.get("email"),
-            "role": payload.get("role") or payload.get("app_metadata", {}).get("role", "user"),
+            "role": role,
             "phone": payload.get("phone"),
             "user_metadata": payload.get("user_metadata", {}),
         }
@@ -115,9 +241,16 @@ try:
     if settings.supabase_url:
         supabase_jwt = SupabaseJWT(settings.supabase_url)
     else:
-        print("[WARNING] SUPABASE_URL not configured")
+        logger.warning("SUPABASE_URL not configured")
 except Exception as e:
-    print(f"[ERROR] Failed to initialize Supabase JWT: {e}")
+    logger.error("Failed to initialize Supabase JWT: %s", e)
+
+
+def get_cached_token_payload(token: str) -> Optional[Dict]:
+    """Return the cached payload for an already-verified token, without blocking."""
+    if not supabase_jwt:
+        return None
+    return supabase_jwt.get_cached_payload(token)
 
 
 def verify_supabase_token(token: str) -> Dict:
@@ -0,0 +1,8 @@
+"""
+Re-export of the shared TTLCache (lives in utility/ so module_a and utility can use it
+without depending on the API package).
+"""
+
+from utility.ttl_cache import TTLCache
+
+__all__ = ["TTLCache"]
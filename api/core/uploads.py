@@ -0,0 +1,49 @@
+"""
+Helpers for spooling uploaded files to disk instead of buffering them in memory.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+# Size of each chunk copied from the upload stream to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def save_upload_to_temp_file(
+    file: UploadFile,
+    prefix: str = "upload_",
+    suffix: str = ".pdf",
+    hasher: Optional["hashlib._Hash"] = None
+) -> str:
+    """
+    Copy an uploaded file to a named temp file chunk by chunk and return its path.
+
+    If a hashlib object is given it is updated with every chunk, so the upload's
+    digest is available without a second pass over the file.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, prefix=prefix) as tmp:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                tmp.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+        except Exception:
+            tmp.close()
+            remove_file(tmp.name)
+            raise
+        return tmp.name
+
+
+def remove_file(path: str) -> None:
+    """Delete a temp file, logging (not raising) on failure."""
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not remove temp file {path}: {e}")
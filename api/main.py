@@ -1,12 +1,80 @@
-from fastapi import FastAPI
+import asyncio
+import gc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import anyio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from api.routes import law_explanation, letter_generation, bias_detection, pdf_processing, supabase_auth, bias_detection_hitl, chat_history
 from api.core.config import settings
+from api.core.logging_setup import setup_logging, stop_logging
+from api.core.security import supabase_jwt
+from module_a.interface import LawExplanationAPI
+from module_c.interface import LetterGenerationAPI
+from utility.pdf_processor import get_processor
+
+
+# Services built in the gunicorn master before workers fork (see gunicorn.conf.py);
+# None when each worker builds its own in the lifespan (e.g. plain `uvicorn`)
+_preloaded_services = None
+
+
+def preload_services() -> None:
+    """
+    Build the heavy services once in the gunicorn master (preload_app) so forked
+    workers share the loaded model weights copy-on-write instead of each loading them.
+    """
+    global _preloaded_services
+    _preloaded_services = (LawExplanationAPI(), LetterGenerationAPI(), get_processor())
+    if settings.bias_eager_load:
+        bias_detection.get_classifier()
+    # Move everything allocated so far out of the GC's reach so collections in the
+    # workers don't write to (and un-share) the preloaded objects' pages
+    gc.freeze()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging(settings.log_level)
+    # Size both thread pools used for blocking work: asyncio.to_thread uses the loop's
+    # default executor, Starlette's run_in_threadpool (sync routes/deps) uses anyio's limiter
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.thread_pool_size)
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+
+    # Load the heavy services (embedding model, vector DB, templates, LLM clients)
+    # concurrently, once per worker, and share them with routes through app.state
+    if _preloaded_services is not None:
+        app.state.law_api, app.state.letter_api, app.state.pdf_processor = _preloaded_services
+    else:
+        app.state.law_api, app.state.letter_api, app.state.pdf_processor = await asyncio.gather(
+            asyncio.to_thread(LawExplanationAPI),
+            asyncio.to_thread(LetterGenerationAPI),
+            asyncio.to_thread(get_processor),
+        )
+    # Warm the JWKS cache so the first authenticated request doesn't pay for the fetch
+    if supabase_jwt:
+        await asyncio.to_thread(supabase_jwt.warm_up)
+    # Create the Supabase clients (and their shared connection pool) up front
+    if settings.supabase_url:
+        await asyncio.to_thread(supabase_auth.warm_up_supabase)
+    # Review sessions are per worker (never preloaded: Redis connections must not cross a fork)
+    app.state.session_manager = await asyncio.to_thread(bias_detection_hitl.build_session_manager)
+    if settings.bias_eager_load:
+        await asyncio.to_thread(bias_detection.get_classifier)
+    yield
+    supabase_auth.close_supabase()
+    stop_logging()
+
 
 app = FastAPI(
     title="Nepal Justice Weaver API",
     description="API for Law Explanation and Letter Generation modules with Supabase Auth.",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -18,6 +86,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Reject oversized uploads up front, before the body is spooled
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.max_upload_bytes:
+        return JSONResponse(status_code=413, content={"detail": "Request body too large"})
+    return await call_next(request)
+
 # Include Routers
 app.include_router(supabase_auth.router, prefix="/api/v1", tags=["Authentication"])
 app.include_router(law_explanation.router, prefix="/api/v1/law-explanation", tags=["Law Explanation"])
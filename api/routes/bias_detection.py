@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from api.core.deps import get_current_user
+from api.core.config import settings
 from api.schemas import (
     BiasDetectionRequest,
     BiasDetectionResponse,
@@ -13,30 +15,91 @@ from api.schemas import (
     DebiasBatchResponse,
     DebiasBatchItem,
 )
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import math
+import threading
 import re
-from transformers import pipeline
-import torch
+from api.core.ttl_cache import TTLCache
 from module_a.llm_client import MistralClient
 
 router = APIRouter()
 
-# Initialize the model
-try:
+# Label mapping (tuple index == model class id)
+BIAS_LABELS = (
+    "neutral",
+    "gender",
+    "religional",
+    "caste",
+    "religion",
+    "appearence",
+    "socialstatus",
+    "amiguity",
+    "political",
+    "Age",
+    "Disablity",
+)
+NEUTRAL_LABEL = BIAS_LABELS[0]
+
+MODEL_NAME = "sangy1212/distilbert-base-nepali-fine-tuned"
+
+# The classifier (and transformers/torch) are loaded on first use, or at startup
+# when BIAS_EAGER_LOAD is set, so workers that never serve bias detection stay light.
+_classifier = None
+_classifier_error: Optional[str] = None
+_classifier_lock = threading.Lock()
+
+
+def _load_classifier():
+    import torch
+    from transformers import pipeline
+
     print("Loading bias detection model...")
-    model_name = "sangy1212/distilbert-base-nepali-fine-tuned"
-    
-    classifier = pipeline(
+    use_cuda = torch.cuda.is_available()
+
+    # One forward pass should cover a typical paragraph; fp16 halves activation bandwidth on GPU
+    model = pipeline(
         "text-classification",
-        model=model_name,
-        tokenizer=model_name,
-        device=0 if torch.cuda.is_available() else -1,
-        batch_size=16
+        model=MODEL_NAME,
+        tokenizer=MODEL_NAME,
+        device=0 if use_cuda else -1,
+        batch_size=64,
+        torch_dtype=torch.float16 if use_cuda else torch.float32,
     )
+    # Have the pipeline emit category names directly instead of "LABEL_<n>"
+    model.model.config.id2label = dict(enumerate(BIAS_LABELS))
+    model.model.config.label2id = {label: idx for idx, label in enumerate(BIAS_LABELS)}
+
+    # Dynamic INT8 quantization of the Linear layers for CPU inference
+    if not use_cuda and settings.bias_quantize_int8:
+        try:
+            model.model = torch.quantization.quantize_dynamic(
+                model.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("Bias detection model quantized to INT8 for CPU inference")
+        except Exception as e:
+            print(f"INT8 quantization failed, using FP32 model: {e}")
     print("Bias detection model loaded successfully!")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    classifier = None
+    return model
+
+
+def get_classifier():
+    """Return the bias classifier pipeline, loading it on first call (None if loading failed)."""
+    global _classifier, _classifier_error
+    if _classifier is not None or _classifier_error is not None:
+        return _classifier
+
+    with _classifier_lock:
+        if _classifier is None and _classifier_error is None:
+            try:
+                _classifier = _load_classifier()
+                clear_bias_cache()
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                _classifier_error = str(e)
+    return _classifier
+
 
 # Initialize Mistral client for debiasing suggestions
 try:
@@ -45,33 +108,26 @@ except Exception as e:
     print(f"Error initializing Mistral client: {e}")
     mistral_client = None
 
-# Label mapping
-id_to_label = {
-    "LABEL_0":  "neutral",
-    "LABEL_1":  "gender",
-    "LABEL_2":  "religional",
-    "LABEL_3":  "caste",
-    "LABEL_4":  "religion",
-    "LABEL_5":  "appearence",
-    "LABEL_6":  "socialstatus",
-    "LABEL_7":  "amiguity",
-    "LABEL_8":  "political",
-    "LABEL_9":  "Age",
-    "LABEL_10": "Disablity"
-}
+# Pad each batch to its longest sentence and cap sequence length for the forward pass
+CLASSIFIER_CALL_KWARGS = {"padding": True, "truncation": True, "max_length": 128}
+
+# Sentence splitting patterns, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿअ-ह])|(?<=[।.!?])(?=$)')
+_FALLBACK_SPLIT_RE = re.compile(r'(?<=[।.!?])\s+')
+
 
 def split_into_sentences(text: str) -> List[str]:
     """
     Splits Nepali text into sentences.
     """
-    # Clean whitespace
-    text = text.replace('\n', ' ')
-    text = re.sub(r'\s+', ' ', text).strip()
+    # Clean whitespace (\s already covers newlines)
+    text = _WHITESPACE_RE.sub(' ', text).strip()
     
     # Split sentences intelligently
-    sentences = re.split(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿअ-ह])|(?<=[।.!?])(?=$)', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     if len(sentences) <= 1:  # fallback
-        sentences = re.split(r'(?<=[।.!?])\s+', text)
+        sentences = _FALLBACK_SPLIT_RE.split(text)
     
     # Final cleaning
     cleaned = [s.strip(' ।.!?').strip() for s in sentences if len(s.strip()) > 5]
@@ -79,18 +135,116 @@ def split_into_sentences(text: str) -> List[str]:
     return cleaned
 
 
+# Cheap prefilter for sentences that cannot carry bias: no Devanagari letters at all
+# (numbers, English fragments, punctuation) or a bare stock phrase such as a salutation.
+_DEVANAGARI_LETTER_RE = re.compile(r'[\u0904-\u0939\u0958-\u0961\u0972-\u097F]')
+_NEUTRAL_STOCK_PHRASE_RE = re.compile(
+    r'(?:धन्यवाद|नमस्ते|नमस्कार|भवदीय|निवेदक|निवेदन|मिति|विषय)\s*[:：]?\s*[\d०-९/\-.]*'
+)
+_PREFILTER_PREDICTION = {"label": NEUTRAL_LABEL, "score": 1.0}
+
+
+def is_trivially_neutral(sentence: str) -> bool:
+    """Return True when a sentence can be labelled neutral without running the model."""
+    return (
+        _DEVANAGARI_LETTER_RE.search(sentence) is None
+        or _NEUTRAL_STOCK_PHRASE_RE.fullmatch(sentence) is not None
+    )
+
+
+# Memoized detection results: (text digest, threshold) -> response; entries only go stale
+# when the classifier is reloaded, which clears the cache
+BIAS_CACHE_MAXSIZE = 1024
+_bias_cache = TTLCache(maxsize=BIAS_CACHE_MAXSIZE, ttl=math.inf)
+
+
+def _bias_cache_key(text: str, confidence_threshold: float) -> Tuple[bytes, float]:
+    normalized = _WHITESPACE_RE.sub(' ', text).strip()
+    digest = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+    # Exact threshold: rounding could serve a result built with a slightly different cut-off
+    return digest, float(confidence_threshold)
+
+
+def clear_bias_cache() -> None:
+    """Drop memoized results (call whenever the classifier is reloaded)."""
+    _bias_cache.clear()
+
+
 def run_bias_detection(text: str, confidence_threshold: float) -> BiasDetectionResponse:
     """Core bias detection logic reused by single and batch endpoints."""
+    return run_bias_detection_batch([text], confidence_threshold)[0]
+
+
+def run_bias_detection_batch(texts: List[str], confidence_threshold: float) -> List[BiasDetectionResponse]:
+    """
+    Detect bias for several texts with a single classifier call.
+
+    Cached texts are answered directly; the remaining texts are split into
+    sentences, de-duplicated across the whole batch and classified together,
+    then the predictions are scattered back per text.
+    """
+    classifier = get_classifier()
     if classifier is None:
         raise HTTPException(
             status_code=503,
             detail="Bias detection model is not available. Please check server logs."
         )
 
-    sentences = split_into_sentences(text)
+    responses: List[Optional[BiasDetectionResponse]] = [None] * len(texts)
+    pending: Dict[Tuple[bytes, float], List[int]] = {}
 
+    for idx, text in enumerate(texts):
+        key = _bias_cache_key(text, confidence_threshold)
+        cached = _bias_cache.get(key)
+        if cached is not None:
+            responses[idx] = cached
+        else:
+            pending.setdefault(key, []).append(idx)
+
+    if not pending:
+        return responses
+
+    sentences_per_key = {
+        key: split_into_sentences(texts[indexes[0]])
+        for key, indexes in pending.items()
+    }
+    unique_sentences = dict.fromkeys(
+        sentence for sentences in sentences_per_key.values() for sentence in sentences
+    )
+
+    # Obviously-neutral sentences never reach the model
+    prediction_by_sentence: Dict[str, Dict] = {}
+    model_sentences = []
+    for sentence in unique_sentences:
+        if is_trivially_neutral(sentence):
+            prediction_by_sentence[sentence] = _PREFILTER_PREDICTION
+        else:
+            model_sentences.append(sentence)
+
+    if model_sentences:
+        import torch
+        with torch.inference_mode():
+            predictions = classifier(model_sentences, **CLASSIFIER_CALL_KWARGS)
+        prediction_by_sentence.update(zip(model_sentences, predictions))
+
+    for key, indexes in pending.items():
+        response = _build_bias_response(
+            sentences_per_key[key], prediction_by_sentence, confidence_threshold
+        )
+        _bias_cache.set(key, response)
+        for idx in indexes:
+            responses[idx] = response
+
+    return responses
+
+
+def _build_bias_response(
+    sentences: List[str],
+    prediction_by_sentence: Dict[str, Dict],
+    confidence_threshold: float,
+) -> BiasDetectionResponse:
     if not sentences:
-        return BiasDetectionResponse(
+        return BiasDetectionResponse.model_construct(
             success=True,
             total_sentences=0,
             biased_count=0,
@@ -99,18 +253,16 @@ def run_bias_detection(text: str, confidence_threshold: float) -> BiasDetectionR
             error="No valid sentences found in the provided text."
         )
 
-    predictions = classifier(sentences)
-
     results: List[BiasResult] = []
     biased_count = 0
     neutral_count = 0
 
-    for sentence, prediction in zip(sentences, predictions):
-        label_id = prediction['label']
-        category = id_to_label.get(label_id, "unknown")
+    for sentence in sentences:
+        prediction = prediction_by_sentence[sentence]
+        category = prediction['label']
         confidence = prediction['score']
 
-        is_biased = category != "neutral" and confidence >= confidence_threshold
+        is_biased = category != NEUTRAL_LABEL and confidence >= confidence_threshold
 
         if is_biased:
             biased_count += 1
@@ -120,23 +272,51 @@ def run_bias_detection(text: str, confidence_threshold: float) -> BiasDetectionR
         results.append(BiasResult(
             sentence=sentence,
             category=category,
-            confidence=confidence,
+            confidence=float(confidence),
             is_biased=is_biased
         ))
 
-    return BiasDetectionResponse(
+    return BiasDetectionResponse.model_construct(
         success=True,
         total_sentences=len(sentences),
         biased_count=biased_count,
         neutral_count=neutral_count,
-        results=results
+        results=results,
+        error=None
     )
 
 
-def generate_debiased_sentence(payload: DebiasSentenceRequest) -> DebiasSentenceResponse:
-    """Use Mistral to suggest a bias-free rewrite for a sentence."""
+# Successful suggestions keyed by (sentence, category, context)
+DEBIAS_CACHE_MAXSIZE = 10_000
+_debias_cache = TTLCache(maxsize=DEBIAS_CACHE_MAXSIZE, ttl=math.inf)
+
+
+def generate_debiased_sentence(
+    payload: DebiasSentenceRequest,
+    use_cache: bool = True,
+) -> DebiasSentenceResponse:
+    """
+    Use Mistral to suggest a bias-free rewrite for a sentence.
+
+    Repeated (sentence, category, context) inputs are answered from an in-process
+    cache; pass `use_cache=False` to force a fresh suggestion (e.g. regeneration),
+    which then replaces the cached one.
+    """
+    cache_key = (payload.sentence, payload.category, payload.context)
+    if use_cache:
+        cached = _debias_cache.get(cache_key)
+        if cached is not None:
+            return DebiasSentenceResponse.model_construct(
+                success=True,
+                original_sentence=payload.sentence,
+                category=payload.category,
+                suggestion=cached,
+                rationale=None,
+                error=None,
+            )
+
     if mistral_client is None or mistral_client.client is None:
-        return DebiasSentenceResponse(
+        return DebiasSentenceResponse.model_construct(
             success=False,
             original_sentence=payload.sentence,
             category=payload.category,
@@ -157,26 +337,33 @@ def generate_debiased_sentence(payload: DebiasSentenceRequest) -> DebiasSentence
         "Rewrite this single sentence in Nepali so it is neutral and inclusive. Output only the rewritten sentence."
     )
 
+    needs_danda = payload.sentence.rstrip().endswith('।')
+
     try:
         raw = mistral_client.generate_response(
             prompt=user_prompt,
             system_prompt=system_prompt,
             temperature=0.3,
         )
-        # Post-process: keep first line, strip extras
-        suggestion = raw.splitlines()[0].strip()
-        if payload.sentence.rstrip().endswith('।') and not suggestion.endswith('।'):
+        # Post-process: keep first line (without splitting the whole reply), strip extras
+        suggestion = raw.partition("\n")[0].strip()
+        if not suggestion:
+            raise ValueError("LLM returned an empty suggestion")
+        if needs_danda and not suggestion.endswith('।'):
             suggestion += '।'
-        return DebiasSentenceResponse(
+
+        _debias_cache.set(cache_key, suggestion)
+
+        return DebiasSentenceResponse.model_construct(
             success=True,
             original_sentence=payload.sentence,
             category=payload.category,
-            suggestion=suggestion.strip(),
+            suggestion=suggestion,
             rationale=None,
             error=None,
         )
     except Exception as e:
-        return DebiasSentenceResponse(
+        return DebiasSentenceResponse.model_construct(
             success=False,
             original_sentence=payload.sentence,
             category=payload.category,
@@ -186,36 +373,75 @@ def generate_debiased_sentence(payload: DebiasSentenceRequest) -> DebiasSentence
         )
 
 
-@router.post("/detect-bias", response_model=BiasDetectionResponse)
+async def agenerate_debiased_sentences(
+    items: List[DebiasSentenceRequest],
+) -> List[DebiasSentenceResponse]:
+    """
+    Generate debiased suggestions for many sentences concurrently.
+
+    Each suggestion is an independent Mistral round-trip, so they are issued in
+    parallel (bounded by `settings.debias_max_concurrency`). Results keep the
+    order of `items`; a failed call becomes an unsuccessful response.
+    """
+    semaphore = asyncio.Semaphore(settings.debias_max_concurrency)
+
+    async def _debias(item: DebiasSentenceRequest) -> DebiasSentenceResponse:
+        async with semaphore:
+            return await asyncio.to_thread(generate_debiased_sentence, item)
+
+    responses = await asyncio.gather(
+        *(_debias(item) for item in items),
+        return_exceptions=True,
+    )
+
+    results: List[DebiasSentenceResponse] = []
+    for item, result in zip(items, responses):
+        if isinstance(result, Exception):
+            result = DebiasSentenceResponse.model_construct(
+                success=False,
+                original_sentence=item.sentence,
+                category=item.category,
+                suggestion=None,
+                rationale=None,
+                error=str(result),
+            )
+        results.append(result)
+    return results
+
+
+@router.post("/detect-bias", response_model=BiasDetectionResponse, response_class=ORJSONResponse)
 async def detect_bias(request: BiasDetectionRequest, user: dict = Depends(get_current_user)):
     """Detect bias in Nepali text using a fine-tuned model."""
     try:
-        return run_bias_detection(request.text, request.confidence_threshold)
+        # Model loading and inference are blocking; keep them off the event loop
+        return await asyncio.to_thread(run_bias_detection, request.text, request.confidence_threshold)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/detect-bias/batch", response_model=BatchBiasDetectionResponse)
+@router.post("/detect-bias/batch", response_model=BatchBiasDetectionResponse, response_class=ORJSONResponse)
 async def detect_bias_batch(request: BatchBiasDetectionRequest, user: dict = Depends(get_current_user)):
     """Detect bias for multiple inputs in one request."""
     try:
-        if classifier is None:
+        if await asyncio.to_thread(get_classifier) is None:
             raise HTTPException(
                 status_code=503,
                 detail="Bias detection model is not available. Please check server logs."
             )
 
         if not request.texts:
-            return BatchBiasDetectionResponse(success=False, items=[], error="No texts provided.")
+            return BatchBiasDetectionResponse.model_construct(success=False, items=[], error="No texts provided.")
 
-        items: List[BatchBiasItem] = []
-        for idx, text in enumerate(request.texts):
-            result = run_bias_detection(text or "", request.confidence_threshold)
-            items.append(BatchBiasItem(index=idx, input_text=text, result=result))
+        texts = [text or "" for text in request.texts]
+        results = await asyncio.to_thread(run_bias_detection_batch, texts, request.confidence_threshold)
+        items: List[BatchBiasItem] = [
+            BatchBiasItem(index=idx, input_text=text, result=result)
+            for idx, (text, result) in enumerate(zip(texts, results))
+        ]
 
-        return BatchBiasDetectionResponse(success=True, items=items)
+        return BatchBiasDetectionResponse.model_construct(success=True, items=items)
     except HTTPException:
         raise
     except Exception as e:
@@ -227,9 +453,9 @@ async def health_check():
     Check if the bias detection service is running properly.
     """
     return {
-        "status": "healthy" if classifier is not None else "unhealthy",
-        "model_loaded": classifier is not None,
-        "model_name": "sangy1212/distilbert-base-nepali-fine-tuned"
+        "status": "healthy" if _classifier_error is None else "unhealthy",
+        "model_loaded": _classifier is not None,
+        "model_name": MODEL_NAME
     }
 
 
@@ -239,15 +465,16 @@ async def debias_sentence(request: DebiasSentenceRequest, user: dict = Depends(g
     return generate_debiased_sentence(request)
 
 
-@router.post("/debias-sentence/batch", response_model=DebiasBatchResponse)
+@router.post("/debias-sentence/batch", response_model=DebiasBatchResponse, response_class=ORJSONResponse)
 async def debias_sentence_batch(request: DebiasBatchRequest, user: dict = Depends(get_current_user)):
     """Suggest bias-free alternatives for multiple sentences."""
     if not request.items:
-        return DebiasBatchResponse(success=False, items=[], error="No items provided")
+        return DebiasBatchResponse.model_construct(success=False, items=[], error="No items provided")
 
-    results: List[DebiasBatchItem] = []
-    for idx, item in enumerate(request.items):
-        result = generate_debiased_sentence(item)
-        results.append(DebiasBatchItem(index=idx, input=item, result=result))
+    responses = await agenerate_debiased_sentences(request.items)
+    results: List[DebiasBatchItem] = [
+        DebiasBatchItem(index=idx, input=item, result=result)
+        for idx, (item, result) in enumerate(zip(request.items, responses))
+    ]
 
-    return DebiasBatchResponse(success=True, items=results)
+    return DebiasBatchResponse.model_construct(success=True, items=results)
@@ -3,9 +3,11 @@ Human-in-the-Loop Bias Detection API
 Handles the interactive workflow for bias detection with human approval
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from fastapi.responses import Response
-from api.core.deps import get_current_user
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
+from fastapi.responses import ORJSONResponse, Response
+from api.core.deps import get_current_user, get_pdf_processor, get_session_manager
+from api.core.config import settings
+from api.core.uploads import save_upload_to_temp_file, remove_file
 import fitz  # PyMuPDF
 from api.schemas import (
     StartReviewResponse,
@@ -18,34 +20,59 @@ from api.schemas import (
     BiasReviewItem,
     DebiasSentenceRequest,
 )
-from api.routes.bias_detection import run_bias_detection, generate_debiased_sentence
+from api.routes.bias_detection import (
+    run_bias_detection_batch,
+    generate_debiased_sentence,
+    agenerate_debiased_sentences,
+)
 from utility.pdf_processor import PDFProcessor
-from utility.hitl_session_manager import HITLSessionManager
+from utility.hitl_session_manager import HITLSessionManager, create_session_manager
+from api.routes.supabase_auth import get_supabase_admin
 from utility.pdf_regenerator import PDFRegenerator
 from typing import Optional
-import uuid
+import asyncio
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+def build_session_manager() -> HITLSessionManager:
+    """
+    Build the review-session manager (called once per worker from the app lifespan).
 
-# Initialize global session manager
-session_manager = HITLSessionManager()
+    Redis-backed when REDIS_URL is configured; original PDFs go to Supabase Storage
+    when HITL_PDF_BUCKET is set, so sessions only carry an object key.
+    """
+    return create_session_manager(
+        redis_url=settings.redis_url,
+        ttl_seconds=settings.hitl_session_ttl,
+        pdf_bucket=get_supabase_admin().storage.from_(settings.hitl_pdf_bucket) if settings.hitl_pdf_bucket else None
+    )
 
-# Initialize PDF processor
-pdf_processor = PDFProcessor()
 
 # Initialize PDF regenerator
 pdf_regenerator = PDFRegenerator()
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (possibly a list or weak validators) against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
 @router.post("/start-review", response_model=StartReviewResponse)
 async def start_bias_review(
     file: UploadFile = File(...),
     refine_with_llm: bool = Form(True),
     confidence_threshold: float = Form(0.7),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    pdf_processor: PDFProcessor = Depends(get_pdf_processor),
+    session_manager: HITLSessionManager = Depends(get_session_manager)
 ):
     """
     Start a human-in-the-loop bias detection review session.
@@ -57,16 +84,20 @@ async def start_bias_review(
     4. Generate suggestions for biased sentences
     5. Return session ID with all results for review
     """
+    pdf_path = None
     try:
         logger.info(f"Starting HITL review for file: {file.filename}")
 
-        # Read PDF bytes
-        pdf_content = await file.read()
+        # Spool the upload to disk in chunks instead of buffering it in memory
+        pdf_path = await save_upload_to_temp_file(file, prefix="hitl_")
 
         # Process PDF to extract sentences
-        result = pdf_processor.process_pdf_from_bytes(
-            pdf_bytes=pdf_content,
-            refine_with_llm=refine_with_llm
+        # PyMuPDF extraction and LLM refinement block; run them in a worker thread
+        result = await asyncio.to_thread(
+            pdf_processor.process_pdf,
+            pdf_path=pdf_path,
+            refine_with_llm=refine_with_llm,
+            include_raw_text=True  # Kept in the review session
         )
 
         if not result["success"]:
@@ -84,14 +115,23 @@ async def start_bias_review(
                 detail="No sentences could be extracted from the PDF"
             )
 
-        # Run bias detection on each sentence individually
+        # Run bias detection for all sentences in one batched classifier call
         logger.info(f"Running bias detection on {len(sentences)} sentences")
         all_bias_results = []
 
+        # Repeated boilerplate (headers, footers, citations) is detected once and fanned back out
+        unique_sentences = list(dict.fromkeys(sentences))
+
+        # Classifier inference is blocking; keep it off the event loop
+        unique_detection_results = await asyncio.to_thread(
+            run_bias_detection_batch, unique_sentences, confidence_threshold
+        )
+        detection_by_sentence = dict(zip(unique_sentences, unique_detection_results))
+
         for sentence in sentences:
-            bias_detection_result = run_bias_detection(sentence, confidence_threshold)
+            bias_detection_result = detection_by_sentence[sentence]
             if bias_detection_result.success and bias_detection_result.results:
-                # Each sentence gets analyzed separately
+                # Each sentence keeps its own results
                 all_bias_results.extend(bias_detection_result.results)
             else:
                 logger.warning(f"Bias detection failed for sentence: {sentence[:50]}...")
@@ -109,26 +149,35 @@ async def start_bias_review(
         biased_count = 0
         neutral_count = 0
 
-        for bias_result in all_bias_results:
-            sentence_id = str(uuid.uuid4())
+        # Generate suggestions concurrently, once per unique biased (sentence, category)
+        biased_keys = list(dict.fromkeys(
+            (r.sentence, r.category) for r in all_bias_results if r.is_biased
+        ))
+        debias_responses = await agenerate_debiased_sentences([
+            DebiasSentenceRequest(sentence=sentence, category=category, context=None)
+            for sentence, category in biased_keys
+        ])
+        suggestions = {
+            key: debias_response.suggestion
+            for key, debias_response in zip(biased_keys, debias_responses)
+            if debias_response.success
+        }
+
+        # Draw entropy for all sentence ids at once (128 bits each, hex-encoded)
+        id_entropy = os.urandom(16 * len(all_bias_results)).hex()
+
+        for idx, bias_result in enumerate(all_bias_results):
+            sentence_id = id_entropy[idx * 32:(idx + 1) * 32]
 
-            # Generate suggestion for biased sentences
             suggestion = None
             if bias_result.is_biased:
                 biased_count += 1
-                # Generate debiased suggestion
-                debias_request = DebiasSentenceRequest(
-                    sentence=bias_result.sentence,
-                    category=bias_result.category,
-                    context=None
-                )
-                debias_response = generate_debiased_sentence(debias_request)
-                if debias_response.success:
-                    suggestion = debias_response.suggestion
+                suggestion = suggestions.get((bias_result.sentence, bias_result.category))
             else:
                 neutral_count += 1
 
-            review_item = BiasReviewItem(
+            # Fields come from our own detection/debias output, so skip validation
+            review_item = BiasReviewItem.model_construct(
                 sentence_id=sentence_id,
                 original_sentence=bias_result.sentence,
                 is_biased=bias_result.is_biased,
@@ -141,17 +190,19 @@ async def start_bias_review(
 
             review_items.append(review_item)
 
-        # Create session with PDF bytes for regeneration
+        # Create session with the PDF path for regeneration
         session = session_manager.create_session(
             filename=file.filename,
             sentences=review_items,
             raw_text=raw_text,
-            original_pdf_bytes=pdf_content
+            original_pdf_path=pdf_path,
+            owner_id=user["id"]
         )
+        pdf_path = None  # now owned by the session
 
         logger.info(f"Created HITL session {session.session_id} with {len(review_items)} sentences")
 
-        return StartReviewResponse(
+        return StartReviewResponse.model_construct(
             success=True,
             session_id=session.session_id,
             total_sentences=len(review_items),
@@ -166,12 +217,16 @@ async def start_bias_review(
     except Exception as e:
         logger.error(f"Error starting HITL review: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if pdf_path:
+            remove_file(pdf_path)
 
 
 @router.post("/approve-suggestion", response_model=ApprovalResponse)
 async def approve_suggestion(
     request: ApprovalRequest,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    session_manager: HITLSessionManager = Depends(get_session_manager)
 ):
     """
     Approve or reject a suggestion for a biased sentence.
@@ -197,7 +252,7 @@ async def approve_suggestion(
             if not success:
                 raise HTTPException(status_code=404, detail="Sentence not found in session")
 
-            return ApprovalResponse(
+            return ApprovalResponse.model_construct(
                 success=True,
                 sentence_id=request.sentence_id,
                 message="Suggestion approved successfully"
@@ -215,7 +270,7 @@ async def approve_suggestion(
             if not success:
                 raise HTTPException(status_code=404, detail="Sentence not found in session")
 
-            return ApprovalResponse(
+            return ApprovalResponse.model_construct(
                 success=True,
                 sentence_id=request.sentence_id,
                 message="Suggestion rejected. Please regenerate a new suggestion."
@@ -234,7 +289,8 @@ async def approve_suggestion(
 @router.post("/regenerate-suggestion", response_model=RegenerateSuggestionResponse)
 async def regenerate_suggestion(
     request: RegenerateSuggestionRequest,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    session_manager: HITLSessionManager = Depends(get_session_manager)
 ):
     """
     Regenerate a new suggestion for a rejected sentence using LLM.
@@ -245,11 +301,7 @@ async def regenerate_suggestion(
             raise HTTPException(status_code=404, detail="Session not found")
 
         # Find the sentence
-        target_sentence = None
-        for sentence in session.sentences:
-            if sentence.sentence_id == request.sentence_id:
-                target_sentence = sentence
-                break
+        target_sentence = session.get_sentence(request.sentence_id)
 
         if not target_sentence:
             raise HTTPException(status_code=404, detail="Sentence not found in session")
@@ -261,7 +313,8 @@ async def regenerate_suggestion(
             context=None
         )
 
-        debias_response = generate_debiased_sentence(debias_request)
+        # Bypass the suggestion cache so the reviewer gets a fresh rewrite
+        debias_response = generate_debiased_sentence(debias_request, use_cache=False)
 
         if not debias_response.success:
             raise HTTPException(
@@ -281,7 +334,7 @@ async def regenerate_suggestion(
 
         logger.info(f"Regenerated suggestion for sentence {request.sentence_id}")
 
-        return RegenerateSuggestionResponse(
+        return RegenerateSuggestionResponse.model_construct(
             success=True,
             sentence_id=request.sentence_id,
             new_suggestion=debias_response.suggestion
@@ -297,7 +350,8 @@ async def regenerate_suggestion(
 @router.post("/generate-pdf")
 async def generate_debiased_pdf(
     request: GeneratePDFRequest,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    session_manager: HITLSessionManager = Depends(get_session_manager)
 ):
     """
     Generate final debiased text file with all approved suggestions applied.
@@ -320,8 +374,9 @@ async def generate_debiased_pdf(
                        f"Needs regeneration: {stats['needs_regeneration_count']}"
             )
 
-        # Check if original PDF bytes are available
-        if not session.original_pdf_bytes:
+        # Check if the original PDF is available
+        original_pdf_path, original_pdf_bytes = session_manager.get_original_pdf(session)
+        if not original_pdf_path and not original_pdf_bytes:
             raise HTTPException(
                 status_code=400,
                 detail="Original PDF not found in session. Cannot regenerate PDF."
@@ -330,10 +385,13 @@ async def generate_debiased_pdf(
         # Regenerate PDF with approved suggestions using PDFRegenerator
         logger.info(f"Regenerating PDF for session {request.session_id}")
 
-        success, pdf_bytes, error_msg, sentence_details = pdf_regenerator.regenerate_pdf(
-            original_pdf_bytes=session.original_pdf_bytes,
+        # PyMuPDF work is blocking; run it in a worker thread to keep the event loop free
+        success, pdf_bytes, error_msg, sentence_details = await asyncio.to_thread(
+            pdf_regenerator.regenerate_pdf,
+            original_pdf_bytes=original_pdf_bytes,
             sentences=session.sentences,
-            output_filename=session.original_filename
+            output_filename=session.original_filename,
+            original_pdf_path=original_pdf_path
         )
 
         if not success:
@@ -354,7 +412,7 @@ async def generate_debiased_pdf(
         base_filename = session.original_filename.rsplit('.', 1)[0] if '.' in session.original_filename else session.original_filename
         output_filename = f"debiased_{base_filename}.pdf"
 
-        # Return PDF file as downloadable response
+        # The regenerated PDF is already in memory; send it as-is (Response sets Content-Length)
         return Response(
             content=pdf_bytes,
             media_type="application/pdf",
@@ -375,11 +433,17 @@ async def generate_debiased_pdf(
 @router.get("/session/{session_id}", response_model=SessionStatusResponse)
 async def get_session_status(
     session_id: str,
-    user: dict = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
+    session_manager: HITLSessionManager = Depends(get_session_manager)
 ):
     """
     Get the current status of a review session.
 
+    Supports conditional polling: the response carries an ETag derived from the
+    session version, and a matching If-None-Match returns 304 Not Modified.
+
     Returns:
     - Session details
     - Review progress statistics
@@ -390,9 +454,14 @@ async def get_session_status(
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
+        etag = f'"{session.session_id}-{session.version}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         stats = session_manager.get_session_stats(session_id)
 
-        return SessionStatusResponse(
+        return SessionStatusResponse.model_construct(
             success=True,
             session_id=session.session_id,
             status=session.status,
@@ -411,11 +480,11 @@ async def get_session_status(
 
 
 @router.get("/health")
-async def hitl_health_check():
+async def hitl_health_check(session_manager: HITLSessionManager = Depends(get_session_manager)):
     """
     Check if the HITL service is running properly.
     """
-    active_sessions = len(session_manager.get_all_sessions())
+    active_sessions = session_manager.count_sessions()
 
     return {
         "status": "healthy",
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from api.core.deps import get_current_user
+from api.core.config import settings
+from api.core.ttl_cache import TTLCache
 from api.schemas import (
     ConversationCreate,
     ConversationUpdate,
@@ -10,8 +13,19 @@ from api.schemas import (
 )
 from api.routes.supabase_auth import get_supabase_admin
 from typing import List, Dict
+import logging
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# (user_id, conversation_id) pairs known to be owned; ownership only changes on delete.
+# Per process: delete_conversation evicts the entry here only, so other workers can keep a
+# stale positive for up to conversation_owner_cache_ttl (kept short for that reason)
+_ownership_cache = TTLCache(
+    maxsize=settings.conversation_owner_cache_maxsize,
+    ttl=settings.conversation_owner_cache_ttl
+)
 
 
 # ============================================================
@@ -37,37 +51,50 @@ async def get_recent_context(
     try:
         supabase = get_supabase_admin()
 
-        # Verify conversation ownership
-        conv_check = supabase.table("chat_conversations")\
-            .select("id")\
+        # Get recent messages of the owned conversation in one query (embedded
+        # chat_messages, ordered by timestamp descending, then reversed)
+        result = supabase.table("chat_conversations")\
+            .select("id, chat_messages(role, content)")\
             .eq("id", conversation_id)\
             .eq("user_id", user_id)\
+            .order("timestamp", desc=True, foreign_table="chat_messages")\
+            .limit(limit, foreign_table="chat_messages")\
             .execute()
 
-        if not conv_check.data:
-            return []
-
-        # Get recent messages, ordered by timestamp descending, then reverse
-        result = supabase.table("chat_messages")\
-            .select("role, content")\
-            .eq("conversation_id", conversation_id)\
-            .order("timestamp", desc=True)\
-            .limit(limit)\
-            .execute()
-
-        if not result.data:
+        if not result.data or not result.data[0]["chat_messages"]:
             return []
 
         # Reverse to get chronological order (oldest to newest)
-        messages = list(reversed(result.data))
+        messages = list(reversed(result.data[0]["chat_messages"]))
 
         return messages
 
     except Exception as e:
         # Log error but don't fail - just return empty context
-        print(f"Error fetching conversation context: {e}")
+        logger.warning(f"Error fetching conversation context: {e}")
         return []
 
+def user_owns_conversation(supabase, conversation_id: str, user_id: str) -> bool:
+    """
+    Check that the conversation belongs to the user (blocking Supabase call on a cache miss).
+
+    Only positive results are cached, and delete_conversation invalidates them.
+    """
+    key = (user_id, conversation_id)
+    if _ownership_cache.get(key):
+        return True
+
+    conv_check = supabase.table("chat_conversations")\
+        .select("id")\
+        .eq("id", conversation_id)\
+        .eq("user_id", user_id)\
+        .execute()
+
+    owns = bool(conv_check.data)
+    if owns:
+        _ownership_cache.set(key, True)
+    return owns
+
 # ============================================================
 # Conversation Endpoints
 # ============================================================
@@ -89,9 +116,7 @@ async def create_conversation(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create conversation")
 
-        conversation_data = result.data[0]
-        conversation_data["message_count"] = 0
-        return conversation_data
+        return ConversationResponse.model_construct(**result.data[0], message_count=0)
 
     except HTTPException:
         raise
@@ -109,9 +134,10 @@ async def get_conversations(
     try:
         supabase = get_supabase_admin()
 
-        # Get conversations
+        # Get conversations with their message counts in one round-trip
+        # (PostgREST embeds the aggregated chat_messages count per row)
         conv_result = supabase.table("chat_conversations")\
-            .select("*")\
+            .select("*, chat_messages(count)")\
             .eq("user_id", user["id"])\
             .order("updated_at", desc=True)\
             .range(offset, offset + limit - 1)\
@@ -119,14 +145,9 @@ async def get_conversations(
 
         conversations = []
         for conv in conv_result.data:
-            # Get message count for each conversation
-            msg_count = supabase.table("chat_messages")\
-                .select("id", count="exact")\
-                .eq("conversation_id", conv["id"])\
-                .execute()
-
-            conv["message_count"] = msg_count.count if msg_count.count else 0
-            conversations.append(conv)
+            counts = conv.pop("chat_messages", None) or [{}]
+            conv["message_count"] = counts[0].get("count") or 0
+            conversations.append(ConversationResponse.model_construct(**conv))
 
         return conversations
 
@@ -143,30 +164,25 @@ async def get_conversation(
     try:
         supabase = get_supabase_admin()
 
-        # Get conversation
+        # Get conversation with its messages embedded
         conv_result = supabase.table("chat_conversations")\
-            .select("*")\
+            .select("*, chat_messages(*)")\
             .eq("id", conversation_id)\
             .eq("user_id", user["id"])\
+            .order("timestamp", foreign_table="chat_messages")\
             .execute()
 
         if not conv_result.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
         conversation = conv_result.data[0]
+        messages = conversation.pop("chat_messages")
 
-        # Get messages
-        messages_result = supabase.table("chat_messages")\
-            .select("*")\
-            .eq("conversation_id", conversation_id)\
-            .order("timestamp")\
-            .execute()
-
-        return {
+        return ConversationDetailResponse.model_construct(
             **conversation,
-            "messages": messages_result.data,
-            "message_count": len(messages_result.data)
-        }
+            messages=[MessageResponse.model_construct(**row) for row in messages],
+            message_count=len(messages)
+        )
 
     except HTTPException:
         raise
@@ -184,16 +200,6 @@ async def update_conversation(
     try:
         supabase = get_supabase_admin()
 
-        # Verify ownership
-        conv_check = supabase.table("chat_conversations")\
-            .select("id")\
-            .eq("id", conversation_id)\
-            .eq("user_id", user["id"])\
-            .execute()
-
-        if not conv_check.data:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-
         # Build update dict
         update_dict = {}
         if request.title is not None:
@@ -202,18 +208,17 @@ async def update_conversation(
         if not update_dict:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        # Update conversation
+        # Update conversation (no rows updated means it doesn't exist or isn't owned)
         result = supabase.table("chat_conversations")\
             .update(update_dict)\
             .eq("id", conversation_id)\
+            .eq("user_id", user["id"])\
             .execute()
 
         if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update conversation")
+            raise HTTPException(status_code=404, detail="Conversation not found")
 
-        conversation_data = result.data[0]
-        conversation_data["message_count"] = None
-        return conversation_data
+        return ConversationResponse.model_construct(**result.data[0], message_count=None)
 
     except HTTPException:
         raise
@@ -229,6 +234,7 @@ async def delete_conversation(
     """Delete a conversation and all its messages."""
     try:
         supabase = get_supabase_admin()
+        _ownership_cache.pop((user["id"], conversation_id))
 
         # Delete conversation (messages cascade deleted)
         result = supabase.table("chat_conversations")\
@@ -263,13 +269,7 @@ async def add_message(
         supabase = get_supabase_admin()
 
         # Verify conversation ownership
-        conv_check = supabase.table("chat_conversations")\
-            .select("id")\
-            .eq("id", conversation_id)\
-            .eq("user_id", user["id"])\
-            .execute()
-
-        if not conv_check.data:
+        if not user_owns_conversation(supabase, conversation_id, user["id"]):
             raise HTTPException(status_code=404, detail="Conversation not found")
 
         # Validate role
@@ -293,7 +293,7 @@ async def add_message(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create message")
 
-        return result.data[0]
+        return MessageResponse.model_construct(**result.data[0])
 
     except HTTPException:
         raise
@@ -312,25 +312,20 @@ async def get_messages(
     try:
         supabase = get_supabase_admin()
 
-        # Verify conversation ownership
-        conv_check = supabase.table("chat_conversations")\
-            .select("id")\
+        # Get messages embedded in the owned conversation (ownership check and fetch in one query)
+        result = supabase.table("chat_conversations")\
+            .select("id, chat_messages(*)")\
             .eq("id", conversation_id)\
             .eq("user_id", user["id"])\
+            .order("timestamp", foreign_table="chat_messages")\
+            .range(offset, offset + limit - 1, foreign_table="chat_messages")\
             .execute()
 
-        if not conv_check.data:
+        if not result.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
-        # Get messages
-        result = supabase.table("chat_messages")\
-            .select("*")\
-            .eq("conversation_id", conversation_id)\
-            .order("timestamp")\
-            .range(offset, offset + limit - 1)\
-            .execute()
-
-        return result.data
+        # Rows come from our own table, so build the response models without re-validating each one
+        return [MessageResponse.model_construct(**row) for row in result.data[0]["chat_messages"]]
 
     except HTTPException:
         raise
@@ -347,25 +342,17 @@ async def delete_message(
     try:
         supabase = get_supabase_admin()
 
-        # Get message to verify ownership
+        # Get message with its conversation's owner to verify ownership
         message_result = supabase.table("chat_messages")\
-            .select("conversation_id")\
+            .select("conversation_id, chat_conversations(user_id)")\
             .eq("id", message_id)\
             .execute()
 
         if not message_result.data:
             raise HTTPException(status_code=404, detail="Message not found")
 
-        conversation_id = message_result.data[0]["conversation_id"]
-
-        # Verify conversation ownership
-        conv_check = supabase.table("chat_conversations")\
-            .select("id")\
-            .eq("id", conversation_id)\
-            .eq("user_id", user["id"])\
-            .execute()
-
-        if not conv_check.data:
+        conversation = message_result.data[0]["chat_conversations"] or {}
+        if conversation.get("user_id") != user["id"]:
             raise HTTPException(status_code=403, detail="Permission denied")
 
         # Delete message
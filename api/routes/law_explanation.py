@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
-from api.core.deps import get_current_user
+from fastapi.responses import StreamingResponse
+from api.core.deps import get_current_user, get_law_api
+from api.core.responses import model_response
 from api.schemas import (
     ExplanationRequest,
     ExplanationResponse,
@@ -7,34 +9,211 @@ from api.schemas import (
     ChatResponse,
     MessageCreate
 )
-from module_a.interface import LawExplanationAPI
-from api.routes.chat_history import get_recent_context
+from module_a.interface import LawExplanationAPI, ExplanationResult
+from api.core.config import settings
+from api.core.rag_cache import SemanticCache
+from api.routes.chat_history import get_recent_context, user_owns_conversation
 from api.routes.supabase_auth import get_supabase_admin
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-law_api = LawExplanationAPI()
 
-@router.post("/explain", response_model=ExplanationResponse)
-async def explain_law(request: ExplanationRequest, user: dict = Depends(get_current_user)):
+rag_cache = SemanticCache(
+    threshold=settings.semantic_cache_threshold,
+    maxsize=settings.semantic_cache_maxsize,
+    ttl=settings.semantic_cache_ttl
+)
+
+
+def _cache_scope(user: dict, context: list = None) -> str:
+    """
+    Semantic cache scope: entries are only reused for the same user and, on /chat,
+    the same conversation history (hashed), never across users.
+    """
+    if not context:
+        return user["id"]
+    digest = hashlib.sha1(json.dumps(context, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{user['id']}:{digest}"
+
+
+# Per-request fields that must not be stored with, or served from, a cached answer
+_UNCACHED_FIELDS = ("query", "original_query", "summarized_query")
+
+
+def _cache_put(embedding, result: ExplanationResult, scope: str) -> None:
+    rag_cache.put(embedding, {k: v for k, v in result.items() if k not in _UNCACHED_FIELDS}, scope)
+
+
+def _cache_get(embedding, query: str, scope: str):
+    """Cached answer for a similar query in this scope, labelled with the current query."""
+    cached = rag_cache.get(embedding, scope)
+    if cached is not None:
+        cached["query"] = query
+    return cached
+
+
+# Fields of a Module A result stored as the assistant message's metadata, with their defaults
+_CHAT_METADATA_DEFAULTS = {
+    "summary": "",
+    "key_point": "",
+    "next_steps": "",
+    "sources": [],
+    "context_used": False,
+    "is_non_legal": False,
+}
+
+
+def _raise_for_error(result: ExplanationResult) -> None:
+    """Surface a failure reported by Module A (an `error` key) as a 500 instead of a partial answer."""
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+
+
+def _save_chat_turn(
+    supabase,
+    conversation_id: str,
+    user_id: str,
+    query: str,
+    result: ExplanationResult
+) -> None:
+    """
+    Persist the user message and assistant response of a chat turn.
+
+    With CHAT_APPEND_RPC enabled this is a single `append_chat_pair` call that also
+    enforces ownership (database/migrations/002_append_chat_pair.sql); otherwise it
+    is one bulk insert and the caller must have verified ownership.
+    """
+    assistant_content = result.get("explanation", "")
+    metadata = {key: result.get(key, default) for key, default in _CHAT_METADATA_DEFAULTS.items()}
+
+    if settings.chat_append_rpc:
+        supabase.rpc("append_chat_pair", {
+            "p_conversation_id": conversation_id,
+            "p_user_id": user_id,
+            "p_user_content": query,
+            "p_assistant_content": assistant_content,
+            "p_assistant_metadata": metadata,
+        }).execute()
+        return
+
+    # Rows of one insert would share the same default timestamp; set them explicitly
+    # so the pair stays in order when messages are sorted by timestamp
+    now = datetime.now(timezone.utc)
+    user_message_data = {
+        "conversation_id": conversation_id,
+        "role": "user",
+        "content": query,
+        "timestamp": now.isoformat()
+    }
+
+    assistant_message_data = {
+        "conversation_id": conversation_id,
+        "role": "assistant",
+        "content": assistant_content,
+        "timestamp": (now + timedelta(microseconds=1)).isoformat(),
+        "metadata": metadata
+    }
+
+    supabase.table("chat_messages")\
+        .insert([user_message_data, assistant_message_data])\
+        .execute()
+
+
+@router.post("/explain", response_model=None, responses={200: {"model": ExplanationResponse}})
+async def explain_law(
+    request: ExplanationRequest,
+    user: dict = Depends(get_current_user),
+    law_api: LawExplanationAPI = Depends(get_law_api)
+):
     try:
-        result = law_api.get_explanation(request.query)
+        # Embed once: for the cache lookup and, on a miss, for retrieval
+        embedding = await asyncio.to_thread(law_api.embed_query, request.query)
+        if settings.semantic_cache_enabled:
+            cached = _cache_get(embedding, request.query, user["id"])
+            if cached is not None:
+                return model_response(ExplanationResponse, cached)
 
-        if "error" in result:
-             # If it's a handled error from the module, we might still want to return 200 with error info
-             # or 500 depending on design. Let's stick to the schema.
-             # If result has error key, it might not match ExplanationResponse structure fully if we aren't careful.
-             # Module A returns a dict with keys matching schema mostly.
-             pass
+        # The RAG pipeline (vector search + LLM) blocks; keep it off the event loop
+        result = await asyncio.to_thread(law_api.get_explanation, request.query, embedding)
 
-        return result
+        _raise_for_error(result)
+
+        if settings.semantic_cache_enabled:
+            _cache_put(embedding, result, user["id"])
+
+        return model_response(ExplanationResponse, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/chat", response_model=ChatResponse)
+def _discard(*futures) -> None:
+    """
+    Cancel background futures that will no longer be awaited (e.g. after an error),
+    retrieving the exception of finished ones so it isn't logged as never retrieved.
+    """
+    for future in futures:
+        if future is None:
+            continue
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            future.exception()
+
+
+async def _prepare_chat(request: ChatRequest, user: dict, law_api: LawExplanationAPI, supabase):
+    """
+    Shared first half of /chat and /chat/stream: fetch the conversation context
+    and embed the query concurrently, start the ownership check, and look the
+    query up in the semantic cache.
+
+    Returns:
+        (context, cache_scope, embedding, cached_result, ownership_check)
+    """
+    conversation_id = request.conversation_id
+
+    # Embedding the query doesn't depend on the conversation, so it runs alongside
+    # the context fetch; the ownership check for saving the turn runs concurrently too
+    # (unless the append_chat_pair RPC enforces ownership when saving).
+    embedding_task = asyncio.ensure_future(asyncio.to_thread(law_api.embed_query, request.query))
+    context = []
+    ownership_check = None
+    try:
+        if conversation_id:
+            if not settings.chat_append_rpc:
+                ownership_check = asyncio.ensure_future(
+                    asyncio.to_thread(user_owns_conversation, supabase, conversation_id, user["id"])
+                )
+            context = await get_recent_context(
+                conversation_id=conversation_id,
+                user_id=user["id"],
+                limit=5
+            )
+        embedding = await embedding_task
+
+        cached = None
+        cache_scope = _cache_scope(user, context)
+        if settings.semantic_cache_enabled:
+            cached = _cache_get(embedding, request.query, cache_scope)
+    except BaseException:
+        _discard(embedding_task, ownership_check)
+        raise
+
+    return context, cache_scope, embedding, cached, ownership_check
+
+
+@router.post("/chat", response_model=None, responses={200: {"model": ChatResponse}})
 async def chat_with_context(
     request: ChatRequest,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    law_api: LawExplanationAPI = Depends(get_law_api)
 ):
     """
     Context-aware chat endpoint that:
@@ -44,75 +223,119 @@ async def chat_with_context(
     4. Sends appropriate query to RAG pipeline
     5. Saves both user message and assistant response to database
     """
+    ownership_check = None
     try:
         supabase = get_supabase_admin()
         conversation_id = request.conversation_id
 
-        # Step 1: Fetch conversation context if conversation_id is provided
-        context = []
-        if conversation_id:
-            context = await get_recent_context(
-                conversation_id=conversation_id,
-                user_id=user["id"],
-                limit=5
-            )
+        # Step 1: Fetch conversation context (served from the semantic cache when possible)
+        context, cache_scope, embedding, result, ownership_check = await _prepare_chat(
+            request, user, law_api, supabase
+        )
 
         # Step 2: Get context-aware explanation
-        result = law_api.get_explanation_with_context(
-            query=request.query,
-            conversation_history=context
-        )
+        if result is None:
+            result = await asyncio.to_thread(
+                law_api.get_explanation_with_context,
+                query=request.query,
+                conversation_history=context,
+                query_embedding=embedding
+            )
+            _raise_for_error(result)
+            if settings.semantic_cache_enabled:
+                _cache_put(embedding, result, cache_scope)
 
         # Debug: Log sources
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"[Chat API] Sources count: {len(result.get('sources', []))}")
-        if result.get('sources'):
-            logger.info(f"[Chat API] First source: {result['sources'][0]}")
+        # Formatting the source dict isn't free; skip it entirely unless INFO is enabled
+        if logger.isEnabledFor(logging.INFO):
+            sources = result.get('sources') or []
+            logger.info("[Chat API] Sources count: %d", len(sources))
+            if sources:
+                logger.info("[Chat API] First source: %s", sources[0])
 
         # Step 3: Save messages to database if conversation_id is provided
-        if conversation_id:
-            # Verify conversation ownership
-            conv_check = supabase.table("chat_conversations")\
-                .select("id")\
-                .eq("id", conversation_id)\
-                .eq("user_id", user["id"])\
-                .execute()
-
-            if conv_check.data:
-                # Save user message
-                user_message_data = {
-                    "conversation_id": conversation_id,
-                    "role": "user",
-                    "content": request.query
-                }
-
-                supabase.table("chat_messages")\
-                    .insert(user_message_data)\
-                    .execute()
-
-                # Save assistant response
-                assistant_message_data = {
-                    "conversation_id": conversation_id,
-                    "role": "assistant",
-                    "content": result.get("explanation", ""),
-                    "metadata": {
-                        "summary": result.get("summary", ""),
-                        "key_point": result.get("key_point", ""),
-                        "next_steps": result.get("next_steps", ""),
-                        "sources": result.get("sources", []),
-                        "context_used": result.get("context_used", False),
-                        "is_non_legal": result.get("is_non_legal", False)
-                    }
-                }
-
-                supabase.table("chat_messages")\
-                    .insert(assistant_message_data)\
-                    .execute()
-
-        return result
+        if conversation_id and (ownership_check is None or await ownership_check):
+            await asyncio.to_thread(
+                _save_chat_turn, supabase, conversation_id, user["id"], request.query, result
+            )
+
+        return model_response(ChatResponse, result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Not awaited when explanation failed before the save step
+        _discard(ownership_check)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    responses={200: {
+        "content": {"text/event-stream": {}},
+        "description": "Server-Sent Events: `delta` events carry `{\"content\": str}` text chunks "
+                       "as they are generated; a final `result` event carries the full ChatResponse.",
+    }}
+)
+async def chat_with_context_stream(
+    request: ChatRequest,
+    user: dict = Depends(get_current_user),
+    law_api: LawExplanationAPI = Depends(get_law_api)
+):
+    """
+    Streaming variant of /chat (Server-Sent Events).
+
+    Explanation text is forwarded as it is generated, so the first bytes arrive
+    after retrieval instead of after the full LLM response. Once generation
+    completes, the final structured response is sent as a `result` event and the
+    turn is cached and saved exactly like /chat.
+    """
+    try:
+        supabase = get_supabase_admin()
+        conversation_id = request.conversation_id
+
+        context, cache_scope, embedding, cached, ownership_check = await _prepare_chat(
+            request, user, law_api, supabase
+        )
+        save_turn = bool(conversation_id) and (ownership_check is None or await ownership_check)
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    def event_stream():
+        # Runs in Starlette's threadpool, so the blocking RAG/LLM/Supabase calls are fine here
+        result = cached
+        if result is None:
+            for event in law_api.get_explanation_with_context_stream(
+                query=request.query,
+                conversation_history=context,
+                query_embedding=embedding
+            ):
+                if event["type"] == "delta":
+                    yield _sse_event("delta", {"content": event["content"]})
+                else:
+                    result = event["result"]
+            if settings.semantic_cache_enabled and "error" not in result:
+                _cache_put(embedding, result, cache_scope)
+
+        yield _sse_event("result", result)
+
+        if save_turn and "error" not in result:
+            try:
+                _save_chat_turn(supabase, conversation_id, user["id"], request.query, result)
+            except Exception as e:
+                logger.error("[Chat API] Failed to save streamed chat turn: %s", e)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
-from api.core.deps import get_current_user
+from api.core.deps import get_current_user, get_letter_api
+from api.core.responses import model_response
 from api.schemas import (
     LetterGenerationRequest, LetterGenerationResponse,
     TemplateSearchRequest, TemplateSearchResponse,
@@ -7,64 +8,65 @@ from api.schemas import (
     TemplateFillRequest, TemplateFillResponse
 )
 from module_c.interface import LetterGenerationAPI
+import asyncio
 
 router = APIRouter()
-letter_api = LetterGenerationAPI()
 
 # ... existing endpoints ...
 
-@router.post("/search-template", response_model=TemplateSearchResponse)
-async def search_template(request: TemplateSearchRequest, user: dict = Depends(get_current_user)):
+@router.post("/search-template", response_model=None, responses={200: {"model": TemplateSearchResponse}})
+async def search_template(request: TemplateSearchRequest, user: dict = Depends(get_current_user), letter_api: LetterGenerationAPI = Depends(get_letter_api)):
     try:
-        result = letter_api.search_template(request.query)
-        return result
+        result = await asyncio.to_thread(letter_api.search_template, request.query)
+        return model_response(TemplateSearchResponse, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/get-template-details", response_model=TemplateDetailsResponse)
-async def get_template_details(request: TemplateDetailsRequest, user: dict = Depends(get_current_user)):
+@router.post("/get-template-details", response_model=None, responses={200: {"model": TemplateDetailsResponse}})
+async def get_template_details(request: TemplateDetailsRequest, user: dict = Depends(get_current_user), letter_api: LetterGenerationAPI = Depends(get_letter_api)):
     try:
-        result = letter_api.get_template_details(request.template_name)
-        return result
+        result = await asyncio.to_thread(letter_api.get_template_details, request.template_name)
+        return model_response(TemplateDetailsResponse, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/fill-template", response_model=TemplateFillResponse)
-async def fill_template(request: TemplateFillRequest, user: dict = Depends(get_current_user)):
+@router.post("/fill-template", response_model=None, responses={200: {"model": TemplateFillResponse}})
+async def fill_template(request: TemplateFillRequest, user: dict = Depends(get_current_user), letter_api: LetterGenerationAPI = Depends(get_letter_api)):
     try:
-        result = letter_api.fill_template(request.template_name, request.placeholders)
-        return result
+        result = await asyncio.to_thread(letter_api.fill_template, request.template_name, request.placeholders)
+        return model_response(TemplateFillResponse, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate-letter", response_model=LetterGenerationResponse)
-async def generate_letter(request: LetterGenerationRequest, user: dict = Depends(get_current_user)):
+@router.post("/generate-letter", response_model=None, responses={200: {"model": LetterGenerationResponse}})
+async def generate_letter(request: LetterGenerationRequest, user: dict = Depends(get_current_user), letter_api: LetterGenerationAPI = Depends(get_letter_api)):
     try:
         # Check if we need to analyze or generate
         # For simplicity, we assume the user might want to generate directly
         # If additional_data is provided, we use it.
         
-        result = letter_api.generate_smart_letter(
+        result = await asyncio.to_thread(
+            letter_api.generate_smart_letter,
             description=request.description,
             template_name=request.template_name,
             additional_data=request.additional_data
         )
         
-        return result
+        return model_response(LetterGenerationResponse, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/analyze-requirements", response_model=LetterGenerationResponse)
-async def analyze_requirements(request: LetterGenerationRequest):
+@router.post("/analyze-requirements", response_model=None, responses={200: {"model": LetterGenerationResponse}})
+async def analyze_requirements(request: LetterGenerationRequest, letter_api: LetterGenerationAPI = Depends(get_letter_api)):
     try:
-        result = letter_api.analyze_requirements(request.description)
+        result = await asyncio.to_thread(letter_api.analyze_requirements, request.description)
         # Map result to response schema
-        return {
+        return model_response(LetterGenerationResponse, {
             "success": result.get("success", False),
             "template_used": result.get("template_name"),
             "detected_placeholders": result.get("detected_placeholders"),
             "missing_fields": result.get("missing_fields"),
             "error": result.get("error")
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,7 +4,10 @@ Handles Nepali PDF uploads and processing for bias detection
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from api.core.deps import get_current_user
+from api.core.deps import get_current_user, get_pdf_processor
+from api.core.config import settings
+from api.core.ttl_cache import TTLCache
+from api.core.uploads import save_upload_to_temp_file, remove_file
 from api.schemas import (
     PDFProcessingResponse,
     PDFToBiasDetectionRequest,
@@ -12,34 +15,46 @@ from api.schemas import (
     BiasResult,
 )
 from typing import List, Optional
+import asyncio
+import hashlib
 import logging
+import os
 from utility.pdf_processor import PDFProcessor
-from .bias_detection import run_bias_detection
+from .bias_detection import run_bias_detection_batch
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize PDF Processor
-pdf_processor = PDFProcessor()
+# Responses for previously processed uploads, keyed by (endpoint, user id, SHA-256
+# of the file, processing options) so repeated uploads skip extraction, LLM
+# refinement and classification. Scoped per user so documents are never shared.
+pdf_result_cache = TTLCache(
+    maxsize=settings.pdf_result_cache_maxsize,
+    ttl=settings.pdf_result_cache_ttl
+)
 
 
 @router.post("/process-pdf", response_model=PDFProcessingResponse)
 async def process_pdf(
     file: UploadFile = File(...),
     refine_with_llm: bool = Form(default=True),
-    user: dict = Depends(get_current_user)
+    include_raw_text: bool = Form(default=False),
+    user: dict = Depends(get_current_user),
+    pdf_processor: PDFProcessor = Depends(get_pdf_processor)
 ):
     """
     Upload a Nepali PDF and extract sentences.
     
     - **file**: PDF file to process (required)
     - **refine_with_llm**: Whether to refine sentences using Mistral LLM (default: True)
+    - **include_raw_text**: Whether to return the raw extracted text (default: False)
     
     Returns:
     - Extracted sentences as a list
     - Total number of sentences
     - Raw extracted text (optional)
     """
+    pdf_path = None
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(
@@ -49,19 +64,29 @@ async def process_pdf(
         
         logger.info(f"Processing PDF: {file.filename}")
         
-        # Read file contents
-        contents = await file.read()
+        # Spool the upload to disk in chunks instead of buffering it in memory
+        hasher = hashlib.sha256()
+        pdf_path = await save_upload_to_temp_file(file, hasher=hasher)
         
-        if not contents:
+        if os.path.getsize(pdf_path) == 0:
             raise HTTPException(
                 status_code=400,
                 detail="Empty file provided"
             )
         
+        cache_key = ("process-pdf", user["id"], hasher.hexdigest(), refine_with_llm, include_raw_text)
+        cached = pdf_result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached result for {file.filename}")
+            return cached.model_copy(update={"filename": file.filename})
+        
         # Process PDF
-        result = pdf_processor.process_pdf_from_bytes(
-            pdf_bytes=contents,
-            refine_with_llm=refine_with_llm
+        # PyMuPDF extraction and LLM refinement block; run them in a worker thread
+        result = await asyncio.to_thread(
+            pdf_processor.process_pdf,
+            pdf_path=pdf_path,
+            refine_with_llm=refine_with_llm,
+            include_raw_text=include_raw_text
         )
         
         if not result["success"]:
@@ -72,19 +97,26 @@ async def process_pdf(
         
         logger.info(f"Successfully processed {file.filename}: {result['total_sentences']} sentences")
         
-        return PDFProcessingResponse(
+        response = PDFProcessingResponse.model_construct(
             success=True,
             sentences=result["sentences"],
             total_sentences=result["total_sentences"],
             raw_text=result["raw_text"],
             filename=file.filename
         )
+        # Don't pin unrefined sentences under a refine_with_llm key after an LLM failure
+        if result["fully_refined"]:
+            pdf_result_cache.set(cache_key, response)
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"PDF processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if pdf_path:
+            remove_file(pdf_path)
 
 
 @router.post("/process-pdf-to-bias", response_model=PDFToBiasDetectionResponse)
@@ -92,7 +124,8 @@ async def process_pdf_to_bias(
     file: UploadFile = File(...),
     refine_with_llm: bool = Form(default=True),
     confidence_threshold: float = Form(default=0.7),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    pdf_processor: PDFProcessor = Depends(get_pdf_processor)
 ):
     """
     Upload a Nepali PDF, extract sentences, and directly analyze for bias.
@@ -105,6 +138,7 @@ async def process_pdf_to_bias(
     - Bias detection results for all extracted sentences
     - Summary statistics (biased_count, neutral_count)
     """
+    pdf_path = None
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(
@@ -114,18 +148,29 @@ async def process_pdf_to_bias(
         
         logger.info(f"Processing PDF for bias detection: {file.filename}")
         
-        # Read file contents
-        contents = await file.read()
+        # Spool the upload to disk in chunks instead of buffering it in memory
+        hasher = hashlib.sha256()
+        pdf_path = await save_upload_to_temp_file(file, hasher=hasher)
         
-        if not contents:
+        if os.path.getsize(pdf_path) == 0:
             raise HTTPException(
                 status_code=400,
                 detail="Empty file provided"
             )
         
+        cache_key = (
+            "process-pdf-to-bias", user["id"], hasher.hexdigest(), refine_with_llm, confidence_threshold
+        )
+        cached = pdf_result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached bias result for {file.filename}")
+            return cached.model_copy(update={"filename": file.filename})
+        
         # Step 1: Process PDF
-        pdf_result = pdf_processor.process_pdf_from_bytes(
-            pdf_bytes=contents,
+        # PyMuPDF extraction and LLM refinement block; run them in a worker thread
+        pdf_result = await asyncio.to_thread(
+            pdf_processor.process_pdf,
+            pdf_path=pdf_path,
             refine_with_llm=refine_with_llm
         )
         
@@ -138,30 +183,43 @@ async def process_pdf_to_bias(
         sentences = pdf_result["sentences"]
         logger.info(f"Extracted {len(sentences)} sentences from {file.filename}")
         
-        # Step 2: Analyze bias for extracted sentences
-        combined_text = " ".join(sentences)
-        bias_result = run_bias_detection(combined_text, confidence_threshold)
+        # Step 2: Analyze bias for the extracted sentences as one batch, keeping
+        # the extracted sentence boundaries (the classifier runs off the event loop)
+        bias_responses = await asyncio.to_thread(
+            run_bias_detection_batch, sentences, confidence_threshold
+        )
+        results = [result for response in bias_responses for result in response.results]
+        biased_count = sum(response.biased_count for response in bias_responses)
+        neutral_count = sum(response.neutral_count for response in bias_responses)
         
-        logger.info(f"Bias detection completed: {bias_result.biased_count} biased, {bias_result.neutral_count} neutral")
+        logger.info(f"Bias detection completed: {biased_count} biased, {neutral_count} neutral")
         
-        return PDFToBiasDetectionResponse(
+        # results are already-built BiasResult rows; skip re-validating them in the envelope
+        response = PDFToBiasDetectionResponse.model_construct(
             success=True,
-            total_sentences=bias_result.total_sentences,
-            biased_count=bias_result.biased_count,
-            neutral_count=bias_result.neutral_count,
-            results=bias_result.results,
+            total_sentences=len(results),
+            biased_count=biased_count,
+            neutral_count=neutral_count,
+            results=results,
             filename=file.filename
         )
+        # Don't pin unrefined sentences under a refine_with_llm key after an LLM failure
+        if pdf_result["fully_refined"]:
+            pdf_result_cache.set(cache_key, response)
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"PDF to bias detection error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if pdf_path:
+            remove_file(pdf_path)
 
 
 @router.get("/pdf-health")
-async def pdf_processor_health():
+async def pdf_processor_health(pdf_processor: PDFProcessor = Depends(get_pdf_processor)):
     """
     Check if the PDF processing service is running properly.
     """
@@ -1,31 +1,70 @@
+from functools import lru_cache
+import httpx
+from jwt import get_unverified_header, decode as jwt_decode
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from supabase import create_client
+from supabase.lib.client_options import SyncClientOptions
 from api.core.config import settings
 from api.core.deps import get_current_user, get_current_admin
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# Lazy initialization of Supabase clients
-_supabase = None
-_supabase_admin = None
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
+# Supabase clients are created once per process (pre-warmed in the app lifespan) and
+# share a single tuned httpx connection pool. supabase-py sends the API key and auth
+# headers per request, so the anon and admin clients can safely share one pool.
+@lru_cache(maxsize=1)
+def get_supabase_http_client() -> httpx.Client:
+    """Get or create the shared httpx client used by all Supabase clients"""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.supabase_max_connections,
+            max_keepalive_connections=settings.supabase_max_keepalive_connections,
+        ),
+        timeout=settings.supabase_timeout,
+        follow_redirects=True,
+        http2=HTTP2_AVAILABLE,
+    )
+
+
+def _create_client(key: str):
+    return create_client(
+        settings.supabase_url,
+        key,
+        options=SyncClientOptions(httpx_client=get_supabase_http_client()),
+    )
+
+
+@lru_cache(maxsize=1)
 def get_supabase():
     """Get or create Supabase client (use anon key for public endpoints)"""
-    global _supabase
-    if _supabase is None:
-        _supabase = create_client(settings.supabase_url, settings.supabase_anon_key)
-    return _supabase
+    return _create_client(settings.supabase_anon_key)
 
 
+@lru_cache(maxsize=1)
 def get_supabase_admin():
     """Get or create Supabase admin client (use service role key)"""
-    global _supabase_admin
-    if _supabase_admin is None:
-        _supabase_admin = create_client(settings.supabase_url, settings.supabase_service_role_key)
-    return _supabase_admin
+    return _create_client(settings.supabase_service_role_key)
+
+
+def warm_up_supabase() -> None:
+    """Create both clients and their PostgREST sessions ahead of the first request."""
+    get_supabase().postgrest
+    get_supabase_admin().postgrest
+
+
+def close_supabase() -> None:
+    """Close the shared connection pool (app shutdown)."""
+    if get_supabase_http_client.cache_info().currsize:
+        get_supabase_http_client().close()
 
 
 # Request/Response Models
@@ -150,19 +189,24 @@ async def refresh_token(refresh_token: str):
         )
 
 
-@router.get("/debug/decode-token")
+@lru_cache(maxsize=1024)
+def _decode_unverified(token: str):
+    """Decode a token's header and payload without verifying the signature."""
+    return get_unverified_header(token), jwt_decode(token, options={"verify_signature": False})
+
+
+@router.get("/debug/decode-token", include_in_schema=settings.debug)
 async def debug_decode_token(token: str):
     """
     DEBUG ONLY: Decode and inspect a token without verification.
     Shows the header and payload for debugging.
-    Remove this in production.
+    Only available when DEBUG is enabled; responds 404 otherwise.
     """
+    if not settings.debug:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
     try:
-        from jwt import get_unverified_header, decode as jwt_decode
-        import json
-        
-        header = get_unverified_header(token)
-        payload = jwt_decode(token, options={"verify_signature": False})
+        header, payload = _decode_unverified(token)
         
         return {
             "header": header,
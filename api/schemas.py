@@ -1,16 +1,25 @@
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+from pydantic.dataclasses import dataclass
 
 # Module A Schemas
 class ExplanationRequest(BaseModel):
     query: str
 
+class Source(BaseModel):
+    # Legal source backing an explanation (one per retrieved chunk)
+    model_config = ConfigDict(frozen=True)
+
+    file: str
+    section: str
+    relevance_score: float
+
 class ExplanationResponse(BaseModel):
     summary: str
     key_point: str
     explanation: str
     next_steps: str
-    sources: List[Dict[str, Any]]
+    sources: List[Source]
     query: str
 
 # Context-aware chat schema
@@ -23,7 +32,7 @@ class ChatResponse(BaseModel):
     key_point: str
     explanation: str
     next_steps: str
-    sources: List[Dict[str, Any]]
+    sources: List[Source]
     query: str
     context_used: Optional[bool] = False
     is_non_legal: Optional[bool] = False
@@ -81,7 +90,10 @@ class BiasDetectionRequest(BaseModel):
     text: str
     confidence_threshold: Optional[float] = 0.7
 
-class BiasResult(BaseModel):
+# Per-sentence/per-item leaf types are built in bulk, so they are slotted dataclasses
+# (no per-instance __dict__) rather than BaseModels
+@dataclass(slots=True, frozen=True)
+class BiasResult:
     sentence: str
     category: str
     confidence: float
@@ -102,7 +114,8 @@ class BatchBiasDetectionRequest(BaseModel):
     confidence_threshold: Optional[float] = 0.7
 
 
-class BatchBiasItem(BaseModel):
+@dataclass(slots=True, frozen=True)
+class BatchBiasItem:
     index: int
     input_text: str
     result: BiasDetectionResponse
@@ -130,7 +143,8 @@ class DebiasSentenceResponse(BaseModel):
     error: Optional[str] = None
 
 
-class DebiasBatchItem(BaseModel):
+@dataclass(slots=True, frozen=True)
+class DebiasBatchItem:
     index: int
     input: DebiasSentenceRequest
     result: DebiasSentenceResponse
@@ -185,9 +199,20 @@ class BiasReviewSession(BaseModel):
     original_filename: str
     sentences: List[BiasReviewItem]
     raw_text: str
-    original_pdf_bytes: Optional[bytes] = None
+    original_pdf_path: Optional[str] = None  # uploaded PDF spooled to disk (local sessions)
+    original_pdf_ref: Optional[str] = None  # object key of the PDF in Redis/object storage
     created_at: str
     status: str = "pending_review"  # "pending_review", "in_progress", "completed"
+    version: int = 0  # bumped on every mutation; used as the session ETag
+
+    # sentence_id -> item lookup; not serialized, rebuilt lazily after deserialization
+    _sentence_index: Optional[Dict[str, BiasReviewItem]] = PrivateAttr(default=None)
+
+    def get_sentence(self, sentence_id: str) -> Optional[BiasReviewItem]:
+        """Look up a sentence by id in O(1)."""
+        if self._sentence_index is None:
+            self._sentence_index = {s.sentence_id: s for s in self.sentences}
+        return self._sentence_index.get(sentence_id)
 
 class StartReviewResponse(BaseModel):
     success: bool
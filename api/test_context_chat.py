@@ -3,25 +3,42 @@ Test script for context-aware chat functionality
 This demonstrates the new chat endpoint with conversation context
 """
 
-import requests
+import asyncio
+import httpx
 import json
 from typing import Optional
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Configuration
 BASE_URL = "http://localhost:8000"  # Adjust to your API URL
-API_TOKEN = None  # Will be set after login
 
 
-def login(email: str, password: str) -> Optional[str]:
+def create_client() -> httpx.AsyncClient:
+    """One keep-alive client for the whole run; login() stores the bearer token on it"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        headers={"Accept": "application/json"},
+        timeout=120.0,  # RAG + LLM answers can take a while
+        http2=HTTP2_AVAILABLE,
+    )
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> Optional[str]:
     """Login and get access token"""
-    url = f"{BASE_URL}/auth/login"
+    url = "/auth/login"
     payload = {"email": email, "password": password}
 
     try:
-        response = requests.post(url, json=payload)
+        response = await client.post(url, json=payload)
         response.raise_for_status()
         data = response.json()
         token = data.get("session", {}).get("access_token")
+        client.headers["Authorization"] = f"Bearer {token}"
         print(f"✓ Login successful")
         return token
     except Exception as e:
@@ -29,14 +46,13 @@ def login(email: str, password: str) -> Optional[str]:
         return None
 
 
-def create_conversation(token: str, title: str = "Test Conversation") -> Optional[str]:
+async def create_conversation(client: httpx.AsyncClient, title: str = "Test Conversation") -> Optional[str]:
     """Create a new conversation"""
-    url = f"{BASE_URL}/chat-history/conversations"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = "/chat-history/conversations"
     payload = {"title": title}
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = await client.post(url, json=payload)
         response.raise_for_status()
         data = response.json()
         conv_id = data.get("id")
@@ -47,38 +63,36 @@ def create_conversation(token: str, title: str = "Test Conversation") -> Optiona
         return None
 
 
-def send_chat_message(
-    token: str,
+async def send_chat_message(
+    client: httpx.AsyncClient,
     query: str,
     conversation_id: Optional[str] = None
 ) -> dict:
     """Send a chat message with context awareness"""
-    url = f"{BASE_URL}/law-explanation/chat"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = "/law-explanation/chat"
     payload = {
         "query": query,
         "conversation_id": conversation_id
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = await client.post(url, json=payload)
         response.raise_for_status()
         data = response.json()
         return data
     except Exception as e:
         print(f"✗ Chat request failed: {e}")
-        if hasattr(e, 'response'):
+        if getattr(e, 'response', None) is not None:
             print(f"Response: {e.response.text}")
         return {}
 
 
-def get_conversation_history(token: str, conversation_id: str) -> list:
+async def get_conversation_history(client: httpx.AsyncClient, conversation_id: str) -> list:
     """Get conversation messages"""
-    url = f"{BASE_URL}/chat-history/conversations/{conversation_id}/messages"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/chat-history/conversations/{conversation_id}/messages"
 
     try:
-        response = requests.get(url, headers=headers)
+        response = await client.get(url)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -111,22 +125,22 @@ def print_response(response: dict, test_name: str):
     print(f"{'='*60}\n")
 
 
-def run_test_scenario(token: str):
+async def run_test_scenario(client: httpx.AsyncClient):
     """Run comprehensive test scenarios"""
     print("\n" + "="*60)
     print("CONTEXT-AWARE CHAT TEST SCENARIOS")
     print("="*60 + "\n")
 
     # Create a new conversation for testing
-    conv_id = create_conversation(token, "Context Awareness Test")
+    conv_id = await create_conversation(client, "Context Awareness Test")
     if not conv_id:
         print("Cannot proceed without conversation ID")
         return
 
     # Test 1: Initial legal query
     print("\n--- Test 1: Initial Legal Query (No Context) ---")
-    response1 = send_chat_message(
-        token,
+    response1 = await send_chat_message(
+        client,
         "I had a fight with my brother over property",
         conv_id
     )
@@ -134,8 +148,8 @@ def run_test_scenario(token: str):
 
     # Test 2: Dependent follow-up query
     print("\n--- Test 2: Dependent Follow-up Query (With Context) ---")
-    response2 = send_chat_message(
-        token,
+    response2 = await send_chat_message(
+        client,
         "He is making fake allegations",
         conv_id
     )
@@ -143,8 +157,8 @@ def run_test_scenario(token: str):
 
     # Test 3: Another dependent query
     print("\n--- Test 3: Another Dependent Query ---")
-    response3 = send_chat_message(
-        token,
+    response3 = await send_chat_message(
+        client,
         "What evidence do I need to counter this?",
         conv_id
     )
@@ -152,8 +166,8 @@ def run_test_scenario(token: str):
 
     # Test 4: Independent new topic
     print("\n--- Test 4: Independent New Topic ---")
-    response4 = send_chat_message(
-        token,
+    response4 = await send_chat_message(
+        client,
         "How do I apply for citizenship in Nepal?",
         conv_id
     )
@@ -161,8 +175,8 @@ def run_test_scenario(token: str):
 
     # Test 5: Non-legal query (greeting)
     print("\n--- Test 5: Non-Legal Query (Greeting) ---")
-    response5 = send_chat_message(
-        token,
+    response5 = await send_chat_message(
+        client,
         "Thank you so much for your help!",
         conv_id
     )
@@ -170,8 +184,8 @@ def run_test_scenario(token: str):
 
     # Test 6: Non-legal query (small talk)
     print("\n--- Test 6: Non-Legal Query (Greeting) ---")
-    response6 = send_chat_message(
-        token,
+    response6 = await send_chat_message(
+        client,
         "Hi, how are you?",
         conv_id
     )
@@ -179,8 +193,8 @@ def run_test_scenario(token: str):
 
     # Test 7: Back to legal query
     print("\n--- Test 7: Back to Legal Topic ---")
-    response7 = send_chat_message(
-        token,
+    response7 = await send_chat_message(
+        client,
         "What are the divorce laws in Nepal?",
         conv_id
     )
@@ -190,7 +204,7 @@ def run_test_scenario(token: str):
     print("\n" + "="*60)
     print("CONVERSATION HISTORY SUMMARY")
     print("="*60)
-    messages = get_conversation_history(token, conv_id)
+    messages = await get_conversation_history(client, conv_id)
     print(f"Total messages in conversation: {len(messages)}")
 
     for i, msg in enumerate(messages, 1):
@@ -199,30 +213,58 @@ def run_test_scenario(token: str):
         print(f"\n{i}. [{role.upper()}]: {content[:100]}...")
 
 
-def run_edge_case_tests(token: str):
-    """Test edge cases"""
+async def run_edge_case_tests(client: httpx.AsyncClient):
+    """Test edge cases (independent of each other, so they run concurrently)"""
     print("\n" + "="*60)
     print("EDGE CASE TESTS")
     print("="*60 + "\n")
 
-    # Test without conversation_id
-    print("\n--- Test: No Conversation ID (Standalone Query) ---")
-    response = send_chat_message(
-        token,
-        "What are tenant rights in Nepal?",
-        conversation_id=None
+    async def standalone_query():
+        # Test without conversation_id
+        return await send_chat_message(
+            client,
+            "What are tenant rights in Nepal?",
+            conversation_id=None
+        )
+
+    async def first_message_in_new_conversation():
+        # Test with empty conversation
+        conv_id = await create_conversation(client, "Empty Conversation Test")
+        return await send_chat_message(
+            client,
+            "Tell me about labor laws",
+            conversation_id=conv_id
+        )
+
+    standalone, first_message = await asyncio.gather(
+        standalone_query(),
+        first_message_in_new_conversation()
     )
-    print_response(response, "Standalone Query Without Conversation")
 
-    # Test with empty conversation
-    conv_id = create_conversation(token, "Empty Conversation Test")
+    print("\n--- Test: No Conversation ID (Standalone Query) ---")
+    print_response(standalone, "Standalone Query Without Conversation")
+
     print("\n--- Test: First Message in New Conversation ---")
-    response = send_chat_message(
-        token,
-        "Tell me about labor laws",
-        conversation_id=conv_id
-    )
-    print_response(response, "First Message in Fresh Conversation")
+    print_response(first_message, "First Message in Fresh Conversation")
+
+
+async def main(email: str, password: str) -> int:
+    async with create_client() as client:
+        # Login
+        token = await login(client, email, password)
+        if not token:
+            print("\nCannot proceed without authentication token")
+            return 1
+
+        # Run tests: the scenario's turns depend on each other, the edge cases don't
+        await run_test_scenario(client)
+        print("\n" + "="*60)
+        await run_edge_case_tests(client)
+
+        print("\n" + "="*60)
+        print("ALL TESTS COMPLETED")
+        print("="*60 + "\n")
+        return 0
 
 
 if __name__ == "__main__":
@@ -239,22 +281,8 @@ if __name__ == "__main__":
     email = input("Email: ").strip()
     password = input("Password: ").strip()
 
-    # Login
-    token = login(email, password)
-    if not token:
-        print("\nCannot proceed without authentication token")
-        exit(1)
-
-    # Run tests
     try:
-        run_test_scenario(token)
-        print("\n" + "="*60)
-        run_edge_case_tests(token)
-
-        print("\n" + "="*60)
-        print("ALL TESTS COMPLETED")
-        print("="*60 + "\n")
-
+        exit(asyncio.run(main(email, password)))
     except KeyboardInterrupt:
         print("\n\nTests interrupted by user")
     except Exception as e:
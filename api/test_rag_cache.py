@@ -0,0 +1,30 @@
+"""
+Run: pytest api/test_rag_cache.py -v
+"""
+import numpy as np
+
+from api.core.rag_cache import SemanticCache
+
+
+def test_similar_query_hits_and_dissimilar_misses():
+    cache = SemanticCache(threshold=0.95)
+    cache.put(np.array([1.0, 0.0, 0.0]), {"summary": "citizenship"})
+
+    assert cache.get(np.array([0.99, 0.05, 0.0])) == {"summary": "citizenship"}
+    assert cache.get(np.array([0.0, 1.0, 0.0])) is None
+
+
+def test_context_key_must_match():
+    cache = SemanticCache(threshold=0.95)
+    cache.put(np.array([1.0, 0.0]), {"summary": "with context"}, context_key="conv-a")
+
+    assert cache.get(np.array([1.0, 0.0]), context_key="conv-a") == {"summary": "with context"}
+    assert cache.get(np.array([1.0, 0.0]), context_key="conv-b") is None
+    assert cache.get(np.array([1.0, 0.0])) is None
+
+
+def test_expired_entries_are_ignored():
+    cache = SemanticCache(threshold=0.95, ttl=0)
+    cache.put(np.array([1.0, 0.0]), {"q": "stale"})
+
+    assert cache.get(np.array([1.0, 0.0])) is None
@@ -0,0 +1,38 @@
+"""
+Run: pytest api/test_security.py -v
+"""
+import time
+
+from api.core.security import SupabaseJWT
+
+
+def make_jwt():
+    return SupabaseJWT("https://example.supabase.co")
+
+
+def test_cached_payload_is_returned():
+    jwt_handler = make_jwt()
+    payload = {"sub": "user-1", "exp": time.time() + 600}
+
+    jwt_handler._cache_payload("token-a", payload)
+
+    assert jwt_handler.get_cached_payload("token-a") == payload
+    assert jwt_handler.get_cached_payload("token-b") is None
+
+
+def test_cache_never_outlives_exp():
+    jwt_handler = make_jwt()
+
+    jwt_handler._cache_payload("expired", {"sub": "user-1", "exp": time.time() - 1})
+    assert jwt_handler.get_cached_payload("expired") is None
+
+    jwt_handler._cache_payload("short", {"sub": "user-1", "exp": time.time() + 0.05})
+    time.sleep(0.1)
+    assert jwt_handler.get_cached_payload("short") is None
+
+
+def test_forced_jwks_refresh_is_rate_limited():
+    jwt_handler = make_jwt()
+
+    assert jwt_handler._claim_jwks_refresh() is True
+    assert jwt_handler._claim_jwks_refresh() is False
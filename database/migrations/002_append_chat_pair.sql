@@ -0,0 +1,58 @@
+-- ============================================================
+-- SETU - Append a chat turn in one call
+-- ============================================================
+-- Description: RPC that verifies conversation ownership and inserts the
+--              user message and assistant response of a chat turn in a
+--              single statement / transaction (one round-trip from the API)
+-- Date: 2026-10-15
+-- Version: 1.0
+-- Requires: 001_create_chat_tables.sql
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.append_chat_pair(
+    p_conversation_id UUID,
+    p_user_id UUID,
+    p_user_content TEXT,
+    p_assistant_content TEXT,
+    p_assistant_metadata JSONB DEFAULT NULL
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    -- Only append to conversations owned by the given user
+    IF NOT EXISTS (
+        SELECT 1 FROM public.chat_conversations
+        WHERE id = p_conversation_id
+        AND user_id = p_user_id
+    ) THEN
+        RETURN FALSE;
+    END IF;
+
+    -- Both rows share the transaction time, so offset the assistant row to keep
+    -- the pair in order when messages are sorted by timestamp
+    INSERT INTO public.chat_messages (conversation_id, role, content, timestamp, metadata)
+    VALUES
+        (p_conversation_id, 'user', p_user_content, NOW(), NULL),
+        (p_conversation_id, 'assistant', p_assistant_content, NOW() + INTERVAL '1 microsecond', p_assistant_metadata);
+
+    RETURN TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION public.append_chat_pair(UUID, UUID, TEXT, TEXT, JSONB)
+    IS 'Appends a user/assistant message pair to a conversation owned by p_user_id; returns FALSE if not owned';
+
+-- The backend calls this with the service role after authenticating the user;
+-- clients must not be able to append to arbitrary users' conversations
+REVOKE ALL ON FUNCTION public.append_chat_pair(UUID, UUID, TEXT, TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.append_chat_pair(UUID, UUID, TEXT, TEXT, JSONB) TO service_role;
+
+-- ============================================================
+-- Migration Complete!
+-- ============================================================
+-- Next Steps:
+-- 1. Run this SQL in your Supabase SQL Editor
+-- 2. Set CHAT_APPEND_RPC=true for the backend to save chat turns through it
+-- ============================================================
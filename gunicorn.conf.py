@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for multi-worker deployments:
+
+    gunicorn -c gunicorn.conf.py api.main:app
+
+The app and its heavy services (embedding model, vector DB, bias classifier) are
+loaded once in the master before forking, so workers share the model weights
+copy-on-write instead of each holding its own copy. Set WEB_CONCURRENCY to the
+number of workers.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Model loading and LLM calls can be slow; don't let the arbiter kill busy workers
+timeout = 120
+
+
+def on_starting(server):
+    # Runs in the master after the app is imported and before any worker forks
+    from api.main import preload_services
+    preload_services()
@@ -3,15 +3,31 @@ Build vector database from processed chunks
 Main pipeline for Step 3
 """
 
+import argparse
 import json
 import logging
+import logging.handlers
+import queue
+import threading
 import time
 from pathlib import Path
+from typing import Any, Dict, List
 
-from .config import CHUNKS_OUTPUT_FILE, LOG_LEVEL, LOG_FORMAT, PINECONE_API_KEY
+import numpy as np
+
+from .config import (
+    CHUNKS_OUTPUT_FILE, LOG_LEVEL, LOG_FORMAT, PINECONE_API_KEY,
+    EMBEDDING_BATCH_SIZE, VECTOR_DB_PIPELINE_DEPTH
+)
 from .embeddings import EmbeddingGenerator
 from .vector_db import LegalVectorDB
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Try to import Pinecone, use it if API key is set
 try:
     from .pinecone_vector_db import PineconeLegalVectorDB
@@ -21,10 +37,28 @@ except ImportError:
     PineconeLegalVectorDB = None 
 
 
-logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
+def _start_log_listener() -> logging.handlers.QueueListener:
+    """
+    Route root logging through a queue drained by a background listener thread
+
+    logger calls in the embedding/insert loop then only enqueue the record instead
+    of blocking on the stderr write. Stop the returned listener to flush it.
+    """
+    log_queue: "queue.Queue" = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
 def load_chunks(chunks_file: Path):
     """Load processed chunks from JSON"""
     logger.info(f"Loading chunks from {chunks_file}")
@@ -32,8 +66,12 @@ def load_chunks(chunks_file: Path):
     if not chunks_file.exists():
         raise FileNotFoundError(f"Chunks file not found: {chunks_file}")
     
-    with open(chunks_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Parse the raw bytes in one go; orjson is several times faster than json on large chunk files
+    if ORJSON_AVAILABLE:
+        data = orjson.loads(chunks_file.read_bytes())
+    else:
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     chunks = data['chunks']
     logger.info(f"Loaded {len(chunks)} chunks")
@@ -41,8 +79,93 @@ def load_chunks(chunks_file: Path):
     return chunks
 
 
-def main():
+def embed_and_index(
+    chunks: List[Dict[str, Any]],
+    embedder: EmbeddingGenerator,
+    vector_db,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    pipeline_depth: int = VECTOR_DB_PIPELINE_DEPTH
+) -> int:
+    """
+    Embed chunks and add them to the vector database as a two-stage pipeline
+
+    A producer thread embeds fixed-size batches while the calling thread inserts
+    the previous ones, so embedding and database writes overlap instead of running
+    one after the other.
+
+    Args:
+        chunks: Processed chunks to index
+        embedder: Embedding generator
+        vector_db: Vector database exposing add_chunks(chunks, embeddings, finalize)
+        batch_size: Chunks per embedding/insert batch
+        pipeline_depth: Maximum embedded batches waiting to be inserted
+
+    Returns:
+        Number of chunks indexed
+    """
+    batches: "queue.Queue" = queue.Queue(maxsize=max(1, pipeline_depth))
+    done = object()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def produce():
+        try:
+            for start in range(0, len(chunks), batch_size):
+                if stop.is_set():
+                    return
+                batch = chunks[start:start + batch_size]
+                embeddings = embedder.generate_embeddings_batch(
+                    [chunk['text'] for chunk in batch],
+                    batch_size=batch_size,
+                    show_progress=False
+                )
+                is_last = start + batch_size >= len(chunks)
+                batches.put((batch, embeddings.astype(np.float32, copy=False), is_last))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            batches.put(done)
+
+    producer = threading.Thread(target=produce, name="embedding-producer", daemon=True)
+    producer.start()
+
+    indexed = 0
+    try:
+        while True:
+            item = batches.get()
+            if item is done:
+                break
+            batch, embeddings, is_last = item
+            # float32 matrix as-is (no per-float list boxing); only the last batch
+            # pays for the database's post-load verification
+            vector_db.add_chunks(batch, embeddings, finalize=is_last)
+            indexed += len(batch)
+            logger.info(f"Indexed {indexed}/{len(chunks)} chunks")
+    finally:
+        # On an insert failure, let the producer finish its current batch and exit
+        stop.set()
+        while producer.is_alive():
+            try:
+                batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    if errors:
+        raise errors[0]
+    return indexed
+
+
+def main(pipeline_depth: int = VECTOR_DB_PIPELINE_DEPTH):
     """Main pipeline to build vector database"""
+    log_listener = _start_log_listener()
+    try:
+        return _build(pipeline_depth)
+    finally:
+        log_listener.stop()
+
+
+def _build(pipeline_depth: int) -> int:
+    """Load, embed and index the processed chunks; returns the process exit code"""
     print("=" * 80)
     print("Building Vector Database for Nepal Legal Documents")
     print("=" * 80)
@@ -66,17 +189,8 @@ def main():
         print(f"✓ Model loaded: {embedder.model_name}")
         print(f"✓ Embedding dimension: {embedder.embedding_dim}")
         
-        # Step 3: Generate embeddings
-        print("\nStep 3: Generating embeddings for all chunks...")
-        print("(This will take a minute or two...)")
-        texts = [chunk['text'] for chunk in chunks]
-        embeddings = embedder.generate_embeddings_batch(texts, show_progress=True)
-        
-        print(f"✓ Generated {len(embeddings)} embeddings")
-        print(f"✓ Embedding shape: {embeddings.shape}")
-        
-        # Step 4: Initialize vector database
-        print("\nStep 4: Initializing vector database...")
+        # Step 3: Initialize vector database
+        print("\nStep 3: Initializing vector database...")
         if USE_PINECONE:
             print("Using Pinecone cloud vector database...")
             vector_db = PineconeLegalVectorDB()
@@ -86,9 +200,11 @@ def main():
             vector_db = LegalVectorDB()
             print(f"✓ Database initialized at: {vector_db.persist_directory}")
         
-        # Step 5: Add chunks to database
-        print("\nStep 5: Adding chunks to vector database...")
-        vector_db.add_chunks(chunks, embeddings.tolist())
+        # Step 4: Generate embeddings and add chunks to database (pipelined)
+        print("\nStep 4: Generating embeddings and adding chunks to vector database...")
+        print("(This will take a minute or two...)")
+        indexed = embed_and_index(chunks, embedder, vector_db, pipeline_depth=pipeline_depth)
+        print(f"✓ Embedded and added {indexed} chunks")
         
         final_count = vector_db.get_count()
         print(f"✓ Successfully indexed {final_count} chunks")
@@ -129,4 +245,12 @@ def main():
 
 
 if __name__ == "__main__":
-    exit(main())
+    parser = argparse.ArgumentParser(description="Build the vector database from processed chunks")
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=VECTOR_DB_PIPELINE_DEPTH,
+        help="Embedded batches allowed to wait for insertion (default: %(default)s)"
+    )
+    args = parser.parse_args()
+    exit(main(pipeline_depth=args.pipeline_depth))
@@ -13,13 +13,33 @@ from .config import (
     CHUNK_SIZE_MAX_WORDS,
     CHUNK_SIZE_TARGET_WORDS,
     CHUNK_OVERLAP_WORDS,
-    COMPILED_SECTION_PATTERNS
+    FUSED_SECTION_RE,
+    SECTION_PATTERN_GROUP_COUNTS
 )
 from .models import DocumentChunk, ChunkMetadata
 
 logger = logging.getLogger(__name__)
 
 
+def match_section(line: str) -> Optional[Tuple[int, Tuple[Optional[str], ...], str]]:
+    """
+    Match a line against all section patterns in a single regex pass
+
+    Returns:
+        (pattern index in SECTION_PATTERNS, that pattern's captured groups, full match),
+        or None if no pattern matches
+    """
+    match = FUSED_SECTION_RE.search(line)
+    if not match:
+        return None
+    # Every pattern is anchored at the line start, so the earliest alternative wins,
+    # same as trying the patterns in order
+    index = int(match.lastgroup[1:])
+    start = FUSED_SECTION_RE.groupindex[match.lastgroup]
+    groups = match.groups()[start:start + SECTION_PATTERN_GROUP_COUNTS[index]]
+    return index, groups, match.group(0)
+
+
 class LegalDocumentChunker:
     """Chunks legal documents with section/article awareness"""
     
@@ -133,18 +153,18 @@ class LegalDocumentChunker:
         Returns:
             Section title if detected, None otherwise
         """
-        for pattern in COMPILED_SECTION_PATTERNS:
-            match = pattern.search(line)
-            if match:
-                # For numbered sections like "11. Citizenship:", return "11. Citizenship"
-                if len(match.groups()) >= 2:
-                    # Pattern has both number and title
-                    return f"{match.group(1)}. {match.group(2)}"
-                else:
-                    # Pattern has just the identifier, return the full match
-                    return match.group(0)
+        section = match_section(line)
+        if section is None:
+            return None
         
-        return None
+        _, groups, full_match = section
+        # For numbered sections like "11. Citizenship:", return "11. Citizenship"
+        if len(groups) >= 2:
+            # Pattern has both number and title
+            return f"{groups[0]}. {groups[1]}"
+        else:
+            # Pattern has just the identifier, return the full match
+            return full_match
     
     def _chunk_section(
         self,
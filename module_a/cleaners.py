@@ -7,25 +7,20 @@ import re
 import logging
 from typing import List, Dict
 
-from .config import CLEANING_PATTERNS
+from .config import CLEANING_REGEX_REMOVE
 
 logger = logging.getLogger(__name__)
 
+# Normalization patterns, compiled once
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+_SPACES_RE = re.compile(r'[ \t]+')
+_HYPHENATION_RE = re.compile(r'-\s*\n\s*')
+_STANDALONE_NUMBER_RE = re.compile(r'\n\s*\d+\s*\n')
+
 
 class TextCleaner:
     """Cleans and normalizes extracted text"""
     
-    def __init__(self):
-        """Initialize text cleaner with compiled patterns"""
-        self.patterns = self._compile_patterns()
-    
-    def _compile_patterns(self) -> Dict[str, List[re.Pattern]]:
-        """Compile all regex patterns for efficiency"""
-        compiled = {}
-        for category, patterns in CLEANING_PATTERNS.items():
-            compiled[category] = [re.compile(p, re.MULTILINE | re.IGNORECASE) for p in patterns]
-        return compiled
-    
     def clean_text(self, text: str) -> str:
         """
         Apply all cleaning operations to text
@@ -39,14 +34,8 @@ class TextCleaner:
         if not text:
             return ""
         
-        # Remove page numbers
-        text = self._remove_page_numbers(text)
-        
-        # Remove headers and footers
-        text = self._remove_headers_footers(text)
-        
-        # Remove table of contents patterns
-        text = self._remove_toc_patterns(text)
+        # Remove page numbers, headers/footers and table of contents patterns in one pass
+        text = CLEANING_REGEX_REMOVE.sub('', text)
         
         # Fix line breaks and whitespace
         text = self._normalize_whitespace(text)
@@ -56,34 +45,16 @@ class TextCleaner:
         
         return text.strip()
     
-    def _remove_page_numbers(self, text: str) -> str:
-        """Remove page numbers"""
-        for pattern in self.patterns['page_numbers']:
-            text = pattern.sub('', text)
-        return text
-    
-    def _remove_headers_footers(self, text: str) -> str:
-        """Remove common headers and footers"""
-        for pattern in self.patterns['headers_footers']:
-            text = pattern.sub('', text)
-        return text
-    
-    def _remove_toc_patterns(self, text: str) -> str:
-        """Remove table of contents patterns"""
-        for pattern in self.patterns['toc_patterns']:
-            text = pattern.sub('', text)
-        return text
-    
     def _normalize_whitespace(self, text: str) -> str:
         """Fix excessive whitespace and line breaks"""
         # Replace multiple blank lines with double newline
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+        text = _BLANK_LINES_RE.sub('\n\n', text)
         
         # Replace multiple spaces/tabs with single space
-        text = re.sub(r'[ \t]+', ' ', text)
+        text = _SPACES_RE.sub(' ', text)
         
         # Fix broken words (hyphenation at line breaks)
-        text = re.sub(r'-\s*\n\s*', '', text)
+        text = _HYPHENATION_RE.sub('', text)
         
         # Normalize line breaks within paragraphs
         # Keep double line breaks (paragraph separators)
@@ -111,7 +82,7 @@ class TextCleaner:
     def _additional_cleaning(self, text: str) -> str:
         """Additional cleaning operations"""
         # Remove standalone numbers that might be page/section numbers
-        text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
+        text = _STANDALONE_NUMBER_RE.sub('\n', text)
         
         # Remove very short lines (likely artifacts)
         lines = text.split('\n')
@@ -102,6 +102,22 @@ SECTION_PATTERNS = [
 # Compile regex patterns for efficiency
 COMPILED_SECTION_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in SECTION_PATTERNS]
 
+# All section patterns fused into one alternation (one scan per line instead of one per
+# pattern); group p<i> wraps SECTION_PATTERNS[i], whose own groups follow it in order
+FUSED_SECTION_RE = re.compile(
+    "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(SECTION_PATTERNS)),
+    re.IGNORECASE
+)
+SECTION_PATTERN_GROUP_COUNTS = [compiled.groups for compiled in COMPILED_SECTION_PATTERNS]
+
+# Cleaning categories stripped from the text ('whitespace' is normalized separately),
+# fused into one alternation so each page is scanned once instead of once per pattern
+CLEANING_REMOVE_CATEGORIES = ('page_numbers', 'headers_footers', 'toc_patterns')
+CLEANING_REGEX_REMOVE = re.compile(
+    "|".join(f"(?:{p})" for category in CLEANING_REMOVE_CATEGORIES for p in CLEANING_PATTERNS[category]),
+    re.MULTILINE | re.IGNORECASE
+)
+
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -118,6 +134,21 @@ VECTOR_DB_DIR = DATA_DIR / "vector_db"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIMENSION = 384  # For all-MiniLM-L6-v2
 EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_CACHE_SIZE = 4096  # Single-text (query) embeddings kept per EmbeddingGenerator
+# Inference backend: "torch", or "onnx"/"openvino" (needs sentence-transformers>=3.2
+# with the matching extra, e.g. pip install "sentence-transformers[onnx]")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Torch backend precision: "fp32", "fp16" (CUDA only) or "int8" (dynamic quantization on CPU).
+# Stored vectors were built in fp32; check retrieval quality before lowering it
+EMBEDDING_PRECISION = os.getenv("EMBEDDING_PRECISION", "fp32")
+# Worker processes for large batch encodes (one per GPU when several are present); 0 or 1 disables
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_MULTI_PROCESS_MIN_TEXTS = 256  # Smaller batches aren't worth the inter-process transfer
+# Torch intra-op threads for CPU inference. PyTorch defaults to every core, which oversubscribes
+# big hosts running several workers; more threads only pay off for batches beyond ~16 texts
+EMBEDDING_TORCH_THREADS = int(os.getenv("EMBEDDING_TORCH_THREADS", str(min(8, os.cpu_count() or 1))))
+VECTOR_DB_PIPELINE_DEPTH = 4  # Embedded batches queued ahead of database inserts
+VECTOR_DB_ADD_BATCH_SIZE = 5000  # Max chunks per ChromaDB add call (bounds memory on large inserts)
 
 # Pinecone settings - Read from environment or set here
 # Get your API key from: https://app.pinecone.io/
@@ -128,8 +159,24 @@ PINECONE_TEXT_STORAGE_FILE = DATA_DIR / "pinecone_text_storage.json"
 
 # Retrieval settings
 DEFAULT_RETRIEVAL_K = 5  # Number of chunks to retrieve
+RETRIEVAL_CACHE_SIZE = 512  # Retrieved chunk lists kept per (query, k); 0 disables
+RETRIEVAL_CACHE_TTL = 300  # seconds
 
 # LLM settings (Step 4)
 MISTRAL_MODEL = "mistral-tiny"  # Options: mistral-tiny, mistral-small, mistral-medium
 MISTRAL_API_KEY_ENV_VAR = "MISTRAL_API_KEY"
 
+
+# Context analyzer result cache (classifications of repeated messages/contexts)
+CONTEXT_ANALYZER_CACHE_SIZE = 4096
+CONTEXT_ANALYZER_CACHE_TTL = 600  # seconds
+
+# Conversation history sent to the context analyzer, bounded by tokens rather than messages
+CONTEXT_MAX_PROMPT_TOKENS = 512
+CONTEXT_ASSISTANT_TURN_MAX_TOKENS = 200  # Assistant answers are context, not content to reproduce
+CONTEXT_TOKEN_CACHE_SIZE = 256  # Tokenized turns kept, so follow-ups only tokenize the new message
+
+# Letter suggestion: "local" (zero-shot NLI cross-encoder, no LLM call) or "llm" (Mistral classification)
+LETTER_CLASSIFIER = os.getenv("LETTER_CLASSIFIER", "local")
+LETTER_CLASSIFIER_MODEL = "cross-encoder/nli-deberta-v3-small"
+LETTER_CLASSIFIER_MIN_CONFIDENCE = 0.7  # Less confident decisions use the keyword fallback
@@ -3,13 +3,121 @@ Conversation Context Analyzer Module
 Analyzes conversation context to determine message independence and relevance
 """
 
+import hashlib
+import json
 import logging
-from typing import List, Dict, Optional
+import re
+from functools import lru_cache
+from typing import Any, List, Dict, Optional, Tuple
+from utility.ttl_cache import TTLCache
 from .llm_client import MistralClient
+from .config import (
+    CONTEXT_ANALYZER_CACHE_SIZE,
+    CONTEXT_ANALYZER_CACHE_TTL,
+    CONTEXT_MAX_PROMPT_TOKENS,
+    CONTEXT_ASSISTANT_TURN_MAX_TOKENS,
+    CONTEXT_TOKEN_CACHE_SIZE,
+)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Shared tokenizer for prompt budgeting, or None to fall back to word estimates"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens from words: {e}")
+        return None
+
+
+@lru_cache(maxsize=CONTEXT_TOKEN_CACHE_SIZE)
+def _encode(text: str) -> Tuple[int, ...]:
+    """Token ids of a conversation turn (earlier turns recur on every follow-up)"""
+    return tuple(_get_encoding().encode(text))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Cut text to at most max_tokens tokens
+
+    Returns:
+        (text, token_count) of the possibly truncated text
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = _encode(text)
+        if len(tokens) <= max_tokens:
+            return text, len(tokens)
+        return encoding.decode(list(tokens[:max_tokens])), max_tokens
+
+    # Rough estimate: 1 word ≈ 1.3 tokens (as in config)
+    words = text.split()
+    max_words = int(max_tokens / 1.3)
+    if len(words) <= max_words:
+        return text, int(len(words) * 1.3)
+    return " ".join(words[:max_words]), max_tokens
+
+
+# Cheap pre-checks that settle obvious messages without an LLM call
+# Whole message is only greetings/thanks/small talk/acknowledgments
+_GREETING_RE = re.compile(
+    r"^\s*(?:(?:hi|hello|hey|namaste|thanks?|thank you(?: so much| very much)?"
+    r"(?: for (?:your|the) help)?|bye|goodbye|see you|good (?:morning|afternoon|evening|night)"
+    r"|ok(?:ay)?|yes|no|sure|how are you(?: doing)?)[\s,\.\!\?]*)+$",
+    re.IGNORECASE
+)
+# Mentions an unambiguous legal term
+_LEGAL_TERM_RE = re.compile(
+    r"\b(?:laws?|legal|illegal|rights?|sections?|articles?|courts?|constitution|lawyer|advocate"
+    r"|police|fir|divorce|property|inheritance|citizenship|contract|tenant|bail|complaint)\b",
+    re.IGNORECASE
+)
+
+
+def _precheck_non_legal(message: str) -> Optional[bool]:
+    """
+    Classify obvious messages without the LLM
+
+    Returns:
+        True for casual messages, False for messages with a legal term,
+        None when the LLM has to decide
+    """
+    if len(message) <= 80 and _GREETING_RE.match(message):
+        return True
+    if _LEGAL_TERM_RE.search(message):
+        return False
+    return None
+
+
+# System prompt, defined once at module level
+_ANALYZE_SYSTEM = """You analyze messages sent to a legal assistant chatbot.
+
+1. "legal": false if the message is casual conversation (greetings, thanks, goodbye,
+   small talk, acknowledgments like ok/yes/no), true if it concerns laws, rights,
+   legal issues, disputes, procedures or anything requiring legal information.
+2. "independent": true if the message can be understood without the previous
+   conversation (new topic, self-contained question); false if it references or
+   continues it (pronouns like "he", "it", "this", follow-up questions).
+   Always true when there is no previous conversation.
+3. "summarized_query": if the message is legal and dependent, ONE clear, self-contained
+   legal query (1-3 sentences) combining the relevant context with the message, with
+   pronouns replaced by the actual entities. Otherwise, the message unchanged.
+
+Respond with ONLY a JSON object:
+{"legal": true/false, "independent": true/false, "summarized_query": "..."}
+"""
+
+
 class ConversationContextAnalyzer:
     """
     Analyzes conversation context to determine:
@@ -18,14 +126,23 @@ class ConversationContextAnalyzer:
     3. Generates summaries for dependent conversations
     """
 
-    def __init__(self, model: str = "mistral-small-latest"):
+    def __init__(
+        self,
+        model: str = "mistral-small-latest",
+        cache_maxsize: int = CONTEXT_ANALYZER_CACHE_SIZE,
+        cache_ttl: float = CONTEXT_ANALYZER_CACHE_TTL
+    ):
         """
         Initialize the context analyzer
 
         Args:
             model: Mistral model to use for analysis
+            cache_maxsize: Maximum number of cached analysis results (0 disables caching)
+            cache_ttl: Lifetime of a cached result in seconds
         """
         self.llm_client = MistralClient(model=model)
+        # Low-temperature classifications of the same message and context are reused
+        self._cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
         logger.info(f"ConversationContextAnalyzer initialized with model: {model}")
 
     def is_non_legal_query(self, message: str) -> bool:
@@ -38,43 +155,7 @@ class ConversationContextAnalyzer:
         Returns:
             True if non-legal, False if legal-related
         """
-        try:
-            system_prompt = """You are a classifier that determines if a message is related to legal matters or is casual conversation.
-
-Casual conversation includes:
-- Greetings (hi, hello, hey, good morning, etc.)
-- Thanks/gratitude (thank you, thanks, appreciate it, etc.)
-- Goodbye (bye, see you, goodbye, etc.)
-- Small talk (how are you, what's up, etc.)
-- Acknowledgments (ok, okay, yes, no, sure, etc.)
-
-Legal-related includes:
-- Questions about laws, regulations, rights
-- Legal issues, disputes, cases
-- Questions about legal procedures
-- Anything requiring legal information
-
-Respond with ONLY one word: "LEGAL" or "NON_LEGAL"
-"""
-
-            prompt = f'Message: "{message}"\n\nClassify this message:'
-
-            response = self.llm_client.generate_response(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.1  # Low temperature for consistent classification
-            )
-
-            result = response.strip().upper()
-            is_non_legal = "NON_LEGAL" in result or "NON-LEGAL" in result
-
-            logger.info(f"Non-legal query check: '{message[:50]}...' -> {is_non_legal}")
-            return is_non_legal
-
-        except Exception as e:
-            logger.error(f"Error in is_non_legal_query: {e}")
-            # On error, assume it's legal-related to be safe
-            return False
+        return not self.analyze(message)["legal"]
 
     def is_independent_query(self, current_msg: str, context: List[Dict[str, str]]) -> bool:
         """
@@ -87,58 +168,12 @@ Respond with ONLY one word: "LEGAL" or "NON_LEGAL"
         Returns:
             True if independent, False if dependent on previous context
         """
-        try:
-            # If no context, it's independent
-            if not context or len(context) == 0:
-                return True
-
-            # Format conversation history
-            conversation_text = self._format_context(context)
-
-            system_prompt = """You are an analyzer that determines if a message is independent or dependent on previous conversation.
-
-INDEPENDENT messages:
-- Introduce a completely new topic
-- Can be understood without previous context
-- Are self-contained questions
-
-DEPENDENT messages:
-- Reference previous discussion (pronouns like "he", "she", "it", "they", "this", "that")
-- Continue or expand on previous topic
-- Ask follow-up questions
-- Require previous context to be understood
-
-Respond with ONLY one word: "INDEPENDENT" or "DEPENDENT"
-"""
-
-            prompt = f"""Previous conversation:
-{conversation_text}
-
-Current message: "{current_msg}"
-
-Is the current message independent or dependent on the conversation?"""
-
-            response = self.llm_client.generate_response(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.1  # Low temperature for consistent classification
-            )
-
-            result = response.strip().upper()
-            is_independent = "INDEPENDENT" in result
-
-            logger.info(f"Independence check: '{current_msg[:50]}...' -> {'independent' if is_independent else 'dependent'}")
-            return is_independent
-
-        except Exception as e:
-            logger.error(f"Error in is_independent_query: {e}")
-            # On error, assume independent to avoid incorrect context merging
-            return True
+        return self.analyze(current_msg, context)["independent"]
 
     def summarize_conversation(self, current_msg: str, context: List[Dict[str, str]]) -> str:
         """
-        Create a concise summary combining conversation context and current message
-        This summary will be sent to the RAG pipeline
+        Create a concise query combining conversation context and the current message
+        (the message as-is when it does not depend on the context)
 
         Args:
             current_msg: The current user message
@@ -147,59 +182,97 @@ Is the current message independent or dependent on the conversation?"""
         Returns:
             A concise query suitable for RAG retrieval
         """
-        try:
-            conversation_text = self._format_context(context)
+        return self.analyze(current_msg, context)["summarized_query"]
 
-            system_prompt = """You are a legal assistant that creates concise, clear queries for a legal information retrieval system.
-
-Your task: Combine the conversation history with the current message to create ONE clear, self-contained legal query.
+    def analyze(self, current_msg: str, context: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Classify a message and, if needed, summarize it with its context in a single LLM call
 
-Requirements:
-- Include all relevant context from the conversation
-- Replace pronouns with actual entities (e.g., "he" -> "my brother")
-- Keep it concise (1-3 sentences)
-- Make it specific and searchable
-- Focus on the legal aspect
+        A chat turn costs one round-trip instead of separate classification and
+        summary calls; is_non_legal_query, is_independent_query and
+        summarize_conversation are views of this result.
 
-Example:
-Conversation:
-Human: I had a fight with my brother over property
-Assistant: [discusses property dispute laws]
-Human: He is making fake allegations
+        Args:
+            current_msg: The current user message
+            context: List of previous messages [{"role": "user"/"assistant", "content": "..."}]
 
-Output: "My brother is making fake allegations against me in a property dispute. What are my legal rights and how should I respond?"
-"""
+        Returns:
+            {"legal": bool, "independent": bool, "summarized_query": str}
+            summarized_query is only meaningful for legal, dependent messages
+        """
+        # Same fallbacks as the individual checks: legal, independent, message as-is
+        analysis = {"legal": True, "independent": True, "summarized_query": current_msg}
+
+        # Casual messages need no classification call at all; neither do legal
+        # messages that start a conversation (nothing to depend on or summarize)
+        precheck = _precheck_non_legal(current_msg)
+        if precheck is True:
+            analysis["legal"] = False
+            return analysis
+        if precheck is False and not context:
+            return analysis
+
+        conversation_text = self._format_context(context) if context else "(none)"
+        cache_key = ("analyze", current_msg.strip(), self._context_hash(conversation_text))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-            prompt = f"""Conversation history:
+        try:
+            prompt = f"""Previous conversation:
 {conversation_text}
 
 Current message: "{current_msg}"
 
-Create a single, clear legal query:"""
+Analyze the current message:"""
 
             response = self.llm_client.generate_response(
                 prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.3  # Slightly higher for natural query generation
+                system_prompt=_ANALYZE_SYSTEM,
+                temperature=0.1,  # Low temperature for consistent classification
+                response_format={"type": "json_object"}
             )
 
-            summarized_query = response.strip()
+            parsed = json.loads(response)
+            analysis["legal"] = bool(parsed.get("legal", True))
+            analysis["independent"] = bool(parsed.get("independent", True)) or not context
+            summarized_query = parsed.get("summarized_query")
+            if isinstance(summarized_query, str) and summarized_query.strip():
+                analysis["summarized_query"] = summarized_query.strip()
 
-            logger.info(f"Summarized query: {summarized_query[:100]}...")
-            return summarized_query
+            logger.info(
+                "Message analysis: '%s...' -> legal=%s, independent=%s",
+                current_msg[:50], analysis["legal"], analysis["independent"]
+            )
+            self._cache.set(cache_key, dict(analysis))
 
         except Exception as e:
-            logger.error(f"Error in summarize_conversation: {e}")
-            # Fallback: return the current message as-is
-            return current_msg
+            logger.error(f"Error in analyze: {e}")
+
+        return analysis
 
-    def _format_context(self, context: List[Dict[str, str]], max_messages: int = 10) -> str:
+    @staticmethod
+    def _context_hash(conversation_text: str) -> bytes:
+        """Compact cache key for a formatted conversation history"""
+        return hashlib.blake2b(conversation_text.encode("utf-8"), digest_size=16).digest()
+
+    def _format_context(
+        self,
+        context: List[Dict[str, str]],
+        max_messages: int = 10,
+        max_prompt_tokens: int = CONTEXT_MAX_PROMPT_TOKENS
+    ) -> str:
         """
         Format conversation context for LLM consumption
 
+        Messages are taken newest first until the token budget is spent, so long
+        transcripts don't inflate every prompt. Assistant turns are cut to
+        CONTEXT_ASSISTANT_TURN_MAX_TOKENS.
+
         Args:
             context: List of message dictionaries
             max_messages: Maximum number of messages to include
+            max_prompt_tokens: Token budget for the formatted history
 
         Returns:
             Formatted conversation string
@@ -208,13 +281,27 @@ Create a single, clear legal query:"""
         recent_context = context[-max_messages:] if len(context) > max_messages else context
 
         formatted_lines = []
-        for msg in recent_context:
+        remaining = max_prompt_tokens
+        for msg in reversed(recent_context):
             role = msg.get("role", "")
             content = msg.get("content", "")
 
             if role == "user":
-                formatted_lines.append(f"Human: {content}")
+                prefix = "Human"
+                budget = remaining
             elif role == "assistant":
-                formatted_lines.append(f"Chatbot: {content}")
-
-        return "\n".join(formatted_lines)
+                prefix = "Chatbot"
+                budget = min(remaining, CONTEXT_ASSISTANT_TURN_MAX_TOKENS)
+            else:
+                continue
+
+            if budget <= 0:
+                break
+            content, used = _truncate_tokens(content, budget)
+            if not content.strip():
+                # Empty turn: skip it, older turns may still fit the budget
+                continue
+            formatted_lines.append(f"{prefix}: {content}")
+            remaining -= used
+
+        return "\n".join(reversed(formatted_lines))
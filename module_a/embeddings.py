@@ -3,8 +3,10 @@ Embedding generation module
 Converts text chunks into vector embeddings
 """
 
+import atexit
 import logging
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 import numpy as np
 
 try:
@@ -13,7 +15,16 @@ try:
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
-from .config import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+from .config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_PRECISION,
+    EMBEDDING_WORKERS,
+    EMBEDDING_MULTI_PROCESS_MIN_TEXTS,
+    EMBEDDING_TORCH_THREADS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +32,28 @@ logger = logging.getLogger(__name__)
 class EmbeddingGenerator:
     """Generates embeddings for text chunks using sentence-transformers"""
     
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        precision: str = EMBEDDING_PRECISION,
+        workers: int = EMBEDDING_WORKERS,
+        torch_threads: int = EMBEDDING_TORCH_THREADS
+    ):
         """
         Initialize embedding generator
         
         Args:
             model_name: Name of the sentence-transformers model to use
+            cache_size: Number of single-text embeddings to memoize (0 disables)
+            backend: "torch", or "onnx"/"openvino" to run an exported graph
+                (exported on first load and cached by sentence-transformers)
+            precision: "fp32", "fp16" (CUDA) or "int8" (CPU dynamic quantization);
+                only applies to the torch backend
+            workers: Processes used by generate_embeddings_batch for large inputs
+                (0 or 1 encodes in this process)
+            torch_threads: Torch intra-op threads for CPU inference (0 keeps PyTorch's default)
         """
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError(
@@ -34,12 +61,68 @@ class EmbeddingGenerator:
                 "Install with: pip install sentence-transformers"
             )
         
-        logger.info(f"Loading embedding model: {model_name}")
+        if torch_threads > 0:
+            self._set_torch_threads(torch_threads)
+        
+        logger.info(f"Loading embedding model: {model_name} (backend: {backend})")
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.model = self._load_model(model_name, backend)
+        if backend == "torch" and precision != "fp32":
+            self.model = self._apply_precision(self.model, precision)
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
+        # Per-instance LRU of encoded texts (repeated queries skip the forward pass)
+        self._encode_cached = lru_cache(maxsize=cache_size)(self._encode_one)
+        self.workers = workers
+        self._pool: Optional[dict] = None
         logger.info(f"Model loaded successfully. Embedding dimension: {self.embedding_dim}")
     
+    @staticmethod
+    def _set_torch_threads(threads: int) -> None:
+        """Pin torch's CPU thread pools (process-wide) before the model runs"""
+        import torch
+        
+        torch.set_num_threads(threads)
+        try:
+            # Single-text queries have no inter-op parallelism to exploit
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only settable once, before any inter-op work has started
+            pass
+        logger.info(f"Torch CPU threads: {threads}")
+    
+    @staticmethod
+    def _load_model(model_name: str, backend: str) -> "SentenceTransformer":
+        """Load the model on the requested backend, falling back to PyTorch if it is unavailable"""
+        if backend == "torch":
+            return SentenceTransformer(model_name)
+        try:
+            return SentenceTransformer(model_name, backend=backend)
+        except Exception as e:
+            # Older sentence-transformers raise TypeError (no backend argument);
+            # missing optimum/onnxruntime/openvino raise on load
+            logger.warning(f"Embedding backend '{backend}' unavailable ({e}); using torch")
+        return SentenceTransformer(model_name)
+    
+    @staticmethod
+    def _apply_precision(model: "SentenceTransformer", precision: str) -> "SentenceTransformer":
+        """Run the torch model in reduced precision; unsupported settings keep fp32"""
+        import torch
+        
+        if precision == "fp16":
+            if torch.cuda.is_available():
+                logger.info("Running embedding model in fp16")
+                return model.half()
+            logger.warning("fp16 embeddings need CUDA; keeping fp32")
+        elif precision == "int8":
+            if model.device.type == "cpu":
+                # Quantize the Linear layers (the bulk of the FLOPs) to int8 weights
+                logger.info("Running embedding model with int8 dynamic quantization")
+                return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.warning("int8 dynamic quantization is CPU-only; keeping fp32")
+        else:
+            logger.warning(f"Unknown embedding precision '{precision}'; keeping fp32")
+        return model
+    
     def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text
@@ -48,9 +131,14 @@ class EmbeddingGenerator:
             text: Input text
             
         Returns:
-            Numpy array of embedding vector
+            Unit-normalized numpy array of embedding vector (read-only; it is shared with the cache)
         """
-        return self.model.encode(text, convert_to_numpy=True)
+        return np.frombuffer(self._encode_cached(text), dtype=np.float32)
+    
+    def _encode_one(self, text: str) -> bytes:
+        """Encode a single text; stored as immutable float32 bytes in the LRU cache"""
+        embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        return embedding.astype(np.float32, copy=False).tobytes()
     
     def generate_embeddings_batch(
         self,
@@ -67,21 +155,47 @@ class EmbeddingGenerator:
             show_progress: Whether to show progress bar
             
         Returns:
-            Numpy array of shape (len(texts), embedding_dim)
+            Numpy array of unit-normalized rows, shape (len(texts), embedding_dim)
         """
         logger.info(f"Generating embeddings for {len(texts)} texts in batches of {batch_size}")
         
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=show_progress,
-            convert_to_numpy=True
-        )
+        if self.workers > 1 and len(texts) >= EMBEDDING_MULTI_PROCESS_MIN_TEXTS:
+            embeddings = self.model.encode_multi_process(
+                texts, self._get_pool(), batch_size=batch_size, normalize_embeddings=True
+            )
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
         
         logger.info(f"Generated {len(embeddings)} embeddings of dimension {self.embedding_dim}")
         
         return embeddings
     
+    def _get_pool(self) -> dict:
+        """Start the encode worker processes on first use (one per GPU if several, else `workers` CPU processes)"""
+        if self._pool is None:
+            import torch
+
+            if torch.cuda.device_count() > 1:
+                devices = [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+            else:
+                devices = ["cpu"] * self.workers
+            logger.info(f"Starting {len(devices)} embedding worker processes: {devices}")
+            self._pool = self.model.start_multi_process_pool(target_devices=devices)
+            atexit.register(self.close_pool)
+        return self._pool
+    
+    def close_pool(self) -> None:
+        """Stop the encode worker processes, if started"""
+        if self._pool is not None:
+            SentenceTransformer.stop_multi_process_pool(self._pool)
+            self._pool = None
+    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by this model"""
         return self.embedding_dim
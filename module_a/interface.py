@@ -5,17 +5,119 @@ This module provides a clean API for other parts of the application to use.
 
 import logging
 import re
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Optional, Tuple, TypedDict
 
-from .rag_chain import LegalRAGChain
+import numpy as np
+
+from .rag_chain import LegalRAGChain, SourceEntry
 from .context_analyzer import ConversationContextAnalyzer
-from .config import LOG_LEVEL
+from .letter_classifier import LetterIntentClassifier
+from .config import LOG_LEVEL, LETTER_CLASSIFIER
 from .logging_setup import setup_logging
 
 # Configure logging with file output
 setup_logging("module_a.interface")
 logger = logging.getLogger(__name__)
 
+# Sections of the markdown-formatted LLM response, in the order the prompt asks for them.
+# A well-formed response is parsed with one pass of _RESPONSE_RE; the per-section
+# patterns are the fallback for responses with missing or reordered sections.
+_RESPONSE_SECTIONS = ("summary", "key_point", "explanation", "next_steps")
+_RESPONSE_RE = re.compile(
+    r"\*\*Summary\*\*\s*(?P<summary>.*?)\s*"
+    r"\*\*Key Legal Point\*\*\s*(?P<key_point>.*?)\s*"
+    r"\*\*Explanation\*\*\s*(?P<explanation>.*?)\s*"
+    r"\*\*Next Steps\*\*\s*(?P<next_steps>.*?)\s*$",
+    re.DOTALL | re.IGNORECASE
+)
+# We use re.DOTALL to match across newlines
+_SECTION_PATTERNS = {
+    "summary": re.compile(r"\*\*Summary\*\*\s*(.*?)\s*(?=\*\*Key Legal Point\*\*|$)", re.DOTALL | re.IGNORECASE),
+    "key_point": re.compile(r"\*\*Key Legal Point\*\*\s*(.*?)\s*(?=\*\*Explanation\*\*|$)", re.DOTALL | re.IGNORECASE),
+    "explanation": re.compile(r"\*\*Explanation\*\*\s*(.*?)\s*(?=\*\*Next Steps\*\*|$)", re.DOTALL | re.IGNORECASE),
+    "next_steps": re.compile(r"\*\*Next Steps\*\*\s*(.*?)\s*$", re.DOTALL | re.IGNORECASE),
+}
+
+# Keyword tables for the rule-based paths, each compiled into one alternation so a text
+# is scanned once instead of once per keyword (plain substring semantics, as before)
+_LETTER_KEYWORD_RE = re.compile("|".join(map(re.escape, [
+    'write', 'letter', 'application', 'submit', 'file', 'petition',
+    'request', 'appeal', 'complaint', 'notice', 'draft', 'apply'
+])))
+_INTENT_KEYWORD_RE = re.compile("|".join(map(re.escape, [
+    'apply for', 'want to apply', 'need to apply', 'how to apply',
+    'get citizenship', 'obtain', 'register', 'request for'
+])))
+
+
+def _labelled_keywords(labels: Dict[str, List[str]]) -> "re.Pattern":
+    """One pattern reporting every label whose keywords occur (including overlapping ones)"""
+    alternatives = "|".join(
+        f"(?P<{label}>{'|'.join(map(re.escape, keywords))})" for label, keywords in labels.items()
+    )
+    return re.compile(f"(?=(?:{alternatives}))")
+
+
+def _keyword_labels(pattern: "re.Pattern", *texts: str) -> set:
+    """Labels of _labelled_keywords matched anywhere in the texts"""
+    return {match.lastgroup for text in texts for match in pattern.finditer(text)}
+
+
+# Letter types in priority order
+_LETTER_TYPES = {
+    "citizenship": "citizenship application",
+    "complaint": "formal complaint",
+    "appeal": "appeal",
+    "application": "application",
+}
+_LETTER_TYPE_RE = _labelled_keywords({label: [label] for label in _LETTER_TYPES})
+
+# Non-legal message kinds in priority order, with their canned replies
+_NON_LEGAL_REPLIES = {
+    "greeting": "Hello! I'm here to help you with legal questions. Feel free to ask me anything about laws, regulations, or legal procedures.",
+    "thanks": "You're welcome! I'm glad I could help. If you have any more legal questions, feel free to ask.",
+    "bye": "Goodbye! Feel free to come back anytime you have legal questions.",
+}
+_NON_LEGAL_DEFAULT_REPLY = "I'm here to assist you with legal matters. How can I help you today?"
+_NON_LEGAL_RE = _labelled_keywords({
+    "greeting": ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'],
+    "thanks": ['thank', 'thanks', 'appreciate'],
+    "bye": ['bye', 'goodbye', 'see you'],
+})
+
+
+@lru_cache(maxsize=1024)
+def _non_legal_reply(message: str) -> str:
+    """Canned reply for a non-legal message (small talk repeats, so replies are memoized)"""
+    found = _keyword_labels(_NON_LEGAL_RE, message.lower())
+    return next(
+        (reply for kind, reply in _NON_LEGAL_REPLIES.items() if kind in found),
+        _NON_LEGAL_DEFAULT_REPLY
+    )
+
+
+class ExplanationResult(TypedDict, total=False):
+    """
+    Dict returned by LawExplanationAPI. Which keys are present depends on the path
+    taken: context-aware answers add the context fields, and failures carry `error`
+    together with a user-facing summary/explanation only.
+    """
+    summary: str
+    key_point: str
+    explanation: str
+    next_steps: str
+    sources: List[SourceEntry]
+    query: str
+    raw_response: str
+    suggested_action: Dict[str, str]
+    context_used: bool
+    is_non_legal: bool
+    original_query: str
+    summarized_query: str
+    error: str
+
+
 class LawExplanationAPI:
     """
     Main API for the Law Explanation module.
@@ -28,17 +130,43 @@ class LawExplanationAPI:
         try:
             self.rag_chain = LegalRAGChain()
             self.context_analyzer = ConversationContextAnalyzer()
+            self.letter_classifier = self._load_letter_classifier()
             logger.info("LawExplanationAPI initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize LawExplanationAPI: {e}")
             raise
 
-    def get_explanation(self, query: str) -> Dict[str, Any]:
+    @staticmethod
+    def _load_letter_classifier() -> Optional[LetterIntentClassifier]:
+        """Local letter intent classifier, or None to classify with the LLM"""
+        if LETTER_CLASSIFIER != "local":
+            return None
+        try:
+            return LetterIntentClassifier()
+        except Exception as e:
+            logger.warning(f"Letter intent classifier unavailable ({e}); using the LLM")
+            return None
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a query with the retrieval model.
+
+        The result can be passed back as `query_embedding` so the query isn't
+        embedded twice (e.g. when it was already embedded for a cache lookup).
+        """
+        return self.rag_chain.embedder.generate_embedding(query)
+
+    def get_explanation(
+        self,
+        query: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> ExplanationResult:
         """
         Get a structured legal explanation for a user query.
         
         Args:
             query: The user's question (e.g., "How to get citizenship?")
+            query_embedding: Optional precomputed embed_query(query)
             
         Returns:
             Dict containing:
@@ -51,35 +179,64 @@ class LawExplanationAPI:
         """
         try:
             # Run the RAG pipeline
-            result = self.rag_chain.run(query)
-            raw_text = result['explanation']
-            
-            # Parse the structured response
-            parsed = self._parse_response(raw_text)
-
-            # Add metadata and sources
-            parsed['sources'] = result.get('sources', [])
-            parsed['query'] = query
-            parsed['raw_response'] = raw_text
-
-            # Check for letter generation opportunity
-            letter_suggestion = self._detect_letter_generation_opportunity(
-                parsed.get('next_steps', ''),
-                query
-            )
-            if letter_suggestion:
-                parsed['suggested_action'] = letter_suggestion
-
-            return parsed
+            result = self.rag_chain.run(query, query_embedding=query_embedding)
+            return self._finalize_explanation(query, result)
             
         except Exception as e:
             logger.error(f"Error generating explanation: {e}")
-            return {
-                "error": str(e),
-                "summary": "I encountered an error while processing your request.",
-                "explanation": "Please try again later.",
-                "sources": []
-            }
+            return self._error_response(e)
+
+    def get_explanation_stream(
+        self,
+        query: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of get_explanation.
+        
+        Yields:
+            {"type": "delta", "content": str} for each generated text chunk, then
+            {"type": "result", "result": dict} with the same structure as get_explanation
+        """
+        try:
+            for event in self.rag_chain.run_stream(query, query_embedding=query_embedding):
+                if event["type"] == "delta":
+                    yield event
+                else:
+                    yield {"type": "result", "result": self._finalize_explanation(query, event["result"])}
+        except Exception as e:
+            logger.error(f"Error streaming explanation: {e}")
+            yield {"type": "result", "result": self._error_response(e)}
+
+    def _finalize_explanation(self, query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse the raw RAG output into the structured explanation format"""
+        raw_text = result['explanation']
+        
+        # Parse the structured response
+        parsed = self._parse_response(raw_text)
+
+        # Add metadata and sources
+        parsed['sources'] = result.get('sources', [])
+        parsed['query'] = query
+        parsed['raw_response'] = raw_text
+
+        # Check for letter generation opportunity
+        letter_suggestion = self._detect_letter_generation_opportunity(
+            parsed.get('next_steps', ''),
+            query
+        )
+        if letter_suggestion:
+            parsed['suggested_action'] = letter_suggestion
+
+        return parsed
+
+    def _error_response(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "error": str(error),
+            "summary": "I encountered an error while processing your request.",
+            "explanation": "Please try again later.",
+            "sources": []
+        }
 
     def _parse_response(self, text: str) -> Dict[str, str]:
         """
@@ -87,29 +244,17 @@ class LawExplanationAPI:
         Expected format:
         **Summary** ... **Key Legal Point** ... **Explanation** ... **Next Steps** ...
         """
-        parsed = {
-            "summary": "",
-            "key_point": "",
-            "explanation": "",
-            "next_steps": ""
-        }
-        
-        # Regex patterns to extract sections
-        # We use re.DOTALL to match across newlines
-        patterns = {
-            "summary": r"\*\*Summary\*\*\s*(.*?)\s*(?=\*\*Key Legal Point\*\*|$)",
-            "key_point": r"\*\*Key Legal Point\*\*\s*(.*?)\s*(?=\*\*Explanation\*\*|$)",
-            "explanation": r"\*\*Explanation\*\*\s*(.*?)\s*(?=\*\*Next Steps\*\*|$)",
-            "next_steps": r"\*\*Next Steps\*\*\s*(.*?)\s*$"
-        }
-        
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match:
-                parsed[key] = match.group(1).strip()
-            else:
-                # Fallback: if parsing fails, try to be smart or leave empty
-                pass
+        # Well-formed response: all four sections in one scan
+        match = _RESPONSE_RE.search(text)
+        if match:
+            parsed = {key: match.group(key).strip() for key in _RESPONSE_SECTIONS}
+        else:
+            # Otherwise extract whichever sections are present
+            parsed = {key: "" for key in _RESPONSE_SECTIONS}
+            for key, pattern in _SECTION_PATTERNS.items():
+                section = pattern.search(text)
+                if section:
+                    parsed[key] = section.group(1).strip()
                 
         # If parsing completely failed (e.g. LLM didn't follow format), 
         # put everything in explanation
@@ -121,8 +266,9 @@ class LawExplanationAPI:
     def get_explanation_with_context(
         self,
         query: str,
-        conversation_history: Optional[List[Dict[str, str]]] = None
-    ) -> Dict[str, Any]:
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> ExplanationResult:
         """
         Get explanation with conversation context awareness.
         This method intelligently handles:
@@ -134,59 +280,124 @@ class LawExplanationAPI:
             query: Current user message
             conversation_history: List of previous messages in format:
                 [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}, ...]
+            query_embedding: Optional precomputed embed_query(query); used whenever
+                the message is answered on its own rather than via a summarized query
 
         Returns:
             Dict containing structured explanation (same format as get_explanation)
         """
         try:
-            # Step 1: Check if this is a non-legal query
-            if self.context_analyzer.is_non_legal_query(query):
-                logger.info(f"Non-legal query detected: {query[:50]}...")
-                return self._generate_non_legal_response(query)
-
-            # Step 2: If no context, treat as new conversation
-            if not conversation_history or len(conversation_history) == 0:
-                logger.info("No conversation history, processing as new query")
-                return self.get_explanation(query)
+            non_legal_response, summarized_query = self._plan_contextual_query(query, conversation_history)
+            if non_legal_response is not None:
+                return non_legal_response
 
-            # Step 3: Check if the query is independent of previous context
-            is_independent = self.context_analyzer.is_independent_query(query, conversation_history)
-
-            if is_independent:
-                logger.info("Independent query detected, processing without context")
-                return self.get_explanation(query)
-
-            # Step 4: Dependent query - summarize conversation context
-            logger.info("Dependent query detected, summarizing conversation context")
-            summarized_query = self.context_analyzer.summarize_conversation(query, conversation_history)
-            logger.info(f"Summarized query: {summarized_query[:100]}...")
+            if summarized_query is None:
+                return self.get_explanation(query, query_embedding)
 
             # Step 5: Send summarized query to RAG pipeline
             result = self.get_explanation(summarized_query)
+            return self._add_context_metadata(result, query, summarized_query)
 
-            # Add metadata indicating context was used
-            result['context_used'] = True
-            result['original_query'] = query
-            result['summarized_query'] = summarized_query
-
-            # Step 6: Check for letter generation opportunity
-            letter_suggestion = self._detect_letter_generation_opportunity(
-                result.get('next_steps', ''),
-                query
-            )
-            if letter_suggestion:
-                result['suggested_action'] = letter_suggestion
+        except Exception as e:
+            logger.error(f"Error in get_explanation_with_context: {e}")
+            # Fallback to basic explanation
+            return self.get_explanation(query, query_embedding)
 
-            return result
+    def get_explanation_with_context_stream(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of get_explanation_with_context.
 
+        Yields:
+            {"type": "delta", "content": str} for each generated text chunk, then
+            {"type": "result", "result": dict} with the same structure as get_explanation_with_context
+        """
+        try:
+            non_legal_response, summarized_query = self._plan_contextual_query(query, conversation_history)
         except Exception as e:
-            logger.error(f"Error in get_explanation_with_context: {e}")
+            logger.error(f"Error in get_explanation_with_context_stream: {e}")
             # Fallback to basic explanation
-            return self.get_explanation(query)
+            non_legal_response, summarized_query = None, None
+
+        if non_legal_response is not None:
+            yield {"type": "result", "result": non_legal_response}
+            return
+
+        if summarized_query is None:
+            yield from self.get_explanation_stream(query, query_embedding)
+            return
+
+        for event in self.get_explanation_stream(summarized_query):
+            if event["type"] == "result":
+                event = {
+                    "type": "result",
+                    "result": self._add_context_metadata(event["result"], query, summarized_query)
+                }
+            yield event
+
+    def _plan_contextual_query(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Decide how a chat message should be answered.
+
+        Returns:
+            (non_legal_response, summarized_query): a ready response for non-legal
+            messages; otherwise the context-summarized query for dependent messages,
+            or None when the message should be answered on its own
+        """
+        # One LLM call classifies the message and, for dependent messages, summarizes it
+        analysis = self.context_analyzer.analyze(query, conversation_history)
+
+        # Step 1: Non-legal messages get a conversational reply
+        if not analysis["legal"]:
+            logger.info(f"Non-legal query detected: {query[:50]}...")
+            return self._generate_non_legal_response(query), None
+
+        # Step 2: New conversations and independent queries are answered on their own
+        if analysis["independent"]:
+            logger.info("Independent query detected, processing without context")
+            return None, None
+
+        # Step 3: Dependent query - use the context-summarized query
+        summarized_query = analysis["summarized_query"]
+        logger.info(f"Dependent query detected, summarized query: {summarized_query[:100]}...")
+        return None, summarized_query
+
+    def _add_context_metadata(
+        self,
+        result: Dict[str, Any],
+        query: str,
+        summarized_query: str
+    ) -> Dict[str, Any]:
+        """Mark a result as context-based and re-check letter generation against the original query"""
+        # Add metadata indicating context was used
+        result['context_used'] = True
+        result['original_query'] = query
+        result['summarized_query'] = summarized_query
+
+        # Step 6: Check for letter generation opportunity
+        letter_suggestion = self._detect_letter_generation_opportunity(
+            result.get('next_steps', ''),
+            query
+        )
+        if letter_suggestion:
+            result['suggested_action'] = letter_suggestion
+
+        return result
 
     def _detect_letter_generation_opportunity(self, next_steps: str, query: str) -> Optional[Dict[str, str]]:
         """
-        Detect if the next steps suggest a letter generation opportunity using Mistral LLM.
+        Detect if the next steps suggest a letter generation opportunity.
+
+        Uses the local zero-shot classifier when loaded (keyword fallback when it isn't
+        confident), otherwise the Mistral LLM.
 
         Args:
             next_steps: The next steps text from RAG response
@@ -195,6 +406,30 @@ class LawExplanationAPI:
         Returns:
             Dict with suggestion details if letter generation is applicable, None otherwise
         """
+        if self.letter_classifier is None:
+            return self._detect_letter_with_llm(next_steps, query)
+
+        try:
+            decision = self.letter_classifier.classify(query, next_steps)
+        except Exception as e:
+            logger.error(f"Error in letter intent classification: {e}")
+            decision = None
+        if decision is None:
+            return self._fallback_keyword_detection(next_steps, query)
+
+        requires_letter, letter_type = decision
+        logger.info(f"Letter detection - Query: '{query[:50]}...' Requires: {requires_letter}, Type: {letter_type}")
+        if not requires_letter:
+            return None
+        return {
+            "action": "generate_letter",
+            "description": query,
+            "letter_type": letter_type,
+            "prompt": f"Would you like me to help you draft a {letter_type}?"
+        }
+
+    def _detect_letter_with_llm(self, next_steps: str, query: str) -> Optional[Dict[str, str]]:
+        """Ask the Mistral LLM whether a letter is needed (keyword fallback if the call fails)"""
         try:
             # Use Mistral LLM to intelligently detect letter generation needs
             system_prompt = """You are an intelligent assistant that determines if a user's legal query requires generating a formal letter or application.
@@ -271,34 +506,18 @@ Analyze if this requires generating a formal letter or application:"""
 
     def _fallback_keyword_detection(self, next_steps: str, query: str) -> Optional[Dict[str, str]]:
         """Fallback keyword-based detection if LLM fails"""
-        letter_keywords = [
-            'write', 'letter', 'application', 'submit', 'file', 'petition',
-            'request', 'appeal', 'complaint', 'notice', 'draft', 'apply'
-        ]
-
-        intent_keywords = [
-            'apply for', 'want to apply', 'need to apply', 'how to apply',
-            'get citizenship', 'obtain', 'register', 'request for'
-        ]
-
         next_steps_lower = next_steps.lower()
         query_lower = query.lower()
 
-        has_letter_keyword = any(keyword in next_steps_lower or keyword in query_lower for keyword in letter_keywords)
-        has_intent_keyword = any(keyword in query_lower for keyword in intent_keywords)
+        has_letter_keyword = bool(_LETTER_KEYWORD_RE.search(next_steps_lower) or _LETTER_KEYWORD_RE.search(query_lower))
+        has_intent_keyword = bool(_INTENT_KEYWORD_RE.search(query_lower))
 
         if has_letter_keyword or has_intent_keyword:
-            letter_type = None
-            if 'citizenship' in query_lower or 'citizenship' in next_steps_lower:
-                letter_type = "citizenship application"
-            elif 'complaint' in next_steps_lower or 'complaint' in query_lower:
-                letter_type = "formal complaint"
-            elif 'appeal' in next_steps_lower or 'appeal' in query_lower:
-                letter_type = "appeal"
-            elif 'application' in next_steps_lower or 'application' in query_lower:
-                letter_type = "application"
-            else:
-                letter_type = "formal letter"
+            found = _keyword_labels(_LETTER_TYPE_RE, query_lower, next_steps_lower)
+            letter_type = next(
+                (letter_type for label, letter_type in _LETTER_TYPES.items() if label in found),
+                "formal letter"
+            )
 
             return {
                 "action": "generate_letter",
@@ -319,17 +538,7 @@ Analyze if this requires generating a formal letter or application:"""
         Returns:
             Response dict matching the standard explanation format
         """
-        # Detect type of non-legal query
-        query_lower = query.lower()
-
-        if any(greeting in query_lower for greeting in ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']):
-            response = "Hello! I'm here to help you with legal questions. Feel free to ask me anything about laws, regulations, or legal procedures."
-        elif any(thanks in query_lower for thanks in ['thank', 'thanks', 'appreciate']):
-            response = "You're welcome! I'm glad I could help. If you have any more legal questions, feel free to ask."
-        elif any(bye in query_lower for bye in ['bye', 'goodbye', 'see you']):
-            response = "Goodbye! Feel free to come back anytime you have legal questions."
-        else:
-            response = "I'm here to assist you with legal matters. How can I help you today?"
+        response = _non_legal_reply(query)
 
         return {
             "summary": response,
@@ -347,24 +556,15 @@ Analyze if this requires generating a formal letter or application:"""
         Retrieve relevant legal sources without generating an explanation.
         Useful for "Search Laws" feature.
         """
-        # We can access the vector db directly from the chain
-        embedding = self.rag_chain.embedder.generate_embedding(query)
-        results = self.rag_chain.vector_db.query_with_embedding(
-            embedding.tolist(),
-            n_results=k
-        )
-
-        sources = []
-        if results['documents'][0]:
-            for doc, metadata, distance in zip(
-                results['documents'][0],
-                results['metadatas'][0],
-                results['distances'][0]
-            ):
-                sources.append({
-                    'text': doc,
-                    'file': metadata.get('source_file'),
-                    'section': metadata.get('article_section'),
-                    'relevance': 1.0 - distance
-                })
-        return sources
+        # Shares the chain's retrieval cache, so a following explanation of the same query skips the vector DB
+        chunks = self.rag_chain.retrieve(query, k)
+
+        return [
+            {
+                'text': chunk['text'],
+                'file': chunk['metadata'].get('source_file'),
+                'section': chunk['metadata'].get('article_section'),
+                'relevance': chunk['score']
+            }
+            for chunk in chunks
+        ]
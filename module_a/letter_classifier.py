@@ -0,0 +1,98 @@
+"""
+Letter intent classifier
+Decides locally (zero-shot NLI cross-encoder) whether a query calls for drafting a letter
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CROSS_ENCODER_AVAILABLE = False
+
+from .config import LETTER_CLASSIFIER_MODEL, LETTER_CLASSIFIER_MIN_CONFIDENCE
+
+logger = logging.getLogger(__name__)
+
+# Hypotheses for the yes/no decision; index 0 means a letter is needed
+_INTENT_HYPOTHESES = [
+    "This requires drafting a formal letter or application.",
+    "This is a general information question.",
+]
+
+# Letter types offered to the user, each tested as "This requires drafting a <type>."
+LETTER_TYPES = [
+    "citizenship application",
+    "formal complaint",
+    "appeal",
+    "application",
+    "petition",
+    "formal letter",
+]
+
+
+class LetterIntentClassifier:
+    """Zero-shot letter detection: scores the query against NLI hypotheses instead of asking the LLM"""
+
+    def __init__(
+        self,
+        model_name: str = LETTER_CLASSIFIER_MODEL,
+        min_confidence: float = LETTER_CLASSIFIER_MIN_CONFIDENCE
+    ):
+        """
+        Initialize the classifier
+
+        Args:
+            model_name: NLI cross-encoder (labels contradiction/entailment/neutral)
+            min_confidence: Probability below which a decision is reported as uncertain
+        """
+        if not CROSS_ENCODER_AVAILABLE:
+            raise ImportError(
+                "sentence-transformers not installed. "
+                "Install with: pip install sentence-transformers"
+            )
+
+        logger.info(f"Loading letter intent classifier: {model_name}")
+        self.model = CrossEncoder(model_name)
+        self.min_confidence = min_confidence
+        id2label = getattr(self.model.config, "id2label", None) or {}
+        self._entailment_index = next(
+            (int(i) for i, label in id2label.items() if label.lower() == "entailment"),
+            1
+        )
+
+    def classify(self, query: str, next_steps: str = "") -> Optional[Tuple[bool, Optional[str]]]:
+        """
+        Decide whether the query calls for a letter, and which kind
+
+        Args:
+            query: User's query
+            next_steps: Recommended next steps from the explanation
+
+        Returns:
+            (requires_letter, letter_type), or None when the model is not confident
+            enough and the caller should fall back to another method
+        """
+        premise = f"{query}\n{next_steps}".strip()
+
+        probs = self._entailment_probs(premise, _INTENT_HYPOTHESES)
+        if probs.max() < self.min_confidence:
+            return None
+        if probs.argmax() != 0:
+            return False, None
+
+        probs = self._entailment_probs(premise, [f"This requires drafting a {t}." for t in LETTER_TYPES])
+        best = int(probs.argmax())
+        letter_type = LETTER_TYPES[best] if probs[best] >= self.min_confidence else "formal letter"
+        return True, letter_type
+
+    def _entailment_probs(self, premise: str, hypotheses: List[str]) -> np.ndarray:
+        """Softmax of the entailment logits across the hypotheses (the usual zero-shot multi-class scheme)"""
+        logits = self.model.predict([(premise, h) for h in hypotheses], convert_to_numpy=True, show_progress_bar=False)
+        entailment = np.asarray(logits, dtype=np.float32)[:, self._entailment_index]
+        exp = np.exp(entailment - entailment.max())
+        return exp / exp.sum()
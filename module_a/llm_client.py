@@ -5,7 +5,7 @@ Handles interaction with Mistral AI models
 
 import os
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from dotenv import load_dotenv
 
 try:
@@ -60,7 +60,9 @@ class MistralClient:
         self, 
         prompt: str, 
         system_prompt: Optional[str] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None
     ) -> str:
         """
         Generate a response from the LLM
@@ -69,6 +71,8 @@ class MistralClient:
             prompt: User prompt
             system_prompt: Optional system instruction
             temperature: Creativity parameter (0.0 to 1.0)
+            response_format: Optional output format, e.g. {"type": "json_object"}
+            max_tokens: Optional cap on generated tokens (bounds latency of short answers)
             
         Returns:
             Generated text response
@@ -76,12 +80,7 @@ class MistralClient:
         if not self.client:
             raise ValueError("Mistral client not initialized. Check API key.")
             
-        messages = []
-        
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-            
-        messages.append(UserMessage(content=prompt))
+        messages = self._build_messages(prompt, system_prompt)
         
         try:
             logger.info(f"Sending request to Mistral API (model: {self.model})")
@@ -90,7 +89,9 @@ class MistralClient:
             chat_response = self.client.chat.complete(
                 model=self.model,
                 messages=messages,
-                temperature=temperature
+                temperature=temperature,
+                **({"response_format": response_format} if response_format else {}),
+                **({"max_tokens": max_tokens} if max_tokens else {})
             )
             
             response_text = chat_response.choices[0].message.content
@@ -100,3 +101,55 @@ class MistralClient:
         except Exception as e:
             logger.error(f"Mistral API call failed: {e}")
             raise
+
+    def generate_response_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7
+    ) -> Iterator[str]:
+        """
+        Generate a response from the LLM, yielding text chunks as they arrive
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system instruction
+            temperature: Creativity parameter (0.0 to 1.0)
+            
+        Yields:
+            Incremental pieces of the generated text
+        """
+        if not self.client:
+            raise ValueError("Mistral client not initialized. Check API key.")
+        
+        messages = self._build_messages(prompt, system_prompt)
+        
+        try:
+            logger.info(f"Streaming request to Mistral API (model: {self.model})")
+            
+            stream = self.client.chat.stream(
+                model=self.model,
+                messages=messages,
+                temperature=temperature
+            )
+            
+            for event in stream:
+                content = event.data.choices[0].delta.content
+                if isinstance(content, str) and content:
+                    yield content
+            
+            logger.info("Finished streaming response from Mistral API")
+            
+        except Exception as e:
+            logger.error(f"Mistral API streaming call failed: {e}")
+            raise
+
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Any]:
+        """Build the chat message list for a prompt and optional system instruction"""
+        messages = []
+        
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+            
+        messages.append(UserMessage(content=prompt))
+        return messages
@@ -7,7 +7,9 @@ import logging
 import time
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
 
 try:
     from pinecone import Pinecone, ServerlessSpec
@@ -218,14 +220,17 @@ class PineconeLegalVectorDB:
     def add_chunks(
         self,
         chunks: List[Dict[str, Any]],
-        embeddings: List[List[float]]
+        embeddings: Union[np.ndarray, List[List[float]]],
+        finalize: bool = True
     ) -> None:
         """
         Add chunks with embeddings to the database
         
         Args:
             chunks: List of chunk dicts with 'chunk_id', 'text', and 'metadata'
-            embeddings: List of embedding vectors
+            embeddings: Embedding matrix of shape (len(chunks), dim), or list of vectors
+            finalize: Wait for consistency, verify the upload and save the text storage
+                (False for intermediate batches of a larger load)
         """
         if len(chunks) != len(embeddings):
             raise ValueError(
@@ -270,7 +275,8 @@ class PineconeLegalVectorDB:
             
             vectors_to_upsert.append({
                 "id": chunk_id,
-                "values": embedding,
+                # Pinecone's request payload needs plain float lists
+                "values": embedding.tolist() if isinstance(embedding, np.ndarray) else embedding,
                 "metadata": cleaned_metadata,
             })
 
@@ -293,16 +299,17 @@ class PineconeLegalVectorDB:
                     logger.error(f"✗ Batch {batch_num} failed: {e}")
                     raise
             
-            # Wait for consistency
-            time.sleep(2)
-            
-            # Verify upload
-            stats = self.index.describe_index_stats()
-            total_count = stats.get('total_vector_count', 0)
-            logger.info(f"✓ Upload complete. Total vectors in DB: {total_count}")
-            
-            # Save text storage after all chunks are added
-            self._save_text_storage()
+            if finalize:
+                # Wait for consistency
+                time.sleep(2)
+                
+                # Verify upload
+                stats = self.index.describe_index_stats()
+                total_count = stats.get('total_vector_count', 0)
+                logger.info(f"✓ Upload complete. Total vectors in DB: {total_count}")
+                
+                # Save text storage after all chunks are added
+                self._save_text_storage()
             
         except Exception as e:
             logger.error(f"Failed to add chunks: {e}")
@@ -341,7 +348,7 @@ class PineconeLegalVectorDB:
 
     def query_with_embedding(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         n_results: int = DEFAULT_RETRIEVAL_K,
         where: Optional[Dict] = None,
     ) -> Dict[str, Any]:
@@ -349,7 +356,7 @@ class PineconeLegalVectorDB:
         Query with pre-computed embedding
         
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (list or numpy array)
             n_results: Number of results to return
             where: Optional metadata filter (Pinecone filter syntax)
             
@@ -361,7 +368,8 @@ class PineconeLegalVectorDB:
         try:
             # Build query parameters
             query_params = {
-                "vector": query_embedding,
+                # Pinecone's request payload needs a plain float list
+                "vector": query_embedding.tolist() if isinstance(query_embedding, np.ndarray) else query_embedding,
                 "top_k": n_results,
                 "include_metadata": True
             }
@@ -4,12 +4,17 @@ Orchestrates retrieval and generation for legal explanations
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import re
+from typing import Dict, Any, Iterator, List, Optional, TypedDict
+
+import numpy as np
+
+from utility.ttl_cache import TTLCache
 
 from .embeddings import EmbeddingGenerator
 from .llm_client import MistralClient
 from .prompts import format_rag_prompt, LEGAL_SYSTEM_PROMPT
-from .config import DEFAULT_RETRIEVAL_K, PINECONE_API_KEY
+from .config import DEFAULT_RETRIEVAL_K, PINECONE_API_KEY, RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL
 
 # Import Pinecone - required for RAG chain
 try:
@@ -21,6 +26,19 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Article number at the start of a chunk, used when metadata has no section
+_ARTICLE_RE = re.compile(r'Article\s+(\d+[A-Za-z]?)')
+
+
+class SourceEntry(TypedDict):
+    """A retrieved chunk as reported to API clients"""
+    file: str
+    section: str
+    relevance_score: float
+
+
+GENERATION_ERROR_MESSAGE = "I apologize, but I encountered an error while generating the explanation. Please try again later."
+
 # Set up file logging
 def _setup_rag_logging():
     """Ensure RAG chain logs are written to file"""
@@ -42,8 +60,18 @@ class LegalRAGChain:
     Make sure PINECONE_API_KEY is set before initializing.
     """
     
-    def __init__(self):
-        """Initialize the RAG chain components"""
+    def __init__(
+        self,
+        cache_maxsize: int = RETRIEVAL_CACHE_SIZE,
+        cache_ttl: float = RETRIEVAL_CACHE_TTL
+    ):
+        """
+        Initialize the RAG chain components
+
+        Args:
+            cache_maxsize: Maximum number of cached retrievals (0 disables caching)
+            cache_ttl: Lifetime of a cached retrieval in seconds
+        """
         logger.info("Initializing Legal RAG Chain...")
         
         # Check if Pinecone is available
@@ -78,6 +106,10 @@ class LegalRAGChain:
             )
         
         self.llm = MistralClient()
+
+        # The same query is often retrieved twice in a row (e.g. "Search Laws" followed
+        # by an explanation); reuse the vector DB results for a short while
+        self._cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
         
         logger.info("RAG Chain initialized successfully with Pinecone")
     
@@ -101,7 +133,8 @@ class LegalRAGChain:
     def run(
         self, 
         query: str, 
-        k: int = DEFAULT_RETRIEVAL_K
+        k: int = DEFAULT_RETRIEVAL_K,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Run the full RAG pipeline
@@ -109,6 +142,7 @@ class LegalRAGChain:
         Args:
             query: User's question
             k: Number of chunks to retrieve
+            query_embedding: Precomputed embedding of the query (computed here if omitted)
             
         Returns:
             Dictionary with 'query', 'explanation', and 'sources'
@@ -116,28 +150,7 @@ class LegalRAGChain:
         logger.info(f"Processing query: {query}")
         
         # Step 1: Retrieve relevant chunks
-        logger.info("Step 1: Retrieving relevant laws...")
-        query_embedding = self.embedder.generate_embedding(query)
-        retrieval_results = self.vector_db.query_with_embedding(
-            query_embedding.tolist(), 
-            n_results=k
-        )
-        
-        # Process retrieval results into a clean list
-        context_chunks = []
-        if retrieval_results['documents'][0]:
-            for doc, metadata, distance in zip(
-                retrieval_results['documents'][0],
-                retrieval_results['metadatas'][0],
-                retrieval_results['distances'][0]
-            ):
-                context_chunks.append({
-                    'text': doc,
-                    'metadata': metadata,
-                    'distance': distance
-                })
-        
-        logger.info(f"Retrieved {len(context_chunks)} relevant chunks")
+        context_chunks = self.retrieve(query, k, query_embedding)
         
         # Step 2: Generate explanation
         logger.info("Step 2: Generating explanation...")
@@ -153,27 +166,120 @@ class LegalRAGChain:
             )
         except Exception as e:
             logger.error(f"Generation failed: {e}")
-            explanation = "I apologize, but I encountered an error while generating the explanation. Please try again later."
+            explanation = GENERATION_ERROR_MESSAGE
         
         # Step 3: Format output with improved source handling
+        return self._build_result(query, explanation, context_chunks)
+
+    def run_stream(
+        self,
+        query: str,
+        k: int = DEFAULT_RETRIEVAL_K,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run the RAG pipeline, streaming the explanation as it is generated
+        
+        Args:
+            query: User's question
+            k: Number of chunks to retrieve
+            query_embedding: Precomputed embedding of the query (computed here if omitted)
+            
+        Yields:
+            {"type": "delta", "content": str} for each generated text chunk, then
+            {"type": "result", "result": dict} with the same shape as run()
+        """
+        logger.info(f"Processing query (streaming): {query}")
+        
+        context_chunks = self.retrieve(query, k, query_embedding)
+        prompt = format_rag_prompt(query, context_chunks)
+        
+        parts = []
+        try:
+            for delta in self.llm.generate_response_stream(
+                prompt=prompt,
+                system_prompt=LEGAL_SYSTEM_PROMPT
+            ):
+                parts.append(delta)
+                yield {"type": "delta", "content": delta}
+            explanation = "".join(parts)
+        except Exception as e:
+            logger.error(f"Generation failed: {e}")
+            explanation = GENERATION_ERROR_MESSAGE
+        
+        yield {"type": "result", "result": self._build_result(query, explanation, context_chunks)}
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = DEFAULT_RETRIEVAL_K,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Embed the query (unless already embedded) and fetch the k most relevant chunks from the vector DB
+
+        Results are cached per (query, k) for `cache_ttl` seconds; treat the returned
+        chunks as read-only.
+
+        Returns:
+            List of {'text', 'metadata', 'score'} dicts, most relevant first
+            ('score' is the cosine similarity of the normalized embeddings)
+        """
+        logger.info("Step 1: Retrieving relevant laws...")
+        cache_key = (query, k)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Retrieved {len(cached)} relevant chunks (cached)")
+            return cached
+
+        if query_embedding is None:
+            query_embedding = self.embedder.generate_embedding(query)
+        retrieval_results = self.vector_db.query_with_embedding(
+            query_embedding,
+            n_results=k
+        )
+        
+        # Process retrieval results into a clean list
+        # Pinecone's cosine index reports similarities (higher = better) under 'distances'.
+        # The DB already returns exactly k results, best first, so one pass over the
+        # parallel lists is all that's needed (no re-sorting or top-k selection)
+        context_chunks = [
+            {'text': doc, 'metadata': metadata, 'score': score}
+            for doc, metadata, score in zip(
+                retrieval_results['documents'][0],
+                retrieval_results['metadatas'][0],
+                retrieval_results['distances'][0]
+            )
+        ]
+        
+        logger.info(f"Retrieved {len(context_chunks)} relevant chunks")
+        self._cache.set(cache_key, context_chunks)
+        return context_chunks
+
+    def _build_result(
+        self,
+        query: str,
+        explanation: str,
+        context_chunks: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Assemble the pipeline output, deriving a source entry per retrieved chunk"""
         sources = []
         for i, chunk in enumerate(context_chunks):
-            source_file = chunk['metadata'].get('source_file', 'Legal Document')
-            article_section = chunk['metadata'].get('article_section')
-
-            # If no specific section, try to extract from the text
-            if not article_section and 'Article' in chunk['text'][:200]:
-                # Try to extract article number from beginning of text
-                import re
-                match = re.search(r'Article\s+(\d+[A-Za-z]?)', chunk['text'][:200])
+            metadata = chunk['metadata']
+            article_section = metadata.get('article_section')
+
+            # If no specific section, try to extract the article number from the
+            # beginning of the text (searched in place, without slicing a copy)
+            if not article_section:
+                match = _ARTICLE_RE.search(chunk['text'], 0, 200)
                 if match:
                     article_section = f"Article {match.group(1)}"
 
             # Create source entry
-            source_entry = {
-                'file': source_file,
+            source_entry: SourceEntry = {
+                'file': metadata.get('source_file', 'Legal Document'),
                 'section': article_section or f"Section {i+1}",
-                'relevance_score': 1.0 - chunk['distance']  # Approx score
+                'relevance_score': float(chunk['score'])
             }
             sources.append(source_entry)
 
@@ -4,7 +4,9 @@ Validates that semantic search is working correctly
 """
 
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 from .embeddings import EmbeddingGenerator
 from .vector_db import LegalVectorDB
@@ -18,7 +20,8 @@ def test_query(
     query: str,
     vector_db: LegalVectorDB,
     embedder: EmbeddingGenerator,
-    n_results: int = 3
+    n_results: int = 3,
+    query_embedding: Optional[np.ndarray] = None
 ) -> None:
     """
     Test a single query and display results
@@ -28,27 +31,29 @@ def test_query(
         vector_db: Vector database instance
         embedder: Embedding generator instance
         n_results: Number of results to retrieve
+        query_embedding: Precomputed embedding of the query (embedded here if omitted)
     """
-    print(f"\n{'=' * 80}")
-    print(f"Query: {query}")
-    print(f"{'=' * 80}")
-    
     # Generate query embedding
-    query_embedding = embedder.generate_embedding(query)
+    if query_embedding is None:
+        query_embedding = embedder.generate_embedding(query)
     
     # Search
-    results = vector_db.query_with_embedding(query_embedding.tolist(), n_results=n_results)
+    results = vector_db.query_with_embedding(query_embedding, n_results=n_results)
     
-    # Display results
-    if not results['documents'][0]:
+    _print_results(query, results['documents'][0], results['metadatas'][0], results['distances'][0])
+
+
+def _print_results(query: str, documents: List[str], metadatas: List[dict], distances: List[float]) -> None:
+    """Display the results of one query"""
+    print(f"\n{'=' * 80}")
+    print(f"Query: {query}")
+    print(f"{'=' * 80}")
+    
+    if not documents:
         print("No results found!")
         return
     
-    for i, (doc, metadata, distance) in enumerate(zip(
-        results['documents'][0],
-        results['metadatas'][0],
-        results['distances'][0]
-    ), 1):
+    for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances), 1):
         print(f"\nResult {i} (Distance: {distance:.4f}):")
         print(f"  Source: {metadata.get('source_file', 'N/A')}")
         print(f"  Section: {metadata.get('article_section', 'N/A')}")
@@ -67,7 +72,7 @@ def main():
         # Initialize
         print("\nInitializing embedding model and vector database...")
         embedder = EmbeddingGenerator()
-        vector_db = LegalVectorDB()
+        vector_db = LegalVectorDB(embedder=embedder)
         
         db_count = vector_db.get_count()
         print(f"✓ Embedding model loaded: {embedder.model_name}")
@@ -90,8 +95,18 @@ def main():
         
         print(f"\nRunning {len(test_queries)} test queries...")
         
-        for query in test_queries:
-            test_query(query, vector_db, embedder, n_results=3)
+        # Embed all queries in one batch instead of one forward pass each
+        query_embeddings = embedder.generate_embeddings_batch(
+            test_queries,
+            batch_size=len(test_queries),
+            show_progress=False
+        )
+        
+        # ...and search for all of them in a single database call
+        results = vector_db.query_with_embeddings(query_embeddings, n_results=3)
+        
+        for i, query in enumerate(test_queries):
+            _print_results(query, results['documents'][i], results['metadatas'][i], results['distances'][i])
         
         print("\n" + "=" * 80)
         print("Retrieval Testing Complete!")
@@ -5,29 +5,85 @@ Stores and retrieves document chunks with embeddings
 
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
 
 try:
     import chromadb
     from chromadb.config import Settings
     CHROMADB_AVAILABLE = True
+    # Chroma 0.6+ takes numpy embeddings directly; older versions need nested lists
+    CHROMADB_NDARRAY_EMBEDDINGS = tuple(int(p) for p in chromadb.__version__.split(".")[:2]) >= (0, 6)
 except ImportError:
     CHROMADB_AVAILABLE = False
+    CHROMADB_NDARRAY_EMBEDDINGS = False
 
-from .config import VECTOR_DB_DIR, DEFAULT_RETRIEVAL_K
+from .config import VECTOR_DB_DIR, DEFAULT_RETRIEVAL_K, VECTOR_DB_ADD_BATCH_SIZE
+from .embeddings import EmbeddingGenerator
 
 logger = logging.getLogger(__name__)
 
 
+def _unit_float32(embeddings: Union[np.ndarray, List[float], List[List[float]]]) -> np.ndarray:
+    """
+    Embeddings as float32 rows scaled to unit length (zero vectors are left as is)
+
+    The collection uses inner-product distance, which equals cosine distance only
+    for unit vectors; EmbeddingGenerator already normalizes, this guards other inputs.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return np.divide(embeddings, norms, out=embeddings.copy(), where=norms > 0)
+
+
+# Metadata value types ChromaDB stores as-is, checked by exact type first (one hash lookup)
+_CHROMA_SCALAR_TYPES = frozenset((str, int, float, bool))
+
+
+def _clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None values, join lists into comma-separated strings and stringify other types"""
+    cleaned = {}
+    for key, value in metadata.items():
+        if type(value) in _CHROMA_SCALAR_TYPES:
+            cleaned[key] = value
+        elif value is None:
+            continue
+        elif isinstance(value, (str, int, float, bool)):
+            # Subclasses (e.g. numpy float64, IntEnum) are kept as-is, as before
+            cleaned[key] = value
+        elif isinstance(value, list):
+            # Only include non-empty lists
+            if value:
+                cleaned[key] = ', '.join(map(str, value))
+        else:
+            cleaned[key] = str(value)
+    return cleaned
+
+
+def _to_chroma(embeddings: np.ndarray) -> Union[np.ndarray, List]:
+    """Pass numpy embeddings straight through where Chroma accepts them, else as nested lists"""
+    return embeddings if CHROMADB_NDARRAY_EMBEDDINGS else embeddings.tolist()
+
+
 class LegalVectorDB:
     """ChromaDB vector database for legal documents"""
     
-    def __init__(self, persist_directory: Path = VECTOR_DB_DIR):
+    def __init__(
+        self,
+        persist_directory: Path = VECTOR_DB_DIR,
+        embedder: Optional[EmbeddingGenerator] = None,
+        add_batch_size: int = VECTOR_DB_ADD_BATCH_SIZE
+    ):
         """
         Initialize ChromaDB with persistent storage
         
         Args:
             persist_directory: Directory to store the database
+            embedder: Embedding generator used for text queries (its memoized embeddings
+                make repeated queries skip the forward pass); Chroma's own embedding
+                function is used when omitted
+            add_batch_size: Maximum chunks sent to ChromaDB in one add call
         """
         if not CHROMADB_AVAILABLE:
             raise ImportError(
@@ -35,6 +91,8 @@ class LegalVectorDB:
                 "Install with: pip install chromadb"
             )
         
+        self.embedder = embedder
+        self.add_batch_size = max(1, add_batch_size)
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
@@ -49,7 +107,13 @@ class LegalVectorDB:
         self.collection_name = "nepal_legal_docs"
         self.collection = self.client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"description": "Nepal legal documents for RAG-based law explanation"}
+            # Embeddings are stored and queried unit-normalized, so inner product gives
+            # cosine distance (1 - similarity) without per-comparison norms
+            # (only applies when the collection is created; older collections keep theirs)
+            metadata={
+                "description": "Nepal legal documents for RAG-based law explanation",
+                "hnsw:space": "ip"
+            }
         )
         
         current_count = self.collection.count()
@@ -58,55 +122,56 @@ class LegalVectorDB:
     def add_chunks(
         self,
         chunks: List[Dict[str, Any]],
-        embeddings: List[List[float]]
+        embeddings: Union[np.ndarray, List[List[float]]],
+        finalize: bool = True
     ) -> None:
         """
         Add chunks with embeddings to the database
         
         Args:
             chunks: List of chunk dictionaries with 'chunk_id', 'text', and 'metadata'
-            embeddings: List of embedding vectors (as lists)
+            embeddings: Embedding matrix of shape (len(chunks), dim), or list of vectors
+            finalize: Log the resulting collection size (False for intermediate batches)
         """
         if len(chunks) != len(embeddings):
             raise ValueError(f"Number of chunks ({len(chunks)}) must match number of embeddings ({len(embeddings)})")
         
-        # Extract data from chunks
-        ids = [chunk['chunk_id'] for chunk in chunks]
-        documents = [chunk['text'] for chunk in chunks]
-        
-        # Clean metadata: ChromaDB only accepts str, int, float, bool
-        # Remove None values and convert other types to strings
-        metadatas = []
-        for chunk in chunks:
-            cleaned_metadata = {}
-            for key, value in chunk['metadata'].items():
-                if value is None:
-                    # Skip None values
-                    continue
-                elif isinstance(value, (str, int, float, bool)):
-                    # Keep valid types as-is
-                    cleaned_metadata[key] = value
-                elif isinstance(value, list):
-                    # Convert lists to comma-separated strings
-                    if value:  # Only include non-empty lists
-                        cleaned_metadata[key] = ', '.join(str(item) for item in value)
-                else:
-                    # Convert other types to strings
-                    cleaned_metadata[key] = str(value)
-            metadatas.append(cleaned_metadata)
+        # Unpack ids, documents and metadata in a single pass, validating each chunk
+        # (ChromaDB metadata only accepts str, int, float, bool; see _clean_metadata)
+        ids = [None] * len(chunks)
+        documents = [None] * len(chunks)
+        metadatas = [None] * len(chunks)
+        for i, chunk in enumerate(chunks):
+            chunk_id = chunk.get('chunk_id')
+            text = chunk.get('text')
+            if not chunk_id or text is None:
+                raise ValueError(f"Chunk at index {i} must have 'chunk_id' and 'text' fields")
+            ids[i] = chunk_id
+            documents[i] = text
+            
+            metadatas[i] = _clean_metadata(chunk.get('metadata') or {})
         
         logger.info(f"Adding {len(chunks)} chunks to vector database")
         
-        # Add to ChromaDB
-        self.collection.add(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas
-        )
+        # Pass float32 arrays straight through instead of boxing every float into a list
+        embeddings = _to_chroma(_unit_float32(embeddings))
         
-        total_count = self.collection.count()
-        logger.info(f"Successfully added chunks. Total documents in database: {total_count}")
+        # Add to ChromaDB in bounded batches so large inserts don't serialize everything at once
+        batch_size = self.add_batch_size
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end]
+            )
+            if len(ids) > batch_size:
+                logger.info(f"Added batch {start // batch_size + 1} ({min(end, len(ids))}/{len(ids)} chunks)")
+        
+        if finalize:
+            total_count = self.collection.count()
+            logger.info(f"Successfully added chunks. Total documents in database: {total_count}")
     
     def query(
         self,
@@ -127,6 +192,10 @@ class LegalVectorDB:
         """
         logger.info(f"Querying database with: '{query_text[:50]}...' (n_results={n_results})")
         
+        if self.embedder is not None:
+            # Same model as ingestion; repeated query texts come from the embedder's LRU
+            return self.query_with_embedding(self.embedder.generate_embedding(query_text), n_results, where)
+        
         results = self.collection.query(
             query_texts=[query_text],
             n_results=n_results,
@@ -137,7 +206,7 @@ class LegalVectorDB:
     
     def query_with_embedding(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         n_results: int = DEFAULT_RETRIEVAL_K,
         where: Optional[Dict] = None
     ) -> Dict[str, Any]:
@@ -145,7 +214,7 @@ class LegalVectorDB:
         Query with pre-computed embedding
         
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (list or numpy array)
             n_results: Number of results to return
             where: Optional metadata filter
             
@@ -155,13 +224,52 @@ class LegalVectorDB:
         logger.info(f"Querying database with embedding (n_results={n_results})")
         
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=[_to_chroma(_unit_float32(query_embedding))],
             n_results=n_results,
             where=where
         )
         
         return results
     
+    def query_with_embeddings(
+        self,
+        query_embeddings: Union[List[List[float]], np.ndarray],
+        n_results: int = DEFAULT_RETRIEVAL_K,
+        where: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Query with several pre-computed embeddings in one call
+        
+        Prefer this over calling query_with_embedding in a loop: Chroma searches all
+        queries in one call instead of paying the per-call overhead for each.
+        
+        Args:
+            query_embeddings: Query embedding vectors, shape (n_queries, dim)
+            n_results: Number of results to return per query
+            where: Optional metadata filter
+            
+        Returns:
+            Dictionary with 'ids', 'documents', 'metadatas', and 'distances',
+            each holding one result list per query
+        """
+        # One conversion validates the batch up front (ragged or non-numeric input fails here)
+        try:
+            query_embeddings = _unit_float32(query_embeddings)
+        except ValueError as e:
+            raise ValueError(f"Query embeddings must all have the same dimension: {e}") from e
+        if query_embeddings.ndim != 2:
+            raise ValueError(
+                f"Query embeddings must have shape (n_queries, dim), got {query_embeddings.shape}"
+            )
+        
+        logger.info(f"Querying database with {len(query_embeddings)} embeddings (n_results={n_results})")
+        
+        return self.collection.query(
+            query_embeddings=_to_chroma(query_embeddings),
+            n_results=n_results,
+            where=where
+        )
+    
     def get_count(self) -> int:
         """Get the number of documents in the database"""
         return self.collection.count()
@@ -1,5 +1,15 @@
 import json
-import random
+import os
+import sys
+from string import Formatter
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Categories (तपाईंको spelling अनुसार)
 categories = ["gender", "religional", "caste", "religion", "appearence", "socialstatus", "amiguity", "political", "Age", "Disablity"]
@@ -112,17 +122,16 @@ fillers = {
     ]
 }
 
-def generate_sentence():
-    template, main_cat = random.choice(templates)
-    sentence = template
-    
-    # Replace placeholders
-    for key in fillers:
-        while "{" + key + "}" in sentence:
-            if key == "neutral_sentence":
-                sentence = random.choice(fillers[key])
-            else:
-                sentence = sentence.replace("{" + key + "}", random.choice(fillers[key]), 1)
+NUM_SAMPLES = 15000
+OUTPUT_FILE = "nepali_binary_bias_dataset_15k.json"
+
+# Placeholder names of each template (each appears at most once per template)
+template_keys = [[name for _, name, _, _ in Formatter().parse(t) if name] for t, _ in templates]
+
+
+def generate_sentence(template, main_cat, chosen):
+    """Fill a template's placeholders with the pre-sampled filler values in `chosen`"""
+    sentence = template.format_map(chosen)
     
     # Binary labels: only ONE category = 1, or all 0
     labels = {cat: 0 for cat in categories}
@@ -133,15 +142,40 @@ def generate_sentence():
     
     return {"text": sentence, **labels}
 
-# Generate 15,000 samples
-dataset = [generate_sentence() for _ in range(15000)]
 
-# Save to JSON file
-with open("nepali_binary_bias_dataset_15k.json", "w", encoding="utf-8") as f:
-    json.dump(dataset, f, ensure_ascii=False, indent=2)
-
-print("✅ सफलतापूर्वक १५,००० entries भएको BINARY classification dataset generate भयो!")
-print("फाइल नाम: nepali_binary_bias_dataset_15k.json")
-print("\nउदाहरण (पहिलो ३ entries):")
-for i in range(3):
-    print(json.dumps(dataset[i], ensure_ascii=False, indent=2))
\ No newline at end of file
+def generate_dataset(n, rng=None):
+    """Generate n samples, drawing every template and filler choice up front in bulk"""
+    rng = rng or np.random.default_rng()
+    template_idx = rng.integers(0, len(templates), n)
+    filler_idx = {key: rng.integers(0, len(vals), n) for key, vals in fillers.items()}
+    
+    dataset = []
+    for i in range(n):
+        t = template_idx[i]
+        template, main_cat = templates[t]
+        chosen = {key: fillers[key][filler_idx[key][i]] for key in template_keys[t]}
+        dataset.append(generate_sentence(template, main_cat, chosen))
+    return dataset
+
+if __name__ == "__main__":
+    # The dataset is static and checked in; only regenerate it when asked to (--force)
+    if os.path.exists(OUTPUT_FILE) and "--force" not in sys.argv[1:]:
+        print(f"{OUTPUT_FILE} पहिले नै छ; फेरि generate गर्न --force दिनुहोस्।")
+        sys.exit(0)
+
+    # Generate 15,000 samples
+    dataset = generate_dataset(NUM_SAMPLES)
+
+    # Save to JSON file (orjson encodes the 15k records several times faster, always as UTF-8)
+    if ORJSON_AVAILABLE:
+        with open(OUTPUT_FILE, "wb") as f:
+            f.write(orjson.dumps(dataset, option=orjson.OPT_INDENT_2))
+    else:
+        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            json.dump(dataset, f, ensure_ascii=False, indent=2)
+
+    print("✅ सफलतापूर्वक १५,००० entries भएको BINARY classification dataset generate भयो!")
+    print(f"फाइल नाम: {OUTPUT_FILE}")
+    print("\nउदाहरण (पहिलो ३ entries):")
+    for i in range(3):
+        print(json.dumps(dataset[i], ensure_ascii=False, indent=2))
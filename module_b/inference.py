@@ -1,11 +1,16 @@
 import fitz  # pymupdf
+import os
 import re
-from typing import List
-from transformers import pipeline
-import torch
+import sys
+from typing import List, Optional
 
 PDF_FILE_PATH = "module_b/file_2.pdf"  
 
+# Sentence splitting patterns, compiled once for every PDF processed
+_WS_RE = re.compile(r'\s+')
+_SENT_RE = re.compile(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿअ-ह])|(?<=[।.!?])(?=$)')
+_SENT_FALLBACK_RE = re.compile(r'(?<=[।.!?])\s+')
+
 
 def extract_nepali_sentences_from_pdf(pdf_path: str) -> List[str]:
     """
@@ -14,10 +19,8 @@ def extract_nepali_sentences_from_pdf(pdf_path: str) -> List[str]:
     print(f"Opening PDF: {pdf_path}")
     doc = fitz.open(pdf_path)
     
-    full_text = ""
-    for page in doc:
-        text = page.get_text("text")
-        full_text += text + "\n"
+    # Join once instead of growing the string page by page
+    full_text = "".join(page.get_text("text") + "\n" for page in doc)
     
     doc.close()
     
@@ -27,12 +30,12 @@ def extract_nepali_sentences_from_pdf(pdf_path: str) -> List[str]:
     
     # Clean whitespace
     text = full_text.replace('\n', ' ')
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     
     # Split sentences intelligently
-    sentences = re.split(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿअ-ह])|(?<=[।.!?])(?=$)', text)
+    sentences = _SENT_RE.split(text)
     if len(sentences) <= 1:  # fallback
-        sentences = re.split(r'(?<=[।.!?])\s+', text)
+        sentences = _SENT_FALLBACK_RE.split(text)
     
     # Final cleaning
     cleaned = [s.strip(' ।.!?').strip() for s in sentences if len(s.strip()) > 5]
@@ -41,18 +44,100 @@ def extract_nepali_sentences_from_pdf(pdf_path: str) -> List[str]:
     return cleaned
 
 
-print("Loading your model from Hugging Face...")
 model_name = "sangy1212/distilbert-base-nepali-fine-tuned"
 
-classifier = pipeline(
-    "text-classification",
-    model=model_name,
-    tokenizer=model_name,
-    device=0 if torch.cuda.is_available() else -1,  
-    batch_size=16  
-)
+# The ONNX export is written here on first load and reused by later runs
+ONNX_EXPORT_DIR = "module_b/onnx_model"
+
+# Loaded on first use, so importing this module (e.g. just for PDF extraction)
+# doesn't pull in torch, create a CUDA context or download the model
+_tokenizer = None
+_model = None
+
+
+def load_model():
+    """ONNX Runtime export of the model when optimum is installed, else the PyTorch model"""
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    try:
+        # ONNX Runtime: fused attention/layernorm kernels (pip install "optimum[onnxruntime]")
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        provider = "CUDAExecutionProvider" if device.type == "cuda" else "CPUExecutionProvider"
+        if os.path.isdir(ONNX_EXPORT_DIR):
+            return ORTModelForSequenceClassification.from_pretrained(ONNX_EXPORT_DIR, export=False, provider=provider)
+        # Export once and keep the ONNX graph, so later loads skip the export
+        ort_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True, provider=provider)
+        ort_model.save_pretrained(ONNX_EXPORT_DIR)
+        return ort_model
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"ONNX Runtime unavailable ({e}); using PyTorch")
+    torch_model = AutoModelForSequenceClassification.from_pretrained(model_name).to(device).eval()
+    if device.type == "cuda":
+        torch_model = torch_model.half()  # Half the weight bandwidth; tensor cores on the GPU
+    return torch_model
+
+
+def _get_classifier():
+    """The (tokenizer, model) pair, loaded on first call"""
+    global _tokenizer, _model
+    if _model is None:
+        from transformers import AutoTokenizer
+
+        print("Loading your model from Hugging Face...")
+        _tokenizer = AutoTokenizer.from_pretrained(model_name)
+        _model = load_model()
+        print("Model loaded and ready!\n")
+    return _tokenizer, _model
+
+
+def _tokenize(tokenizer, texts: List[str], pin: bool) -> dict:
+    """Tokenize one batch; pinned host memory lets the copy to the GPU run asynchronously"""
+    inputs = tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+    if pin:
+        return {k: v.pin_memory() for k, v in inputs.items()}
+    return dict(inputs)
+
+
+def classify(sentences: List[str], batch_size: Optional[int] = None) -> List[dict]:
+    """
+    Classify sentences in length-sorted batches (same output as the text-classification pipeline)
+
+    Sorting by length keeps each batch padded only to its own longest sentence.
+    Batches default to 64 sentences on GPU and 16 on CPU. On GPU the next batch is
+    tokenized while the current one runs, and results are only read back at the end.
+    """
+    import torch
+
+    tokenizer, model = _get_classifier()
+    on_gpu = model.device.type == "cuda"
+    if batch_size is None:
+        batch_size = 64 if on_gpu else 16
+
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+    batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+    pending = []
+
+    with torch.inference_mode():
+        next_inputs = _tokenize(tokenizer, [sentences[i] for i in batches[0]], on_gpu) if batches else None
+        for n, batch in enumerate(batches):
+            inputs = {k: v.to(model.device, non_blocking=True) for k, v in next_inputs.items()}
+            probs = model(**inputs).logits.float().softmax(dim=-1)
+            pending.append((batch, probs.max(dim=-1)))
+            # CUDA kernels are queued asynchronously, so this overlaps with the forward pass
+            if n + 1 < len(batches):
+                next_inputs = _tokenize(tokenizer, [sentences[i] for i in batches[n + 1]], on_gpu)
+
+    results = [None] * len(sentences)
+    for batch, (scores, label_ids) in pending:
+        for i, score, label_id in zip(batch, scores.tolist(), label_ids.tolist()):
+            results[i] = {"label": model.config.id2label[label_id], "score": score}
+
+    return results
 
-print("Model loaded and ready!\n")
 
 id_to_label = {
     "LABEL_0":  "neutral",
@@ -79,11 +164,10 @@ def predict_bias_on_sentences(sentences: List[str], confidence_threshold: float
     print(f"Running bias detection on {len(sentences)} sentences...\n")
     
     # Batch inference
-    results = classifier(sentences)
+    results = classify(sentences)
     
-    print("="*100)
-    print("BIAS DETECTION RESULTS")
-    print("="*100)
+    # Build the whole report and write it once instead of ~6 prints per sentence
+    out = ["=" * 100, "BIAS DETECTION RESULTS", "=" * 100]
     
     biased_count = 0
     for sent, res in zip(sentences, results):
@@ -97,14 +181,14 @@ def predict_bias_on_sentences(sentences: List[str], confidence_threshold: float
         else:
             mark = "✓ neutral / low confidence"
         
-        print(f"{mark}")
-        print(f"   Category   : {category.upper()}")
-        print(f"   Confidence : {confidence:.3f}")
-        print(f"   Sentence   : {sent}")
-        print("-" * 80)
+        out.append(mark)
+        out.append(f"   Category   : {category.upper()}")
+        out.append(f"   Confidence : {confidence:.3f}")
+        out.append(f"   Sentence   : {sent}")
+        out.append("-" * 80)
     
-    print(f"\nSummary: {biased_count}/{len(sentences)} sentences contain detectable bias (confidence ≥ {confidence_threshold})")
-
+    out.append(f"\nSummary: {biased_count}/{len(sentences)} sentences contain detectable bias (confidence ≥ {confidence_threshold})")
+    sys.stdout.write("\n".join(out) + "\n")
 
 if __name__ == "__main__":
     pdf_file_path = PDF_FILE_PATH 
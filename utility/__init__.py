@@ -2,6 +2,6 @@
 Utility modules for document processing and LLM integration
 """
 
-from .pdf_processor import PDFProcessor
+from .pdf_processor import PDFProcessor, get_processor
 
-__all__ = ["PDFProcessor"]
+__all__ = ["PDFProcessor", "get_processor"]
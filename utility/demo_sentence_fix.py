@@ -5,17 +5,24 @@ Test script to demonstrate improved Nepali sentence splitting
 import re
 from typing import List
 
+# Patterns compiled once at import
+_WS_RE = re.compile(r'\s+')
+_OLD_SENT_RE = re.compile(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿ])|(?<=[।.!?])(?=$)')
+_DANDA_SENT_RE = re.compile(r'(?<=।)\s*(?=[अ-हँ-ॿ])')
+_PUNCT_SENT_RE = re.compile(r'(?<=[।.!?])\s*(?=[अ-हँ-ॿ])')
+_SENT_FALLBACK_RE = re.compile(r'(?<=[।.!?])\s+')
+
 def old_split_method(text: str) -> List[str]:
     """Old method that required space after danda"""
     # Clean whitespace
     text = text.replace('\n', ' ')
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     
     # Old pattern - requires space after punctuation
-    sentences = re.split(r'(?<=[।.!?])\s+(?=[अ-हँ-ॿ])|(?<=[।.!?])(?=$)', text)
+    sentences = _OLD_SENT_RE.split(text)
     
     if len(sentences) <= 1:
-        sentences = re.split(r'(?<=[।.!?])\s+', text)
+        sentences = _SENT_FALLBACK_RE.split(text)
     
     cleaned = [s.strip(' ।.!?').strip() for s in sentences if len(s.strip()) > 5]
     return cleaned
@@ -25,16 +32,16 @@ def new_split_method(text: str) -> List[str]:
     """New improved method - handles no space after danda"""
     # Clean whitespace
     text = text.replace('\n', ' ')
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     
     # New pattern - \s* means zero or more spaces
-    sentences = re.split(r'(?<=।)\s*(?=[अ-हँ-ॿ])', text)
+    sentences = _DANDA_SENT_RE.split(text)
     
     if len(sentences) <= 1:
-        sentences = re.split(r'(?<=[।.!?])\s*(?=[अ-हँ-ॿ])', text)
+        sentences = _PUNCT_SENT_RE.split(text)
     
     if len(sentences) <= 1:
-        sentences = re.split(r'(?<=[।.!?])\s+', text)
+        sentences = _SENT_FALLBACK_RE.split(text)
     
     # Clean and add danda back
     cleaned_sentences = []
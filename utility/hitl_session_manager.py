@@ -3,27 +3,52 @@ Human-in-the-Loop Session Manager
 Manages review sessions for bias detection with user approval workflow
 """
 
+import os
+import time
 import uuid
+import logging
+from collections import Counter
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from api.schemas import BiasReviewSession, BiasReviewItem
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 class HITLSessionManager:
     """
     Manages in-memory sessions for human-in-the-loop bias detection workflow.
     Stores session state between PDF upload, review, and final response generation.
+    Sessions not updated for `ttl_seconds` are dropped, together with their PDF.
     """
 
-    def __init__(self):
-        """Initialize session manager with empty sessions dictionary."""
+    def __init__(self, pdf_bucket=None, ttl_seconds: int = 3600):
+        """
+        Initialize session manager with empty sessions dictionary.
+
+        Args:
+            pdf_bucket: Optional object-storage bucket (e.g. ``supabase.storage.from_(name)``)
+                that uploaded PDFs are moved into; sessions then only keep the object key
+            ttl_seconds: Lifetime of a session after its last update
+        """
         self._sessions: Dict[str, BiasReviewSession] = {}
+        self._pdf_bucket = pdf_bucket
+        self._ttl_seconds = ttl_seconds
+        # session_id -> monotonic deadline, pushed back on every write
+        self._expires_at: Dict[str, float] = {}
 
     def create_session(
         self,
         filename: str,
         sentences: list,
         raw_text: str,
-        original_pdf_bytes: Optional[bytes] = None
+        original_pdf_path: Optional[str] = None,
+        owner_id: Optional[str] = None
     ) -> BiasReviewSession:
         """
         Create a new review session.
@@ -32,26 +57,73 @@ class HITLSessionManager:
             filename: Original PDF filename
             sentences: List of BiasReviewItem objects
             raw_text: Raw extracted text from PDF
-            original_pdf_bytes: Original PDF file as bytes (for PDF regeneration)
+            original_pdf_path: Path of the uploaded PDF on disk (for PDF regeneration);
+                the session takes ownership of the file
+            owner_id: Id of the uploading user, used to scope the stored PDF's object key
 
         Returns:
             BiasReviewSession object with generated session_id
         """
+        self._sweep_expired()
         session_id = str(uuid.uuid4())
 
+        original_pdf_ref = None
+        if original_pdf_path:
+            original_pdf_ref = self._store_pdf(session_id, original_pdf_path, owner_id)
+            if original_pdf_ref:
+                original_pdf_path = None
+
         session = BiasReviewSession(
             session_id=session_id,
             original_filename=filename,
             sentences=sentences,
             raw_text=raw_text,
-            original_pdf_bytes=original_pdf_bytes,
+            original_pdf_path=original_pdf_path,
+            original_pdf_ref=original_pdf_ref,
             created_at=datetime.utcnow().isoformat(),
             status="pending_review"
         )
 
-        self._sessions[session_id] = session
+        self._save_session(session)
         return session
 
+    def _store_pdf(self, session_id: str, pdf_path: str, owner_id: Optional[str]) -> Optional[str]:
+        """
+        Move an uploaded PDF into object storage.
+
+        Returns:
+            The object key, or None when no bucket is configured (the PDF stays on disk)
+        """
+        if self._pdf_bucket is None:
+            return None
+
+        key = f"{owner_id or 'anonymous'}/{session_id}.pdf"
+        self._pdf_bucket.upload(key, pdf_path, {"content-type": "application/pdf"})
+        os.remove(pdf_path)
+        return key
+
+    def _delete_pdf(self, session: BiasReviewSession) -> None:
+        """Remove a session's original PDF from disk or object storage."""
+        try:
+            if session.original_pdf_ref and self._pdf_bucket is not None:
+                self._pdf_bucket.remove([session.original_pdf_ref])
+            elif session.original_pdf_path:
+                os.remove(session.original_pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not remove PDF for session {session.session_id}: {e}")
+
+    def _save_session(self, session: BiasReviewSession) -> None:
+        """Persist a new or modified session (in-memory sessions are stored by reference)."""
+        self._sessions[session.session_id] = session
+        self._expires_at[session.session_id] = time.monotonic() + self._ttl_seconds
+
+    def _sweep_expired(self) -> None:
+        """Delete abandoned sessions (and their PDFs) whose TTL has passed."""
+        now = time.monotonic()
+        for session_id in [sid for sid, deadline in self._expires_at.items() if deadline <= now]:
+            logger.info(f"Expiring abandoned HITL session {session_id}")
+            self.delete_session(session_id)
+
     def get_session(self, session_id: str) -> Optional[BiasReviewSession]:
         """
         Retrieve a session by ID.
@@ -62,6 +134,10 @@ class HITLSessionManager:
         Returns:
             BiasReviewSession if found, None otherwise
         """
+        deadline = self._expires_at.get(session_id)
+        if deadline is not None and deadline <= time.monotonic():
+            self.delete_session(session_id)
+            return None
         return self._sessions.get(session_id)
 
     def update_sentence_status(
@@ -87,19 +163,21 @@ class HITLSessionManager:
         if not session:
             return False
 
-        for sentence in session.sentences:
-            if sentence.sentence_id == sentence_id:
-                sentence.status = status
-                if approved_suggestion:
-                    sentence.approved_suggestion = approved_suggestion
+        sentence = session.get_sentence(sentence_id)
+        if not sentence:
+            return False
 
-                # Update session status to in_progress once first action taken
-                if session.status == "pending_review":
-                    session.status = "in_progress"
+        sentence.status = status
+        if approved_suggestion:
+            sentence.approved_suggestion = approved_suggestion
 
-                return True
+        # Update session status to in_progress once first action taken
+        if session.status == "pending_review":
+            session.status = "in_progress"
 
-        return False
+        session.version += 1
+        self._save_session(session)
+        return True
 
     def update_sentence_suggestion(
         self,
@@ -122,13 +200,15 @@ class HITLSessionManager:
         if not session:
             return False
 
-        for sentence in session.sentences:
-            if sentence.sentence_id == sentence_id:
-                sentence.suggestion = new_suggestion
-                sentence.status = "pending"  # Reset to pending after regeneration
-                return True
+        sentence = session.get_sentence(sentence_id)
+        if not sentence:
+            return False
 
-        return False
+        sentence.suggestion = new_suggestion
+        sentence.status = "pending"  # Reset to pending after regeneration
+        session.version += 1
+        self._save_session(session)
+        return True
 
     def get_session_stats(self, session_id: str) -> Optional[Dict]:
         """
@@ -144,16 +224,14 @@ class HITLSessionManager:
         if not session:
             return None
 
-        total = len(session.sentences)
-        pending = sum(1 for s in session.sentences if s.status == "pending")
-        approved = sum(1 for s in session.sentences if s.status == "approved")
-        needs_regen = sum(1 for s in session.sentences if s.status == "needs_regeneration")
+        # One pass over the sentences for all status counts
+        counts = Counter(s.status for s in session.sentences)
 
         return {
-            "total_sentences": total,
-            "pending_count": pending,
-            "approved_count": approved,
-            "needs_regeneration_count": needs_regen
+            "total_sentences": len(session.sentences),
+            "pending_count": counts["pending"],
+            "approved_count": counts["approved"],
+            "needs_regeneration_count": counts["needs_regeneration"]
         }
 
     def is_session_ready_for_pdf(self, session_id: str) -> bool:
@@ -179,7 +257,8 @@ class HITLSessionManager:
 
     def mark_session_completed(self, session_id: str) -> bool:
         """
-        Mark a session as completed.
+        Mark a session as completed and release its original PDF,
+        which is no longer needed once the final PDF has been generated.
 
         Args:
             session_id: Session identifier
@@ -191,7 +270,12 @@ class HITLSessionManager:
         if not session:
             return False
 
+        self._delete_pdf(session)
+        session.original_pdf_path = None
+        session.original_pdf_ref = None
         session.status = "completed"
+        session.version += 1
+        self._save_session(session)
         return True
 
     def delete_session(self, session_id: str) -> bool:
@@ -204,10 +288,13 @@ class HITLSessionManager:
         Returns:
             True if deleted, False if not found
         """
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            return True
-        return False
+        self._expires_at.pop(session_id, None)
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+
+        self._delete_pdf(session)
+        return True
 
     def get_all_sessions(self) -> Dict[str, BiasReviewSession]:
         """
@@ -217,3 +304,136 @@ class HITLSessionManager:
             Dictionary of all sessions
         """
         return self._sessions
+
+    def count_sessions(self) -> int:
+        """Number of active sessions (for health checks)."""
+        self._sweep_expired()
+        return len(self._sessions)
+
+    def get_original_pdf(self, session: BiasReviewSession) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Locate the original PDF of a session for regeneration.
+
+        PDFs kept in object storage are only downloaded here, when regeneration runs.
+
+        Returns:
+            Tuple of (pdf_path, pdf_bytes); at most one is needed by PDFRegenerator
+        """
+        if session.original_pdf_ref and self._pdf_bucket is not None:
+            return None, self._pdf_bucket.download(session.original_pdf_ref)
+        return session.original_pdf_path, None
+
+
+class RedisHITLSessionManager(HITLSessionManager):
+    """
+    Redis-backed session manager so any worker/replica can serve a review session.
+
+    Session state is stored as JSON under `hitl:session:<id>` and the original PDF
+    under `hitl:pdf:<id>` (or in the object-storage bucket, when one is configured),
+    both expiring after `ttl_seconds`.
+    """
+
+    SESSION_KEY = "hitl:session:{}"
+    PDF_KEY = "hitl:pdf:{}"
+
+    def __init__(self, redis_url: str, ttl_seconds: int = 3600, pdf_bucket=None):
+        """
+        Initialize the Redis connection pool.
+
+        Args:
+            redis_url: Redis connection URL (e.g. redis://localhost:6379/0)
+            ttl_seconds: Expiry applied to session and PDF keys on every write
+            pdf_bucket: Optional object-storage bucket for PDFs (Redis stores them otherwise)
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis library not installed. Install with: pip install redis")
+
+        super().__init__(pdf_bucket=pdf_bucket, ttl_seconds=ttl_seconds)
+        self._redis = redis.Redis.from_url(redis_url)
+        # from_url connects lazily; fail here so create_session_manager can fall back to memory
+        self._redis.ping()
+
+    def _store_pdf(self, session_id: str, pdf_path: str, owner_id: Optional[str]) -> Optional[str]:
+        """Move the PDF into object storage, or into Redis so every replica can read it."""
+        if self._pdf_bucket is not None:
+            return super()._store_pdf(session_id, pdf_path, owner_id)
+
+        with open(pdf_path, "rb") as f:
+            self._redis.set(self.PDF_KEY.format(session_id), f.read(), ex=self._ttl_seconds)
+        os.remove(pdf_path)
+        return self.PDF_KEY.format(session_id)
+
+    def _delete_pdf(self, session: BiasReviewSession) -> None:
+        if self._pdf_bucket is not None:
+            super()._delete_pdf(session)
+        else:
+            self._redis.delete(self.PDF_KEY.format(session.session_id))
+
+    def _save_session(self, session: BiasReviewSession) -> None:
+        self._redis.set(
+            self.SESSION_KEY.format(session.session_id),
+            session.model_dump_json(exclude={"original_pdf_path"}),
+            ex=self._ttl_seconds,
+        )
+        # Keep the PDF alive as long as the session
+        self._redis.expire(self.PDF_KEY.format(session.session_id), self._ttl_seconds)
+
+    def get_session(self, session_id: str) -> Optional[BiasReviewSession]:
+        data = self._redis.get(self.SESSION_KEY.format(session_id))
+        if data is None:
+            return None
+        return BiasReviewSession.model_validate_json(data)
+
+    def delete_session(self, session_id: str) -> bool:
+        if self._pdf_bucket is not None:
+            session = self.get_session(session_id)
+            if session:
+                self._delete_pdf(session)
+        deleted = self._redis.delete(
+            self.SESSION_KEY.format(session_id),
+            self.PDF_KEY.format(session_id),
+        )
+        return deleted > 0
+
+    def get_all_sessions(self) -> Dict[str, BiasReviewSession]:
+        sessions = {}
+        for key in self._redis.scan_iter(match=self.SESSION_KEY.format("*")):
+            session_id = key.decode().rsplit(":", 1)[-1]
+            session = self.get_session(session_id)
+            if session:
+                sessions[session_id] = session
+        return sessions
+
+    def count_sessions(self) -> int:
+        return sum(1 for _ in self._redis.scan_iter(match=self.SESSION_KEY.format("*")))
+
+    def get_original_pdf(self, session: BiasReviewSession) -> Tuple[Optional[str], Optional[bytes]]:
+        if self._pdf_bucket is not None:
+            return super().get_original_pdf(session)
+        return None, self._redis.get(self.PDF_KEY.format(session.session_id))
+
+
+def create_session_manager(
+    redis_url: Optional[str] = None,
+    ttl_seconds: int = 3600,
+    pdf_bucket=None
+) -> HITLSessionManager:
+    """
+    Build the session manager: Redis-backed when a URL is configured, in-memory otherwise.
+
+    Args:
+        redis_url: Redis connection URL (empty/None for in-memory sessions)
+        ttl_seconds: Session expiry after the last update
+        pdf_bucket: Optional object-storage bucket that original PDFs are kept in
+
+    Returns:
+        HITLSessionManager instance
+    """
+    if redis_url:
+        try:
+            manager = RedisHITLSessionManager(redis_url, ttl_seconds=ttl_seconds, pdf_bucket=pdf_bucket)
+            logger.info("Using Redis-backed HITL session storage")
+            return manager
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis session storage, falling back to memory: {e}")
+    return HITLSessionManager(pdf_bucket=pdf_bucket, ttl_seconds=ttl_seconds)
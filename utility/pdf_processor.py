@@ -4,17 +4,97 @@ Handles PDF extraction and sentence segmentation using LLM refinement
 Uses PyMuPDF for extraction and Mistral LLM for sentence refinement
 """
 
+import atexit
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
 import json
-from typing import List, Dict, Any, Optional
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import fitz  # PyMuPDF
 
 # Import Mistral client from module_a
 from module_a.llm_client import MistralClient
+from utility.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# MuPDF writes every recoverable error/warning in a malformed PDF to stderr; real
+# failures still raise, so keep that per-request output out of the service logs
+fitz.TOOLS.mupdf_display_errors(False)
+fitz.TOOLS.mupdf_display_warnings(False)
+
+# Sentence segmentation patterns, compiled once (see split_into_sentences)
+# Split on । (danda) followed by a Nepali character, with or without space after it
+_DANDA_SPLIT_RE = re.compile(r'(?<=।)\s*(?=[अ-हँ-ॿ])')
+# Split on any sentence punctuation followed by a Nepali character
+_PUNCT_SPLIT_RE = re.compile(r'(?<=[।.!?])\s*(?=[अ-हँ-ॿ])')
+# Final fallback: any sentence punctuation followed by whitespace
+_PUNCT_SPACE_SPLIT_RE = re.compile(r'(?<=[।.!?])\s+')
+_SENTENCE_PUNCTUATION = frozenset('।.!?')
+# Stripped from both ends of each split piece before the danda is added back
+_SENTENCE_STRIP_CHARS = ' ।.!?'
+
+
+def _sha256_file(path: str) -> str:
+    """SHA-256 of a file, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a cached result that callers can modify (sentences list included)"""
+    return {**result, "sentences": list(result["sentences"])}
+
+
+def _is_clean_sentence(sentence: str) -> bool:
+    """A segmented sentence of plausible length with no sentence punctuation before its closing danda"""
+    return (
+        REFINE_MIN_SENTENCE_CHARS <= len(sentence) <= REFINE_MAX_SENTENCE_CHARS
+        and _SENTENCE_PUNCTUATION.isdisjoint(sentence[:-1])
+    )
+
+# Decodes the JSON array in an LLM response from its first '[' (ignores any trailing prose)
+_JSON_DECODER = json.JSONDecoder()
+
+# LLM refinement sends sentences in chunks of this size, several chunks at a time
+REFINE_CHUNK_SIZE = 16
+REFINE_MAX_CONCURRENCY = 8
+# Refined chunks reused for identical text (re-uploaded PDFs, repeated paragraphs); 0 TTL disables
+REFINE_CACHE_SIZE = 4096
+REFINE_CACHE_TTL = 24 * 3600
+# Documents whose regex segmentation already looks clean (at least this fraction of
+# sentences pass _is_clean_sentence) skip the LLM; above 1.0 every document is refined
+REFINE_SKIP_CONFIDENCE = 0.95
+REFINE_MIN_SENTENCE_CHARS = 4
+REFINE_MAX_SENTENCE_CHARS = 400
+# Successful process_pdf / process_pdf_from_bytes results reused for identical PDF content
+PDF_RESULT_CACHE_SIZE = 64
+PDF_RESULT_CACHE_TTL = 3600
+
+# Long PDFs have their pages extracted by worker processes, in blocks of pages
+PDF_EXTRACT_WORKERS = min(os.cpu_count() or 1, 4)
+PDF_EXTRACT_PAGES_PER_TASK = 8
+PDF_PARALLEL_MIN_PAGES = 32
+
+# SHA-256 of a chunk's combined text -> its refined sentences, shared by all processors
+_refine_cache = TTLCache(maxsize=REFINE_CACHE_SIZE, ttl=REFINE_CACHE_TTL)
+
+
+def _extract_pages(pdf_path: str, start: int, stop: int) -> str:
+    """Worker: text of pages [start, stop) of a PDF, each page followed by a newline."""
+    with fitz.open(pdf_path) as doc:
+        return "".join(doc[i].get_text("text") + "\n" for i in range(start, stop))
+
 
 class PDFProcessor:
     """
@@ -22,16 +102,95 @@ class PDFProcessor:
     Uses PyMuPDF for PDF text extraction and Mistral LLM for sentence refinement.
     """
 
-    def __init__(self, mistral_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        mistral_api_key: Optional[str] = None,
+        refine_chunk_size: int = REFINE_CHUNK_SIZE,
+        refine_max_concurrency: int = REFINE_MAX_CONCURRENCY,
+        extract_workers: int = PDF_EXTRACT_WORKERS,
+        llm_confidence_threshold: float = REFINE_SKIP_CONFIDENCE
+    ):
         """
         Initialize PDF Processor with Mistral client.
 
         Args:
             mistral_api_key: Optional Mistral API key (if not provided, uses env variable)
+            refine_chunk_size: Sentences sent to the LLM per refinement request
+            refine_max_concurrency: Maximum refinement requests in flight at once
+            extract_workers: Processes used to extract text from PDFs of at least
+                PDF_PARALLEL_MIN_PAGES pages (1 disables parallel extraction)
+            llm_confidence_threshold: Fraction of clean-looking sentences from which a
+                document's regex segmentation is kept without LLM refinement
         """
         self.llm_client = MistralClient(api_key=mistral_api_key)
+        self.refine_chunk_size = refine_chunk_size
+        self.refine_max_concurrency = refine_max_concurrency
+        self.extract_workers = extract_workers
+        self.llm_confidence_threshold = llm_confidence_threshold
+        # (SHA-256 of the PDF, refine_with_llm, include_raw_text) -> successful result
+        self._result_cache = TTLCache(maxsize=PDF_RESULT_CACHE_SIZE, ttl=PDF_RESULT_CACHE_TTL)
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        self._extract_pool_lock = threading.Lock()
         logger.info("PDFProcessor initialized")
 
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        """Start the extraction worker processes on first use"""
+        with self._extract_pool_lock:
+            if self._extract_pool is None:
+                # spawn, not fork: requests call this from threads of the API server
+                self._extract_pool = ProcessPoolExecutor(
+                    max_workers=self.extract_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(self._extract_pool.shutdown)
+            return self._extract_pool
+
+    def _use_parallel_extraction(self, page_count: int) -> bool:
+        return self.extract_workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+
+    def _extract_pages_parallel(self, pdf_path: str, page_count: int) -> str:
+        """Extract blocks of PDF_EXTRACT_PAGES_PER_TASK pages in the worker processes, joined in page order."""
+        starts = range(0, page_count, PDF_EXTRACT_PAGES_PER_TASK)
+        stops = [min(start + PDF_EXTRACT_PAGES_PER_TASK, page_count) for start in starts]
+        logger.info(f"Extracting {page_count} pages with {self.extract_workers} worker processes")
+        return "".join(self._get_extract_pool().map(_extract_pages, repeat(pdf_path), starts, stops))
+
+    def _extract_doc_text(
+        self,
+        doc: fitz.Document,
+        pdf_path: Optional[str] = None,
+        pdf_bytes: Optional[Union[bytes, bytearray, memoryview]] = None
+    ) -> str:
+        """
+        Text of every page of an open document, each followed by a newline; closes the document.
+
+        Long documents are handed to the extraction process pool, whose workers open
+        `pdf_path` (or a temporary copy of `pdf_bytes` when there is no path).
+        """
+        page_count = doc.page_count
+        if not self._use_parallel_extraction(page_count):
+            # Collect the pages and join once instead of growing a string page by page
+            parts: List[str] = []
+            for page_num, page in enumerate(doc):
+                parts.append(page.get_text("text"))
+                parts.append("\n")
+                logger.debug(f"Extracted text from page {page_num + 1}")
+            
+            doc.close()
+            return "".join(parts)
+
+        doc.close()
+        if pdf_path is not None:
+            return self._extract_pages_parallel(pdf_path, page_count)
+
+        # Workers open the PDF by path, so spill the bytes to a temporary file once
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(pdf_bytes)
+        try:
+            return self._extract_pages_parallel(tmp.name, page_count)
+        finally:
+            os.remove(tmp.name)
+
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
         Extract raw text from PDF using PyMuPDF (fitz).
@@ -49,14 +208,7 @@ class PDFProcessor:
         try:
             logger.info(f"Opening PDF: {pdf_path}")
             doc = fitz.open(pdf_path)
-            
-            full_text = ""
-            for page_num, page in enumerate(doc):
-                text = page.get_text("text")
-                full_text += text + "\n"
-                logger.debug(f"Extracted text from page {page_num + 1}")
-            
-            doc.close()
+            full_text = self._extract_doc_text(doc, pdf_path=pdf_path)
             
             if not full_text.strip():
                 logger.warning("No text found in PDF. PDF might be image-based (requires OCR).")
@@ -82,12 +234,9 @@ class PDFProcessor:
         Returns:
             Cleaned text
         """
-        # Replace multiple newlines with single space
-        text = text.replace('\n', ' ')
-        # Replace multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text)
-        # Strip leading/trailing whitespace
-        return text.strip()
+        # Collapse newlines and runs of whitespace into single spaces and strip the
+        # ends in one C-level pass (split() uses the same whitespace set as \s)
+        return " ".join(text.split())
 
     def split_into_sentences(self, text: str) -> List[str]:
         """
@@ -115,53 +264,150 @@ class PDFProcessor:
         # - (?<=।) : After a danda
         # - \s* : Optional whitespace (0 or more spaces)
         # - (?=[अ-हँ-ॿ]) : Followed by a Nepali character (lookahead)
-        sentences = re.split(r'(?<=।)\s*(?=[अ-हँ-ॿ])', text)
+        # The split patterns start with a lookbehind, which stops `re` from skipping
+        # ahead to candidate positions; a C-level membership test rules out
+        # patterns that cannot match before scanning the whole text with them
+        has_danda = '।' in text
+        sentences = _DANDA_SPLIT_RE.split(text) if has_danda else [text]
         
         # If no danda found, try other punctuation
-        if len(sentences) <= 1:
+        if len(sentences) <= 1 and (has_danda or not _SENTENCE_PUNCTUATION.isdisjoint(text)):
             # Split on other punctuation with or without space
-            sentences = re.split(r'(?<=[।.!?])\s*(?=[अ-हँ-ॿ])', text)
-        
-        # Final fallback: split on any punctuation followed by space
-        if len(sentences) <= 1:
-            sentences = re.split(r'(?<=[।.!?])\s+', text)
+            sentences = _PUNCT_SPLIT_RE.split(text)
+            
+            # Final fallback: split on any punctuation followed by space
+            if len(sentences) <= 1:
+                sentences = _PUNCT_SPACE_SPLIT_RE.split(text)
         
         # Clean sentences: 
         # - Remove trailing punctuation marks
         # - Strip extra spaces
         # - Keep sentences with actual content (more than 3 characters after cleaning)
-        cleaned_sentences = []
-        for s in sentences:
-            # Strip spaces and punctuation
-            cleaned = s.strip(' ।.!?').strip()
-            # Add back the danda for proper Nepali formatting
-            if cleaned and len(cleaned) > 3:
-                # If original sentence had danda, keep it
-                if s.rstrip().endswith('।'):
-                    cleaned_sentences.append(cleaned + '।')
-                else:
-                    cleaned_sentences.append(cleaned + '।')
+        # - Add back the danda for proper Nepali formatting
+        cleaned_sentences = [
+            cleaned + '।'
+            for s in sentences
+            if len(cleaned := s.strip(_SENTENCE_STRIP_CHARS).strip()) > 3
+        ]
         
         logger.info(f"Split text into {len(cleaned_sentences)} sentences")
         return cleaned_sentences
 
+    def iter_sentences(self, pdf_path: str, chunk_pages: int = 4) -> Iterator[str]:
+        """
+        Yield the sentences of a PDF as its pages are extracted (regex segmentation only).
+
+        Produces the same sentences as `split_into_sentences` on the whole text, but
+        downstream work such as bias detection can start on the first pages while
+        later ones are still being extracted. Text after the last danda boundary of a
+        block of pages is carried into the next block, so sentences spanning pages
+        stay whole.
+
+        Args:
+            pdf_path: Path to the PDF file
+            chunk_pages: Pages extracted between rounds of splitting
+
+        Yields:
+            Sentences, in document order
+        """
+        carry = ""
+        split_any = False
+        with fitz.open(pdf_path) as doc:
+            for start in range(0, doc.page_count, chunk_pages):
+                stop = min(start + chunk_pages, doc.page_count)
+                block = carry + "".join(doc[i].get_text("text") + "\n" for i in range(start, stop))
+                pieces = _DANDA_SPLIT_RE.split(block) if '।' in block else [block]
+                carry = pieces.pop()
+                split_any = split_any or bool(pieces)
+                for piece in pieces:
+                    # Same cleanup as clean_text + split_into_sentences, per piece
+                    cleaned = " ".join(piece.split()).strip(_SENTENCE_STRIP_CHARS).strip()
+                    if len(cleaned) > 3:
+                        yield cleaned + '।'
+
+        if split_any:
+            cleaned = " ".join(carry.split()).strip(_SENTENCE_STRIP_CHARS).strip()
+            if len(cleaned) > 3:
+                yield cleaned + '।'
+        else:
+            # No danda boundary anywhere: carry is the whole text, so use the full fallback chain
+            yield from self.split_into_sentences(carry)
+
     def refine_sentences_with_llm(self, sentences: List[str]) -> List[str]:
         """
         Use Mistral LLM to refine and validate sentence segmentation.
         Helps correct any mis-segmented sentences, especially for Nepali text.
 
+        Sentences are refined in chunks of `refine_chunk_size`, with up to
+        `refine_max_concurrency` requests in flight, so latency grows with the
+        number of rounds rather than with the size of the document. Results keep
+        the original order; a chunk that fails keeps its original sentences.
+
         Args:
             sentences: List of sentences to refine
 
         Returns:
             Refined list of sentences
         """
+        return self._refine_sentences(sentences)[0]
+
+    def _refine_sentences(self, sentences: List[str]) -> Tuple[List[str], bool]:
+        """`refine_sentences_with_llm`, also reporting whether every chunk was refined (no fallback)."""
         if not sentences:
             logger.warning("No sentences provided for LLM refinement")
-            return []
+            return [], True
 
+        refined, fully_refined = self._refine_documents([sentences])
+        logger.info(f"LLM refined {len(sentences)} sentences to {len(refined[0])} sentences")
+        return refined[0], fully_refined
+
+    def _refine_documents(self, documents: List[List[str]]) -> Tuple[List[List[str]], bool]:
+        """
+        Refine the sentence lists of one or more documents with a shared pool of LLM requests.
+
+        Every document's chunks are queued together, so up to `refine_max_concurrency`
+        requests stay in flight across document boundaries. Documents whose
+        segmentation already looks clean are kept as they are, without any request.
+
+        Returns:
+            (refined sentence lists, in document order; False if any chunk kept its
+            original sentences because the LLM request failed)
+        """
+        refined: List[List[str]] = [[] for _ in documents]
+        chunks = []
+        owners = []
+        for doc_index, sentences in enumerate(documents):
+            if sentences:
+                confidence = sum(map(_is_clean_sentence, sentences)) / len(sentences)
+                if confidence >= self.llm_confidence_threshold:
+                    logger.info(f"LLM refinement skipped, confidence={confidence:.2f}")
+                    refined[doc_index] = list(sentences)
+                    continue
+            for i in range(0, len(sentences), self.refine_chunk_size):
+                chunks.append(sentences[i:i + self.refine_chunk_size])
+                owners.append(doc_index)
+
+        if len(chunks) <= 1:
+            refined_chunks = [self._refine_chunk_with_llm(chunk) for chunk in chunks]
+        else:
+            logger.info(f"Refining {sum(map(len, chunks))} sentences in {len(chunks)} concurrent chunks")
+            with ThreadPoolExecutor(max_workers=min(self.refine_max_concurrency, len(chunks))) as pool:
+                refined_chunks = list(pool.map(self._refine_chunk_with_llm, chunks))
+
+        fully_refined = True
+        for doc_index, (chunk, ok) in zip(owners, refined_chunks):
+            refined[doc_index].extend(chunk)
+            fully_refined = fully_refined and ok
+        return refined, fully_refined
+
+    def _refine_chunk_with_llm(self, sentences: List[str]) -> Tuple[List[str], bool]:
+        """Refine one chunk with a single LLM request: (sentences, True), or (originals, False) on failure."""
         # Combine sentences for batch processing
         combined_text = " ".join(sentences)
+        cache_key = hashlib.sha256(combined_text.encode("utf-8")).hexdigest()
+        cached = _refine_cache.get(cache_key)
+        if cached is not None:
+            return list(cached), True
         
         system_prompt = """You are a Nepali text processing expert specialized in sentence segmentation. 
 Your task is to:
@@ -190,7 +436,7 @@ Remember:
 - Return ONLY the JSON array"""
 
         try:
-            logger.info("Sending sentences to Mistral for refinement")
+            logger.info(f"Sending {len(sentences)} sentences to Mistral for refinement")
             response = self.llm_client.generate_response(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
@@ -198,10 +444,10 @@ Remember:
             )
             
             # Try to extract JSON array from response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
+            start = response.find('[')
+            if start >= 0:
                 try:
-                    refined_sentences = json.loads(json_match.group())
+                    refined_sentences, _ = _JSON_DECODER.raw_decode(response, start)
                     if isinstance(refined_sentences, list):
                         # Ensure all sentences end with danda
                         refined_sentences = [
@@ -209,23 +455,25 @@ Remember:
                             for s in refined_sentences 
                             if str(s).strip()
                         ]
-                        logger.info(f"LLM refined {len(sentences)} sentences to {len(refined_sentences)} sentences")
-                        return refined_sentences
+                        # Only successful refinements are cached; failures retry next time
+                        _refine_cache.set(cache_key, tuple(refined_sentences))
+                        return refined_sentences, True
                 except json.JSONDecodeError:
                     logger.warning("Could not parse JSON from LLM response, using original sentences")
-                    return sentences
+                    return sentences, False
             else:
                 logger.warning("Could not extract JSON from LLM response, using original sentences")
-                return sentences
+            return sentences, False
                 
         except Exception as e:
             logger.warning(f"LLM refinement failed, using original sentences: {e}")
-            return sentences
+            return sentences, False
 
     def process_pdf(
         self, 
         pdf_path: str, 
-        refine_with_llm: bool = True
+        refine_with_llm: bool = True,
+        include_raw_text: bool = False
     ) -> Dict[str, Any]:
         """
         Complete PDF processing pipeline: extract, clean, segment, and optionally refine.
@@ -233,6 +481,8 @@ Remember:
         Args:
             pdf_path: Path to the PDF file
             refine_with_llm: Whether to use LLM for refinement (default: True)
+            include_raw_text: Whether to return the extracted text (default: False,
+                so large documents' text isn't kept alive alongside the sentences)
 
         Returns:
             Dictionary with extraction results:
@@ -240,11 +490,19 @@ Remember:
                 "success": bool,
                 "sentences": List[str],
                 "total_sentences": int,
-                "raw_text": str,
+                "raw_text": Optional[str],  # None unless include_raw_text
+                "fully_refined": bool,  # False if some LLM refinement fell back to the originals
                 "error": Optional[str]
             }
         """
         try:
+            # Identical content (re-uploads, re-runs) is served from the result cache
+            cache_key = (_sha256_file(pdf_path), refine_with_llm, include_raw_text)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving cached result for identical PDF content")
+                return _copy_result(cached)
+            
             # Step 1: Extract text from PDF
             raw_text = self.extract_text_from_pdf(pdf_path)
             
@@ -265,23 +523,33 @@ Remember:
                     "success": False,
                     "sentences": [],
                     "total_sentences": 0,
-                    "raw_text": raw_text,
+                    "raw_text": raw_text if include_raw_text else None,
                     "error": "Could not segment sentences from extracted text"
                 }
             
+            # Don't keep the extracted text alive through the LLM calls unless it is returned
+            if not include_raw_text:
+                raw_text = None
+            
             # Step 3: Optionally refine with LLM
+            fully_refined = True
             if refine_with_llm:
-                sentences = self.refine_sentences_with_llm(sentences)
+                sentences, fully_refined = self._refine_sentences(sentences)
             
             logger.info(f"Successfully processed PDF: {len(sentences)} sentences")
             
-            return {
+            result = {
                 "success": True,
                 "sentences": sentences,
                 "total_sentences": len(sentences),
                 "raw_text": raw_text,
+                "fully_refined": fully_refined,
                 "error": None
             }
+            # A chunk that fell back to unrefined sentences must not be served as refined later
+            if fully_refined:
+                self._result_cache.set(cache_key, _copy_result(result))
+            return result
             
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
@@ -293,17 +561,55 @@ Remember:
                 "error": str(e)
             }
 
+    def process_pdfs(
+        self,
+        pdf_paths: List[str],
+        refine_with_llm: bool = True,
+        include_raw_text: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several PDFs, refining all of their sentences together.
+
+        Extraction and segmentation run one PDF at a time, as in `process_pdf`; the
+        LLM refinement chunks of every PDF then share one pool of concurrent requests
+        instead of each PDF waiting for the previous one's LLM calls.
+
+        Args:
+            pdf_paths: Paths to the PDF files
+            refine_with_llm: Whether to use LLM for refinement (default: True)
+            include_raw_text: Whether to return each PDF's extracted text (default: False)
+
+        Returns:
+            One dictionary per path, in order, in the format returned by `process_pdf`
+        """
+        results = [
+            self.process_pdf(path, refine_with_llm=False, include_raw_text=include_raw_text)
+            for path in pdf_paths
+        ]
+
+        if refine_with_llm:
+            succeeded = [result for result in results if result["success"]]
+            refined, fully_refined = self._refine_documents([result["sentences"] for result in succeeded])
+            for result, sentences in zip(succeeded, refined):
+                result["sentences"] = sentences
+                result["total_sentences"] = len(sentences)
+                result["fully_refined"] = fully_refined
+
+        return results
+
     def process_pdf_from_bytes(
         self,
-        pdf_bytes: bytes,
-        refine_with_llm: bool = True
+        pdf_bytes: Union[bytes, bytearray, memoryview],
+        refine_with_llm: bool = True,
+        include_raw_text: bool = False
     ) -> Dict[str, Any]:
         """
         Process PDF from bytes (for file uploads via API).
 
         Args:
-            pdf_bytes: PDF file contents as bytes
+            pdf_bytes: PDF file contents (bytes, bytearray or memoryview; none is copied)
             refine_with_llm: Whether to use LLM for refinement (default: True)
+            include_raw_text: Whether to return the extracted text (default: False)
 
         Returns:
             Dictionary with extraction results
@@ -311,16 +617,16 @@ Remember:
         try:
             logger.info("Processing PDF from bytes")
             
-            # Open PDF from bytes
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            cache_key = (hashlib.sha256(pdf_bytes).hexdigest(), refine_with_llm, include_raw_text)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving cached result for identical PDF content")
+                return _copy_result(cached)
             
-            full_text = ""
-            for page_num, page in enumerate(doc):
-                text = page.get_text("text")
-                full_text += text + "\n"
-                logger.debug(f"Extracted text from page {page_num + 1}")
-            
-            doc.close()
+            # Open PDF from bytes; PyMuPDF reads bytes/memoryview in place but copies a bytearray
+            stream = memoryview(pdf_bytes) if isinstance(pdf_bytes, bytearray) else pdf_bytes
+            doc = fitz.open(stream=stream, filetype="pdf")
+            full_text = self._extract_doc_text(doc, pdf_bytes=pdf_bytes)
             
             if not full_text.strip():
                 return {
@@ -339,23 +645,33 @@ Remember:
                     "success": False,
                     "sentences": [],
                     "total_sentences": 0,
-                    "raw_text": full_text,
+                    "raw_text": full_text if include_raw_text else None,
                     "error": "Could not segment sentences from extracted text"
                 }
             
+            # Don't keep the extracted text alive through the LLM calls unless it is returned
+            if not include_raw_text:
+                full_text = None
+            
             # Optionally refine with LLM
+            fully_refined = True
             if refine_with_llm:
-                sentences = self.refine_sentences_with_llm(sentences)
+                sentences, fully_refined = self._refine_sentences(sentences)
             
             logger.info(f"Successfully processed PDF from bytes: {len(sentences)} sentences")
             
-            return {
+            result = {
                 "success": True,
                 "sentences": sentences,
                 "total_sentences": len(sentences),
                 "raw_text": full_text,
+                "fully_refined": fully_refined,
                 "error": None
             }
+            # A chunk that fell back to unrefined sentences must not be served as refined later
+            if fully_refined:
+                self._result_cache.set(cache_key, _copy_result(result))
+            return result
             
         except Exception as e:
             logger.error(f"PDF processing from bytes failed: {e}")
@@ -366,3 +682,12 @@ Remember:
                 "raw_text": "",
                 "error": str(e)
             }
+
+
+@lru_cache(maxsize=1)
+def get_processor() -> PDFProcessor:
+    """
+    Shared PDFProcessor (built on first call), so callers reuse one Mistral client
+    connection pool, extraction worker pool and refinement cache.
+    """
+    return PDFProcessor()
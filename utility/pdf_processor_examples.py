@@ -3,7 +3,8 @@ Example usage of the PDF Processor utility
 Demonstrates how to extract sentences from Nepali PDFs and prepare for bias detection
 """
 
-from utility.pdf_processor import PDFProcessor
+from utility.pdf_processor import get_processor
+from itertools import islice
 import json
 
 
@@ -13,8 +14,8 @@ def example_pdf_processing():
     print("Example 1: Basic PDF Processing")
     print("=" * 60)
     
-    # Initialize processor
-    processor = PDFProcessor()
+    # Shared processor (one Mistral client across all the examples)
+    processor = get_processor()
     
     # Process a PDF file
     pdf_path = "path/to/your/nepali_document.pdf"
@@ -40,7 +41,7 @@ def example_pdf_processing_without_llm():
     print("Example 2: PDF Processing (No LLM Refinement)")
     print("=" * 60)
     
-    processor = PDFProcessor()
+    processor = get_processor()
     
     pdf_path = "path/to/your/nepali_document.pdf"
     
@@ -64,7 +65,7 @@ def example_batch_processing():
     print("Example 3: Batch PDF Processing")
     print("=" * 60)
     
-    processor = PDFProcessor()
+    processor = get_processor()
     pdf_files = [
         "path/to/document1.pdf",
         "path/to/document2.pdf",
@@ -73,12 +74,13 @@ def example_batch_processing():
     
     all_results = {}
     
-    for pdf_path in pdf_files:
-        result = processor.process_pdf(
-            pdf_path=pdf_path,
-            refine_with_llm=True
-        )
-        
+    # LLM refinement of all the PDFs runs concurrently
+    results = processor.process_pdfs(
+        pdf_paths=pdf_files,
+        refine_with_llm=True
+    )
+    
+    for pdf_path, result in zip(pdf_files, results):
         all_results[pdf_path] = {
             "success": result["success"],
             "total_sentences": result["total_sentences"],
@@ -99,7 +101,7 @@ def example_prepare_for_bias_detection():
     print("Example 4: Prepare for Bias Detection API")
     print("=" * 60)
     
-    processor = PDFProcessor()
+    processor = get_processor()
     
     pdf_path = "path/to/your/nepali_document.pdf"
     result = processor.process_pdf(
@@ -187,7 +189,7 @@ def example_error_handling():
     print("Example 6: Error Handling")
     print("=" * 60)
     
-    processor = PDFProcessor()
+    processor = get_processor()
     
     test_cases = [
         ("nonexistent.pdf", "File not found"),
@@ -204,6 +206,30 @@ def example_error_handling():
             print(f"  Success: {result['total_sentences']} sentences extracted")
 
 
+def example_stream_to_bias_detection():
+    """Example 7: Stream sentences into bias detection batches while the PDF is extracted"""
+    print("\n" + "=" * 60)
+    print("Example 7: Streaming Sentences to Bias Detection")
+    print("=" * 60)
+    
+    from api.schemas import BatchBiasDetectionRequest
+    
+    processor = get_processor()
+    pdf_path = "path/to/your/nepali_document.pdf"
+    
+    # Sentences are yielded as pages are extracted (regex segmentation, no LLM refinement),
+    # so each batch can be analyzed before the rest of the document has been read
+    sentences = processor.iter_sentences(pdf_path)
+    batch_size = 32
+    
+    payloads = []
+    while batch := list(islice(sentences, batch_size)):
+        payloads.append(BatchBiasDetectionRequest(texts=batch, confidence_threshold=0.7))
+        print(f"  Batch {len(payloads)}: {len(batch)} sentences ready for bias detection")
+    
+    return payloads
+
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("PDF Processor Usage Examples")
@@ -220,6 +246,7 @@ if __name__ == "__main__":
     # example_batch_processing()
     # example_prepare_for_bias_detection()
     # example_error_handling()
+    # example_stream_to_bias_detection()
     
     print("\n" + "=" * 60)
     print("For more information, see docs/pdf_processing.md")
@@ -65,17 +65,19 @@ class PDFRegenerator:
 
     def regenerate_pdf(
         self,
-        original_pdf_bytes: bytes,
+        original_pdf_bytes: Optional[bytes],
         sentences: List[BiasReviewItem],
-        output_filename: str = "debiased_document.pdf"
+        output_filename: str = "debiased_document.pdf",
+        original_pdf_path: Optional[str] = None
     ) -> Tuple[bool, Optional[bytes], Optional[str], Optional[List[Dict]]]:
         """
         Regenerate PDF with approved sentences replacing biased ones.
 
         Args:
-            original_pdf_bytes: Original PDF content as bytes
+            original_pdf_bytes: Original PDF content as bytes (ignored if a path is given)
             sentences: List of BiasReviewItem with approved suggestions
             output_filename: Name for the output PDF file
+            original_pdf_path: Path to the original PDF on disk
 
         Returns:
             Tuple of (success, pdf_bytes, error_message, sentence_details)
@@ -83,8 +85,11 @@ class PDFRegenerator:
         try:
             logger.info(f"Starting PDF regeneration for {output_filename}")
 
-            # Open the original PDF from bytes
-            doc = fitz.open(stream=original_pdf_bytes, filetype="pdf")
+            # Open the original PDF from disk if available, otherwise from bytes
+            if original_pdf_path:
+                doc = fitz.open(original_pdf_path)
+            else:
+                doc = fitz.open(stream=original_pdf_bytes, filetype="pdf")
 
             # Count replacements and track sentence details
             replacements_made = 0
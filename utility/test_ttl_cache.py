@@ -0,0 +1,47 @@
+"""
+Run: pytest utility/test_ttl_cache.py -v
+"""
+from utility.ttl_cache import TTLCache
+
+
+def test_get_set_and_pop():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set(("user-1", "conv-1"), True)
+
+    assert cache.get(("user-1", "conv-1")) is True
+    assert cache.get(("user-2", "conv-1")) is None
+
+    assert cache.pop(("user-1", "conv-1")) is True
+    assert cache.get(("user-1", "conv-1")) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_expired_entries_are_not_returned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utility.ttl_cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+
+    now[0] += 1
+    assert cache.get("a", default="missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_zero_ttl_disables_caching():
+    cache = TTLCache(ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None